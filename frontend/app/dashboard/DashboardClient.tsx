@@ -15,6 +15,8 @@ import {
 } from "recharts";
 
 const API_URL = process.env.NEXT_PUBLIC_API_URL ?? "/api";
+// Points the chart asks /portfolio for; the server picks the rollup resolution
+const CHART_POINTS = 500;
 
 
 type PortfolioEntry = {
@@ -26,6 +28,7 @@ type PortfolioEntry = {
 };
 type TradeEntry = {
   trade_id: number;
+  seq: number;      // commit order; the stream's resume cursor
   timestamp: string;
   strategy: string;
   symbol: string;
@@ -52,52 +55,90 @@ export default function DashboardClient() {
   const [portfolioHistory, setPortfolioHistory] = useState<PortfolioEntry[]>([]);
   const [trades, setTrades] = useState<TradeEntry[]>([]);
 
+  // The chart starts from the downsampled rollups (/portfolio?points=...), so
+  // a long history costs a few hundred rows. One server-sent event stream then
+  // adds only rows past the chart's last timestamp, plus a trades snapshot.
+  // On error we reconnect from the last trade seq / timestamp we have seen.
   useEffect(() => {
-    async function loadPortfolio() {
-      try {
-        const res = await fetch(`${API_URL}/portfolio`);
-        const json: Omit<PortfolioEntry, "ts">[] = await res.json();
-
-        const processed: PortfolioEntry[] = json.map((d) => ({
-          ...d,
-          ts: new Date(d.timestamp.replace(/\.\d+$/, "")).getTime()
-        }));
-
-        setPortfolioHistory(processed);
-      } catch (err) {
-        console.error("Portfolio fetch error:", err);
-      }
+    let source: EventSource | null = null;
+    let retry: ReturnType<typeof setTimeout> | null = null;
+    let lastSeq: number | null = null;
+    let lastTimestamp: string | null = null;
+    let closed = false;
+
+    const toTs = (timestamp: string) => new Date(timestamp.replace(/\.\d+$/, "")).getTime();
+
+    async function loadChart() {
+      const res = await fetch(`${API_URL}/portfolio?points=${CHART_POINTS}`);
+      if (!res.ok) throw new Error(`/portfolio returned ${res.status}`);
+      const json: Omit<PortfolioEntry, "ts">[] = await res.json();
+      if (json.length > 0) lastTimestamp = json[json.length - 1].timestamp;
+      setPortfolioHistory(json.map((d) => ({ ...d, ts: toTs(d.timestamp) })));
     }
 
-    loadPortfolio();
-    const id = setInterval(loadPortfolio, 10000);
-    return () => clearInterval(id);
-  }, []);
-
-useEffect(() => {
-  async function loadTrades() {
-    try {
-      const res = await fetch(`${API_URL}/trades`);
-      const json: Omit<TradeEntry, "ts">[] = await res.json();
-
-      const processed: TradeEntry[] = json.map((t) => ({
-        ...t,
-        ts: new Date(t.timestamp.replace(/\.\d+$/, "")).getTime(),
-      }));
-
-      // Sort newest → oldest
-      processed.sort((a, b) => b.ts - a.ts);
+    function connect() {
+      const params = new URLSearchParams();
+      if (lastSeq !== null) params.set("after_seq", String(lastSeq));
+      if (lastTimestamp !== null) params.set("since", lastTimestamp);
+
+      source = new EventSource(`${API_URL}/stream?${params.toString()}`);
+
+      source.addEventListener("trades", (e) => {
+        const json: Omit<TradeEntry, "ts">[] = JSON.parse((e as MessageEvent).data);
+        if (json.length === 0) return;
+        lastSeq = json[json.length - 1].seq;
+
+        const processed: TradeEntry[] = json.map((t) => ({ ...t, ts: toTs(t.timestamp) }));
+
+        // Sort newest → oldest
+        processed.sort((a, b) => b.ts - a.ts);
+        setTrades((prev) => [...processed, ...prev]);
+      });
+
+      source.addEventListener("portfolio", (e) => {
+        const json: Omit<PortfolioEntry, "ts">[] = JSON.parse((e as MessageEvent).data);
+        if (json.length === 0) return;
+        lastTimestamp = json[json.length - 1].timestamp;
+
+        const processed: PortfolioEntry[] = json.map((d) => ({ ...d, ts: toTs(d.timestamp) }));
+        setPortfolioHistory((prev) => [...prev, ...processed]);
+      });
+
+      // Tables were cleared server-side: the events that follow are a fresh snapshot
+      source.addEventListener("reset", () => {
+        lastSeq = null;
+        lastTimestamp = null;
+        setTrades([]);
+        setPortfolioHistory([]);
+      });
+
+      source.onerror = () => {
+        source?.close();
+        retry = setTimeout(start, 2000);
+      };
+    }
 
-      setTrades(processed);
-    } catch (err) {
-      console.error("Trades fetch error:", err);
+    function start() {
+      if (closed) return;
+      // Only the first load (or a retry before it succeeded) reads the rollups;
+      // reconnects resume the stream from the cursors
+      const ready = lastTimestamp === null ? loadChart() : Promise.resolve();
+      ready
+        .then(() => {
+          if (!closed) connect();
+        })
+        .catch(() => {
+          retry = setTimeout(start, 2000);
+        });
     }
-  }
 
-  loadTrades();
-  const id = setInterval(loadTrades, 2000); // update every 2s
-  return () => clearInterval(id);
-}, []);
+    start();
+    return () => {
+      closed = true;
+      source?.close();
+      if (retry) clearTimeout(retry);
+    };
+  }, []);
 
   const latest: PortfolioEntry | null =
     portfolioHistory.length > 0
@@ -1,6 +1,13 @@
-from typing import List, Optional
+import numpy as np
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+from .ids import next_id
+from .market import MarketSnapshot
 
 class Trade:
+    __slots__ = ("strategy_id", "timestamp", "qty", "symbol", "price", "trade_id")
+
     def __init__(self, strategy_id: str, timestamp: float, qty: List[float], symbol: List[str], price: Optional[List[float]] = None, trade_id: int | None=None,):
         self.strategy_id =  strategy_id
         self.timestamp = timestamp
@@ -13,7 +20,7 @@ class Trade:
             self.price = price
         
         if trade_id is None:
-            self.trade_id = int(timestamp * 1_000_000)   # microsecond-based
+            self.trade_id = next_id()   # unique across threads and worker processes
         else:
             self.trade_id = trade_id
 
@@ -25,11 +32,241 @@ class Trade:
             f"price={self.price}, trade_id={self.trade_id})"
         )
         
+def _codes(values: Sequence[str], index: Dict[str, int]) -> np.ndarray:
+    return np.fromiter((index.setdefault(v, len(index)) for v in values), dtype=np.int32, count=len(values))
+
+
+def _merged_legs(trade: Trade) -> tuple[List[float], List[str], List[float]]:
+    # Legs of one trade keyed by symbol: repeated symbols are summed, at the
+    # size-weighted average of their prices, since trades are stored one row
+    # per (trade_id, symbol)
+    legs: Dict[str, List[float]] = {}
+    for qty, symbol, price in zip(trade.qty, trade.symbol, trade.price):
+        leg = legs.setdefault(symbol, [0.0, 0.0, 0.0])
+        leg[0] += qty
+        leg[1] += abs(qty) * price
+        leg[2] += abs(qty)
+    symbols = list(legs)
+    return (
+        [legs[s][0] for s in symbols],
+        symbols,
+        [legs[s][1] / legs[s][2] if legs[s][2] else float("nan") for s in symbols],
+    )
+
+
+# Columnar block of trade legs: one row per (trade_id, symbol) with strategy
+# and symbol stored as int32 codes into small lookup lists. A tick's trades
+# move through the writer and ledger as one of these instead of one Trade
+# (and one Python list per field) at a time. pandas/pyarrow are imported
+# lazily so strategies importing this module do not pay for them.
+class TradeBatch:
+    __slots__ = ("trade_id", "timestamp", "strategy_code", "strategies", "symbol_code", "symbols", "qty", "price")
+
+    def __init__(
+        self,
+        trade_id: np.ndarray,
+        timestamp: np.ndarray,
+        strategy_code: np.ndarray,
+        strategies: List[str],
+        symbol_code: np.ndarray,
+        symbols: List[str],
+        qty: np.ndarray,
+        price: np.ndarray,
+    ):
+        self.trade_id = np.asarray(trade_id, dtype=np.int64)
+        self.timestamp = np.asarray(timestamp, dtype="datetime64[us]")
+        self.strategy_code = np.asarray(strategy_code, dtype=np.int32)
+        self.strategies = list(strategies)
+        self.symbol_code = np.asarray(symbol_code, dtype=np.int32)
+        self.symbols = list(symbols)
+        self.qty = np.asarray(qty, dtype=np.float64)
+        self.price = np.asarray(price, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.trade_id)
+
+    @classmethod
+    def empty(cls) -> "TradeBatch":
+        return cls([], [], [], [], [], [], [], [])
+
+    @classmethod
+    def from_trades(cls, trades: Sequence[Trade]) -> "TradeBatch":
+        n = sum(len(t.symbol) for t in trades)
+        trade_id = np.empty(n, dtype=np.int64)
+        timestamp = np.empty(n, dtype="datetime64[us]")
+        strategy_code = np.empty(n, dtype=np.int32)
+        symbol_code = np.empty(n, dtype=np.int32)
+        qty = np.empty(n, dtype=np.float64)
+        price = np.empty(n, dtype=np.float64)
+        strategies: Dict[str, int] = {}
+        symbols: Dict[str, int] = {}
+
+        i = 0
+        for t in trades:
+            t_qty, t_symbol, t_price = t.qty, t.symbol, t.price
+            if len(set(t_symbol)) < len(t_symbol):
+                t_qty, t_symbol, t_price = _merged_legs(t)
+            j = i + len(t_symbol)
+            trade_id[i:j] = t.trade_id
+            timestamp[i:j] = np.datetime64(datetime.fromtimestamp(t.timestamp), "us")
+            strategy_code[i:j] = strategies.setdefault(t.strategy_id, len(strategies))
+            symbol_code[i:j] = _codes(t_symbol, symbols)
+            qty[i:j] = t_qty
+            price[i:j] = t_price
+            i = j
+
+        batch = cls(trade_id[:i], timestamp[:i], strategy_code[:i], list(strategies), symbol_code[:i], list(symbols), qty[:i], price[:i])
+        return batch.take(np.abs(batch.qty) > 1e-8)  # dust legs are never stored
+
+    @classmethod
+    def concat(cls, batches: Sequence["TradeBatch"]) -> "TradeBatch":
+        batches = [b for b in batches if len(b)]
+        if not batches:
+            return cls.empty()
+        if len(batches) == 1:
+            return batches[0]
+
+        # Re-code every batch against the union of the lookup lists
+        strategies: Dict[str, int] = {}
+        symbols: Dict[str, int] = {}
+        strategy_code = [_codes(b.strategies, strategies)[b.strategy_code] for b in batches]
+        symbol_code = [_codes(b.symbols, symbols)[b.symbol_code] for b in batches]
+        return cls(
+            np.concatenate([b.trade_id for b in batches]),
+            np.concatenate([b.timestamp for b in batches]),
+            np.concatenate(strategy_code),
+            list(strategies),
+            np.concatenate(symbol_code),
+            list(symbols),
+            np.concatenate([b.qty for b in batches]),
+            np.concatenate([b.price for b in batches]),
+        )
+
+    def take(self, rows: np.ndarray) -> "TradeBatch":
+        return TradeBatch(
+            self.trade_id[rows], self.timestamp[rows],
+            self.strategy_code[rows], self.strategies,
+            self.symbol_code[rows], self.symbols,
+            self.qty[rows], self.price[rows],
+        )
+
+    def repeated_keys(self) -> np.ndarray:
+        # Rows whose (trade_id, symbol) already appeared earlier in the batch
+        if not len(self):
+            return np.zeros(0, dtype=bool)
+        keys = np.rec.fromarrays([self.trade_id, self.symbol_code])
+        first = np.unique(keys, return_index=True)[1]
+        repeated = np.ones(len(self), dtype=bool)
+        repeated[first] = False
+        return repeated
+
+    def position_deltas(self) -> List[tuple]:
+        # Net quantity per (strategy, symbol) in this batch
+        key = self.strategy_code.astype(np.int64) * max(len(self.symbols), 1) + self.symbol_code
+        keys, inverse = np.unique(key, return_inverse=True)
+        sums = np.bincount(inverse, weights=self.qty, minlength=len(keys))
+        strat, sym = np.divmod(keys, max(len(self.symbols), 1))
+        return [(self.strategies[a], self.symbols[b], float(q)) for a, b, q in zip(strat, sym, sums)]
+
+    # ---- Conversions ----
+
+    def to_arrow(self):
+        import pyarrow as pa
+
+        # Codes and numeric columns wrap the NumPy buffers without copying
+        return pa.table({
+            "trade_id": self.trade_id,
+            "timestamp": pa.array(self.timestamp),
+            "strategy": pa.DictionaryArray.from_arrays(self.strategy_code, pa.array(self.strategies, pa.string())),
+            "symbol": pa.DictionaryArray.from_arrays(self.symbol_code, pa.array(self.symbols, pa.string())),
+            "quantity": self.qty,
+            "price": self.price,
+        })
+
+    def to_frame(self):
+        import pandas as pd
+
+        return pd.DataFrame({
+            "trade_id": self.trade_id,
+            "timestamp": self.timestamp,
+            "strategy": pd.Categorical.from_codes(self.strategy_code, categories=self.strategies),
+            "symbol": pd.Categorical.from_codes(self.symbol_code, categories=self.symbols),
+            "side": np.where(self.qty > 0, "BUY", "SELL"),
+            "quantity": self.qty,
+            "price": self.price,
+        })
+
+    def insert(self, con, table: str = "trades") -> int:
+        if not len(self):
+            return 0
+        con.register("_trade_batch", self.to_arrow())
+        con.execute(
+            f"""
+            INSERT INTO {table} (trade_id, timestamp, strategy, symbol, side, quantity, price)
+            SELECT trade_id, timestamp, strategy::VARCHAR, symbol::VARCHAR,
+                   CASE WHEN quantity > 0 THEN 'BUY' ELSE 'SELL' END, quantity, price
+            FROM _trade_batch
+            """
+        )
+        con.unregister("_trade_batch")
+        return len(self)
+
 class BaseAlgorithm:
+    requires: tuple = ()  # shared dependencies the registry injects via bind()
+
     def __init__(self, id: str, frequency: int):
         self.id = id
         self.frequency = frequency
         self.last_exec = 0.0
+        self.last_seq: int | None = None  # snapshot.seq consumed by new_rows()
+        self.last_seen = None
+        self.deps: Dict[str, object] = {}
+
+    def bind(self, deps: Dict[str, object]) -> None:
+        self.deps = deps
+
+    def __getstate__(self) -> dict:
+        # Shared dependencies stay in the parent; a copy pickled into a
+        # process pool runs without them
+        state = self.__dict__.copy()
+        state["deps"] = {}
+        return state
+
+    def run(self, snapshot: MarketSnapshot | None = None) -> Trade:
+        raise NotImplementedError("Algorithm must implement run()")
+
+    def reconcile(self, symbols: List[str], qty: List[float]) -> None:
+        # The book moved this strategy's holdings by qty more than its orders
+        # asked for (negative: less, e.g. after sizing or a partial fill).
+        # Strategies that remember what they hold shift it to match; the
+        # executor calls this before the next run().
+        pass
+
+    def new_rows(self, snapshot: MarketSnapshot) -> np.ndarray:
+        # Rows of the snapshot this strategy has not stepped through yet,
+        # oldest first. Strategies run less often than the market ticks, so a
+        # run usually has several; the first run gets the whole history. A
+        # snapshot without a seq offers its latest row once per timestamp.
+        if snapshot.seq is None:
+            if snapshot.timestamp is not None and snapshot.timestamp == self.last_seen:
+                return snapshot.history[:0]
+            self.last_seen = snapshot.timestamp
+            return snapshot.history[-1:]
+        new = len(snapshot) if self.last_seq is None else snapshot.seq - self.last_seq
+        self.last_seq = max(snapshot.seq, self.last_seq or 0)
+        return snapshot.history[len(snapshot) - min(max(new, 0), len(snapshot)):]
 
-    def run(self) -> Trade:
-        raise NotImplementedError("Algorithm must implement run()")
\ No newline at end of file
+    def run_batch(self, prices: np.ndarray, symbols: List[str], lookback: int = 512) -> np.ndarray:
+        # Order quantities for a whole (time x symbol) price history at once.
+        # Fallback steps through run() per bar with a snapshot over the
+        # preceding `lookback` rows; override with a vectorized version for backtests.
+        column = {sym: i for i, sym in enumerate(symbols)}
+        orders = np.zeros(prices.shape)
+        for t in range(len(prices)):
+            trade = self.run(MarketSnapshot(symbols, prices[max(0, t + 1 - lookback):t + 1], column=column))
+            if trade is None:
+                continue
+            for sym, qty in zip(trade.symbol, trade.qty):
+                if sym in column:
+                    orders[t, column[sym]] += qty
+        return orders
\ No newline at end of file
@@ -1,26 +1,77 @@
 from .base import BaseAlgorithm, Trade
+from .clustering import ClusterAssignment, ClusterStage
+from .market import MarketSnapshot
 import numpy as np
 import time
+from typing import List
 
 class ClusterV2(BaseAlgorithm):
-    def __init__(self):
+    # Relative value inside correlation clusters: long each cluster's laggard,
+    # short its leader. Clustering runs as a separate stage on its own
+    # schedule; run() only maps the cached assignment to targets, which is
+    # O(clusters) per tick, and trades just the difference when it changes.
+    requires = ("cluster_stage",)
+
+    def __init__(self, unit: float = 1.0, refresh_bars: int = 24):
         super().__init__(id="cluster_v2", frequency=4)
+        self.unit = unit
+        self.refresh_bars = refresh_bars  # backtest stand-in for the stage's schedule
 
-    def run(self) -> Trade:
-        symbols = ["AAPL", "MSFT", "AMZN", "GOOG", "META", "NVDA", "TSLA", "JPM", "XOM", "KO", "NFLX", "WMT"]
-        symbol = [np.random.choice(symbols)]
-
-        if np.random.rand() > 0.7:
-            size = abs(np.random.normal(0, 2)) 
-            if size < 0.01:
-                return None  
-            qty = [size]
-        else:
-            return None  
-    
-        now = time.time()
-        trade = Trade(self.id, now, qty, symbol)
+        self.holdings: dict[str, float] = {}
+        self.seen_key = None
+
+    def targets(self, assignment: ClusterAssignment) -> dict[str, float]:
+        target: dict[str, float] = {}
+        for c, i in assignment.laggards.items():
+            sym = assignment.symbols[i]
+            target[sym] = target.get(sym, 0.0) + self.unit
+        for c, i in assignment.leaders.items():
+            sym = assignment.symbols[i]
+            target[sym] = target.get(sym, 0.0) - self.unit
+        return target
+
+    def rebalance(self, holdings: dict[str, float], target: dict[str, float]) -> dict[str, float]:
+        orders = {sym: target.get(sym, 0.0) - holdings.get(sym, 0.0) for sym in set(holdings) | set(target)}
+        return {sym: q for sym, q in orders.items() if q != 0.0}
+
+    def reconcile(self, symbols: List[str], qty: List[float]) -> None:
+        for sym, q in zip(symbols, qty):
+            self.holdings[sym] = self.holdings.get(sym, 0.0) + q
 
+    def run(self, snapshot: MarketSnapshot | None = None) -> Trade:
+        stage = self.deps.get("cluster_stage")
+        assignment = stage.latest if stage is not None else None
+        if snapshot is None or assignment is None or assignment.key == self.seen_key:
+            return None
+        self.seen_key = assignment.key
+
+        now = time.time()
         self.last_exec = now
 
-        return trade
\ No newline at end of file
+        target = self.targets(assignment)
+        orders = {sym: q for sym, q in self.rebalance(self.holdings, target).items() if sym in snapshot.column}
+        if not orders:
+            return None
+        for sym, q in orders.items():
+            self.holdings[sym] = self.holdings.get(sym, 0.0) + q
+
+        symbols = sorted(orders)
+        return Trade(self.id, now, [orders[s] for s in symbols], symbols, snapshot.prices(symbols))
+
+    def run_batch(self, prices: np.ndarray, symbols: List[str]) -> np.ndarray:
+        # A private stage refreshed every `refresh_bars` bars plays the part of
+        # the scheduled one
+        stage = ClusterStage()
+        column = {sym: i for i, sym in enumerate(symbols)}
+        holdings: dict[str, float] = {}
+        orders = np.zeros(prices.shape)
+
+        for end in range(self.refresh_bars, len(prices) + 1, self.refresh_bars):
+            stage.observe(symbols, prices[max(0, end - self.refresh_bars - 1):end])
+            assignment = stage.cluster(end)
+            if assignment is None:
+                continue
+            for sym, q in self.rebalance(holdings, self.targets(assignment)).items():
+                orders[end - 1, column[sym]] += q
+                holdings[sym] = holdings.get(sym, 0.0) + q
+        return orders
@@ -0,0 +1,123 @@
+import numpy as np
+import threading
+import time
+from typing import List, Sequence
+
+from .indicators import RollingCovariance
+from .market import MarketSnapshot
+
+
+def kmeans(features: np.ndarray, k: int, labels: np.ndarray | None = None, max_iter: int = 20, seed: int = 0) -> tuple[np.ndarray, np.ndarray, int]:
+    # Lloyd iterations on all points at once. With previous `labels` the
+    # centroids start from the old clusters, so a slowly drifting correlation
+    # structure converges in one or two passes instead of from scratch
+    n = len(features)
+    k = min(k, n)
+    rng = np.random.default_rng(seed)
+
+    if labels is not None and len(labels) == n:
+        centroids = np.array([features[labels == c].mean(axis=0) if np.any(labels == c) else features[rng.integers(n)] for c in range(k)])
+    else:
+        # k-means++ seeding
+        centroids = [features[rng.integers(n)]]
+        for _ in range(1, k):
+            d2 = ((features[:, None, :] - np.array(centroids)[None]) ** 2).sum(axis=2).min(axis=1)
+            total = d2.sum()
+            centroids.append(features[rng.choice(n, p=d2 / total)] if total > 0 else features[rng.integers(n)])
+        centroids = np.array(centroids)
+        labels = None
+
+    sq = (features ** 2).sum(axis=1)[:, None]
+    for iteration in range(1, max_iter + 1):
+        dist = sq - 2.0 * features @ centroids.T + (centroids ** 2).sum(axis=1)[None, :]
+        new_labels = dist.argmin(axis=1)
+        if labels is not None and np.array_equal(new_labels, labels):
+            return labels, centroids, iteration
+        labels = new_labels
+
+        counts = np.bincount(labels, minlength=k)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, features)
+        empty = counts == 0
+        centroids = np.where(empty[:, None], centroids, sums / np.maximum(counts, 1)[:, None])
+        if np.any(empty):
+            # Re-seed empty clusters at the points farthest from their centroid
+            far = np.argsort(dist[np.arange(n), labels])[::-1][:int(empty.sum())]
+            centroids[empty] = features[far]
+
+    return labels, centroids, max_iter
+
+
+class ClusterAssignment:
+    def __init__(self, symbols: List[str], key, labels: np.ndarray, relative: np.ndarray, iterations: int, elapsed: float):
+        self.symbols = symbols
+        self.key = key
+        self.labels = labels        # cluster id per symbol
+        self.relative = relative    # window return minus the cluster's mean window return
+        self.iterations = iterations
+        self.elapsed = elapsed
+
+        # Per cluster (with 2+ members): the member furthest below and above its peers
+        self.laggards: dict[int, int] = {}
+        self.leaders: dict[int, int] = {}
+        for c in np.unique(labels):
+            members = np.nonzero(labels == c)[0]
+            if len(members) > 1:
+                self.laggards[int(c)] = int(members[np.argmin(relative[members])])
+                self.leaders[int(c)] = int(members[np.argmax(relative[members])])
+
+
+# Clusters the universe by return correlation on its own schedule. refresh()
+# folds only the bars that arrived since the previous call into a rolling
+# covariance of log returns, then re-runs k-means on the correlation rows
+# warm-started from the previous assignment. Strategies read `latest`, so
+# their per-tick cost does not depend on the size of the universe.
+class ClusterStage:
+    def __init__(self, window: int = 120, k: int = 4, interval: float = 30.0, min_obs: int = 30):
+        self.window = window
+        self.k = k
+        self.interval = interval  # how often the controller should refresh()
+        self.min_obs = min_obs
+
+        self.symbols: List[str] = []
+        self.cov: RollingCovariance | None = None
+        self.seq: int | None = None
+        self.latest: ClusterAssignment | None = None
+        self._lock = threading.Lock()
+
+    def observe(self, symbols: Sequence[str], prices: np.ndarray) -> None:
+        # Feed consecutive price rows; the first row only anchors the returns
+        with self._lock:
+            if self.cov is None or list(symbols) != self.symbols:
+                self.symbols = list(symbols)
+                self.cov = RollingCovariance(self.window, len(self.symbols))
+                self.latest = None
+            returns = np.diff(np.log(np.asarray(prices, dtype=np.float64)), axis=0)
+            for r in returns[np.all(np.isfinite(returns), axis=1)]:
+                self.cov.update(r)
+
+    def cluster(self, key=None) -> ClusterAssignment | None:
+        with self._lock:
+            if self.cov is None or self.cov.count < self.min_obs:
+                return None
+            start = time.perf_counter()
+            corr = np.nan_to_num(self.cov.corr)
+            previous = self.latest.labels if self.latest is not None else None
+            labels, _, iterations = kmeans(corr, self.k, previous)
+            relative = self.cov.mean * self.cov.count
+            cluster_mean = np.bincount(labels, weights=relative) / np.maximum(np.bincount(labels), 1)
+            self.latest = ClusterAssignment(
+                self.symbols, key, labels, relative - cluster_mean[labels], iterations, time.perf_counter() - start
+            )
+            return self.latest
+
+    def refresh(self, snapshot: MarketSnapshot) -> ClusterAssignment | None:
+        if len(snapshot) < 2:
+            return None
+        # Only the rows appended since the last refresh (plus one to anchor returns)
+        new = len(snapshot) if self.seq is None or snapshot.seq is None or snapshot.symbols != self.symbols else snapshot.seq - self.seq
+        if new <= 0:
+            return self.latest
+        self.observe(snapshot.symbols, snapshot.history[-min(new + 1, len(snapshot)):])
+        self.seq = snapshot.seq
+        return self.cluster(snapshot.seq)
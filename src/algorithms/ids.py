@@ -0,0 +1,98 @@
+import itertools
+import os
+import threading
+import time
+from datetime import datetime
+
+# Snowflake-style 64-bit trade IDs:
+#   41 bits  milliseconds since EPOCH_MS (good until 2089)
+#   10 bits  worker (process) id
+#   12 bits  sequence within the millisecond
+# so IDs sort by time, never collide between workers, and a process can
+# issue 4096 per millisecond. Worker 0 is the controller (or set
+# ALGORY_WORKER_ID when running several); pool processes claim their own
+# via set_worker(); BACKTEST_WORKER is reserved for simulated history.
+EPOCH_MS = 1_577_836_800_000  # 2020-01-01T00:00:00Z
+TIME_BITS = 41
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER = (1 << WORKER_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+BACKTEST_WORKER = MAX_WORKER
+
+
+def compose(ms: int, worker: int, sequence: int) -> int:
+    return ((ms - EPOCH_MS) << (WORKER_BITS + SEQUENCE_BITS)) | (worker << SEQUENCE_BITS) | sequence
+
+
+def decompose(trade_id: int) -> tuple[int, int, int]:
+    # (unix ms, worker, sequence)
+    return (
+        (trade_id >> (WORKER_BITS + SEQUENCE_BITS)) + EPOCH_MS,
+        (trade_id >> SEQUENCE_BITS) & MAX_WORKER,
+        trade_id & MAX_SEQUENCE,
+    )
+
+
+def timestamp_of(trade_id: int) -> datetime:
+    return datetime.fromtimestamp(decompose(trade_id)[0] / 1000)
+
+
+# The state is an immutable (ms, counter) pair that owns every ID of that
+# millisecond. The fast path reads it and takes next() from the counter,
+# which is atomic in CPython, so concurrent threads never need the lock.
+# A new millisecond, an exhausted sequence or a clock that stepped back
+# goes through _advance() under the lock, which keeps issuing from the
+# current millisecond while the clock is behind it and only ever installs a
+# strictly later one; IDs therefore stay unique and non-decreasing even if
+# the wall clock jumps backwards.
+class IdGenerator:
+    def __init__(self, worker: int = 0, clock=time.time_ns):
+        if not 0 <= worker <= MAX_WORKER:
+            raise ValueError(f"worker must be in [0, {MAX_WORKER}], got {worker}")
+        self.worker = worker
+        self.clock = clock
+        self._state = (0, itertools.count())
+        self._lock = threading.Lock()
+
+    def next_id(self) -> int:
+        now = self.clock() // 1_000_000
+        state = self._state
+        if now == state[0]:
+            sequence = next(state[1])
+            if sequence <= MAX_SEQUENCE:
+                return compose(now, self.worker, sequence)
+        return self._advance(now)
+
+    def _advance(self, now: int) -> int:
+        with self._lock:
+            ms, counter = self._state
+            if now <= ms:
+                # Another thread already installed this millisecond, or the
+                # clock is behind the last one issued: keep using it
+                sequence = next(counter)
+                if sequence <= MAX_SEQUENCE:
+                    return compose(ms, self.worker, sequence)
+            ms = max(now, ms + 1)
+            counter = itertools.count(1)
+            self._state = (ms, counter)
+            return compose(ms, self.worker, 0)
+
+
+_generator = IdGenerator(int(os.environ.get("ALGORY_WORKER_ID", "0")))
+
+
+def next_id() -> int:
+    return _generator.next_id()
+
+
+def worker_id() -> int:
+    return _generator.worker
+
+
+def set_worker(worker) -> None:
+    # Process-pool initializer: `worker` is an int or a queue to take one from
+    global _generator
+    if not isinstance(worker, int):
+        worker = worker.get()
+    _generator = IdGenerator(worker)
@@ -0,0 +1,179 @@
+import numpy as np
+from typing import Dict
+
+
+# Streaming estimators for strategies that see one price row per tick. Every
+# update takes a row across all tracked series at once and costs O(1) per
+# series (O(n^2) for the covariance matrix) no matter how long the window.
+# Inputs are assumed finite; mask or forward-fill NaNs before updating.
+# state_dict()/load_state_dict() checkpoint and restore the full state.
+class RollingMoments:
+    # Windowed Welford: the newest row replaces the oldest in one step, so the
+    # mean and sum of squared deviations never need a pass over the window
+    def __init__(self, window: int, n: int):
+        if window < 2:
+            raise ValueError(f"window must be at least 2, got {window}")
+        self.window = window
+        self.n = n
+        self.buffer = np.zeros((window, n))
+        self.pos = 0
+        self.count = 0
+        self.mean = np.zeros(n)
+        self.m2 = np.zeros(n)
+
+    def update(self, x: np.ndarray) -> None:
+        x = np.asarray(x, dtype=np.float64)
+        if self.count < self.window:
+            self.count += 1
+            delta = x - self.mean
+            self.mean += delta / self.count
+            self.m2 += delta * (x - self.mean)
+        else:
+            old = self.buffer[self.pos]
+            mean = self.mean + (x - old) / self.window
+            self.m2 += (x - old) * (x - mean + old - self.mean)
+            self.mean = mean
+            np.maximum(self.m2, 0.0, out=self.m2)  # rounding can dip below zero
+        self.buffer[self.pos] = x
+        self.pos = (self.pos + 1) % self.window
+
+    @property
+    def ready(self) -> bool:
+        return self.count >= self.window
+
+    @property
+    def latest(self) -> np.ndarray:
+        return self.buffer[self.pos - 1]
+
+    @property
+    def var(self) -> np.ndarray:
+        return self.m2 / (self.count - 1) if self.count > 1 else np.full(self.n, np.nan)
+
+    @property
+    def std(self) -> np.ndarray:
+        return np.sqrt(self.var)
+
+    def zscore(self, x: np.ndarray | None = None) -> np.ndarray:
+        x = self.latest if x is None else x
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return (x - self.mean) / self.std
+
+    def state_dict(self) -> Dict[str, object]:
+        return {"window": self.window, "n": self.n, "buffer": self.buffer.copy(), "pos": self.pos,
+                "count": self.count, "mean": self.mean.copy(), "m2": self.m2.copy()}
+
+    def load_state_dict(self, state: Dict[str, object]) -> None:
+        if (state["window"], state["n"]) != (self.window, self.n):
+            raise ValueError(f"State is for window={state['window']}, n={state['n']}; expected {self.window}, {self.n}")
+        self.buffer = np.array(state["buffer"], dtype=np.float64)
+        self.pos = int(state["pos"])
+        self.count = int(state["count"])
+        self.mean = np.array(state["mean"], dtype=np.float64)
+        self.m2 = np.array(state["m2"], dtype=np.float64)
+
+
+class EWMA:
+    # Exponentially weighted mean and variance (West's incremental form)
+    def __init__(self, n: int, alpha: float | None = None, span: float | None = None):
+        if (alpha is None) == (span is None):
+            raise ValueError("Pass exactly one of alpha or span")
+        self.alpha = alpha if alpha is not None else 2.0 / (span + 1.0)
+        self.n = n
+        self.count = 0
+        self.mean = np.zeros(n)
+        self.var = np.zeros(n)
+
+    def update(self, x: np.ndarray) -> None:
+        x = np.asarray(x, dtype=np.float64)
+        if self.count == 0:
+            self.mean = x.copy()
+            self.var = np.zeros(self.n)
+        else:
+            delta = x - self.mean
+            incr = self.alpha * delta
+            self.mean = self.mean + incr
+            self.var = (1.0 - self.alpha) * (self.var + delta * incr)
+        self.count += 1
+
+    @property
+    def std(self) -> np.ndarray:
+        return np.sqrt(self.var)
+
+    def zscore(self, x: np.ndarray) -> np.ndarray:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return (x - self.mean) / self.std
+
+    def state_dict(self) -> Dict[str, object]:
+        return {"alpha": self.alpha, "n": self.n, "count": self.count, "mean": self.mean.copy(), "var": self.var.copy()}
+
+    def load_state_dict(self, state: Dict[str, object]) -> None:
+        if state["n"] != self.n:
+            raise ValueError(f"State is for n={state['n']}; expected {self.n}")
+        self.alpha = float(state["alpha"])
+        self.count = int(state["count"])
+        self.mean = np.array(state["mean"], dtype=np.float64)
+        self.var = np.array(state["var"], dtype=np.float64)
+
+
+class RollingCovariance:
+    # Windowed co-moment matrix: the oldest row is removed and the newest added
+    # with the one-pass Welford updates, an O(n^2) rank-one step per row
+    def __init__(self, window: int, n: int):
+        if window < 2:
+            raise ValueError(f"window must be at least 2, got {window}")
+        self.window = window
+        self.n = n
+        self.buffer = np.zeros((window, n))
+        self.pos = 0
+        self.count = 0
+        self.mean = np.zeros(n)
+        self.comoment = np.zeros((n, n))
+
+    def update(self, x: np.ndarray) -> None:
+        x = np.asarray(x, dtype=np.float64)
+        if self.count == self.window:
+            old = self.buffer[self.pos]
+            mean = self.mean - (old - self.mean) / (self.count - 1)
+            self.comoment -= np.outer(old - mean, old - self.mean)
+            self.mean = mean
+            self.count -= 1
+
+        self.count += 1
+        delta = x - self.mean
+        self.mean = self.mean + delta / self.count
+        self.comoment += np.outer(delta, x - self.mean)
+
+        self.buffer[self.pos] = x
+        self.pos = (self.pos + 1) % self.window
+
+    @property
+    def ready(self) -> bool:
+        return self.count >= self.window
+
+    @property
+    def latest(self) -> np.ndarray:
+        return self.buffer[self.pos - 1]
+
+    @property
+    def cov(self) -> np.ndarray:
+        return self.comoment / (self.count - 1) if self.count > 1 else np.full((self.n, self.n), np.nan)
+
+    @property
+    def corr(self) -> np.ndarray:
+        cov = self.cov
+        std = np.sqrt(np.maximum(np.diag(cov), 0.0))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return cov / np.outer(std, std)
+
+    def state_dict(self) -> Dict[str, object]:
+        return {"window": self.window, "n": self.n, "buffer": self.buffer.copy(), "pos": self.pos,
+                "count": self.count, "mean": self.mean.copy(), "comoment": self.comoment.copy()}
+
+    def load_state_dict(self, state: Dict[str, object]) -> None:
+        if (state["window"], state["n"]) != (self.window, self.n):
+            raise ValueError(f"State is for window={state['window']}, n={state['n']}; expected {self.window}, {self.n}")
+        self.buffer = np.array(state["buffer"], dtype=np.float64)
+        self.pos = int(state["pos"])
+        self.count = int(state["count"])
+        self.mean = np.array(state["mean"], dtype=np.float64)
+        self.comoment = np.array(state["comoment"], dtype=np.float64)
@@ -0,0 +1,160 @@
+import threading
+import numpy as np
+from datetime import datetime
+from typing import Callable, Dict, List, Sequence
+
+DEFAULT_UNIVERSE = ["AAPL", "MSFT", "AMZN", "GOOG", "META", "NVDA", "TSLA", "JPM", "XOM", "KO", "NFLX", "WMT"]
+
+
+def _readonly(a: np.ndarray) -> np.ndarray:
+    view = a.view()
+    view.flags.writeable = False
+    return view
+
+
+# What every strategy sees at one tick: the last rows of the price matrix
+# (oldest first, one column per symbol) as read-only views, plus common
+# features computed on first use and cached per window length. The snapshot
+# is shared by all strategies at that tick, so N strategies asking for the
+# same 20-bar mean cost one computation.
+class MarketSnapshot:
+    def __init__(
+        self,
+        symbols: Sequence[str],
+        history: np.ndarray,
+        timestamp: datetime | np.datetime64 | None = None,
+        column: Dict[str, int] | None = None,
+        seq: int | None = None,
+    ):
+        self.symbols = symbols if isinstance(symbols, list) else list(symbols)
+        self.history = _readonly(np.asarray(history, dtype=np.float64))
+        self.timestamp = timestamp
+        self.seq = seq  # rows appended to the source so far; lets consumers find new rows
+        self.column = column if column is not None else {sym: i for i, sym in enumerate(self.symbols)}
+
+        self._features: Dict[tuple, np.ndarray] = {}
+        self._lock = threading.RLock()  # features build on other features
+
+    def __getstate__(self) -> dict:
+        # Process pools pickle the snapshot; the lock stays behind
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.history)
+
+    # ---- Prices ----
+
+    @property
+    def latest(self) -> np.ndarray:
+        return self.history[-1]
+
+    def price(self, symbol: str) -> float:
+        return float(self.history[-1, self.column[symbol]])
+
+    def prices(self, symbols: Sequence[str]) -> List[float]:
+        row = self.history[-1]
+        return [float(row[self.column[sym]]) for sym in symbols]
+
+    def window(self, n: int) -> np.ndarray:
+        return self.history[-n:]
+
+    # ---- Features ----
+
+    def _cached(self, key: tuple, compute: Callable[[], np.ndarray]) -> np.ndarray:
+        value = self._features.get(key)
+        if value is None:
+            with self._lock:
+                value = self._features.get(key)
+                if value is None:
+                    value = _readonly(compute())
+                    self._features[key] = value
+        return value
+
+    def returns(self, n: int) -> np.ndarray:
+        # Last n one-bar simple returns, (n, symbol); fewer rows early on
+        def compute():
+            w = self.history[-(n + 1):]
+            return w[1:] / w[:-1] - 1.0
+        return self._cached(("returns", n), compute)
+
+    def mean(self, n: int) -> np.ndarray:
+        return self._cached(("mean", n), lambda: np.nanmean(self.window(n), axis=0))
+
+    def std(self, n: int) -> np.ndarray:
+        def compute():
+            w = self.window(n)
+            return np.nanstd(w, axis=0, ddof=1) if len(w) > 1 else np.full(len(self.symbols), np.nan)
+        return self._cached(("std", n), compute)
+
+    def zscore(self, n: int) -> np.ndarray:
+        def compute():
+            with np.errstate(divide="ignore", invalid="ignore"):
+                return (self.latest - self.mean(n)) / self.std(n)
+        return self._cached(("zscore", n), compute)
+
+    def volatility(self, n: int) -> np.ndarray:
+        def compute():
+            r = self.returns(n)
+            return np.nanstd(r, axis=0, ddof=1) if len(r) > 1 else np.full(len(self.symbols), np.nan)
+        return self._cached(("volatility", n), compute)
+
+    def covariance(self, n: int) -> np.ndarray:
+        # (symbol, symbol) covariance of the last n one-bar returns
+        def compute():
+            r = self.returns(n)
+            if len(r) < 2:
+                return np.full((len(self.symbols), len(self.symbols)), np.nan)
+            return np.atleast_2d(np.cov(r, rowvar=False))
+        return self._cached(("covariance", n), compute)
+
+
+# Rolling buffer of the last `capacity` price rows that hands out one
+# MarketSnapshot per tick. Each row is written twice, at i and i + capacity,
+# so the newest rows are always one contiguous slice. snapshot() copies that
+# slice once per tick (the next append overwrites its oldest row while
+# strategies may still be reading it) and every strategy shares the copy.
+class MarketBuffer:
+    def __init__(self, symbols: Sequence[str], capacity: int = 512):
+        self.symbols = list(symbols)
+        self.column = {sym: i for i, sym in enumerate(self.symbols)}
+        self.capacity = capacity
+
+        self._rows = np.full((2 * capacity, len(self.symbols)), np.nan)
+        self._next = 0
+        self._count = 0
+        self._seq = 0
+        self._timestamp = None
+        self._snapshot: MarketSnapshot | None = None
+        self._lock = threading.Lock()
+
+    def append(self, timestamp: datetime | np.datetime64, prices: np.ndarray) -> None:
+        with self._lock:
+            i = self._next
+            self._rows[i] = prices
+            self._rows[i + self.capacity] = prices
+            self._next = (i + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+            self._seq += 1
+            self._timestamp = timestamp
+            self._snapshot = None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def last_row(self) -> np.ndarray | None:
+        with self._lock:
+            return self._rows[self._next - 1 + self.capacity].copy() if self._count else None
+
+    def snapshot(self) -> MarketSnapshot:
+        with self._lock:
+            if self._snapshot is None:
+                end = self._next + self.capacity
+                history = self._rows[end - self._count:end].copy()
+                self._snapshot = MarketSnapshot(self.symbols, history, self._timestamp, self.column, self._seq)
+            return self._snapshot
@@ -1,26 +1,88 @@
 from .base import BaseAlgorithm, Trade
+from .indicators import RollingMoments
+from .market import MarketSnapshot
 import numpy as np
 import time
+from typing import List
 
 class MeanReversion(BaseAlgorithm):
-    def __init__(self):
+    # Fades each symbol's z-score against its rolling mean: short `unit` above
+    # +entry, long below -entry, flat again once |z| < exit. The rolling
+    # moments are updated once per market row, so the signal costs
+    # O(symbols) per row regardless of the window. run() steps every row
+    # since its last run and run_batch() the whole history through the same
+    # stream(), so live and backtest trade alike.
+    def __init__(self, window: int = 20, entry: float = 2.0, exit: float = 0.5, unit: float = 1.0):
         super().__init__(id="mean_reversion", frequency=2)
+        self.window = window
+        self.entry = entry
+        self.exit = exit
+        self.unit = unit
 
-    def run(self) -> Trade:
-        symbols = ["AAPL", "MSFT", "AMZN", "GOOG", "META", "NVDA", "TSLA", "JPM", "XOM", "KO", "NFLX", "WMT"]
-        symbol = [np.random.choice(symbols)]
+        self.symbols: List[str] = []
+        self.state: dict | None = None
 
-        if np.random.rand() > 0.7:
-            size = abs(np.random.normal(0, 2)) 
-            if size < 0.01:
-                return None  
-            qty = [size]
-        else:
+    def new_state(self, n_symbols: int) -> dict:
+        return {"moments": RollingMoments(self.window, n_symbols), "target": np.zeros(n_symbols)}
+
+    def step(self, state: dict, row: np.ndarray) -> np.ndarray:
+        # Order quantities for one new price row
+        if not np.all(np.isfinite(row)):
+            return np.zeros(len(row))
+
+        moments = state["moments"]
+        moments.update(row)
+        if not moments.ready:
+            return np.zeros(len(row))
+
+        z = moments.zscore()
+        target = state["target"].copy()
+        target[z > self.entry] = -self.unit
+        target[z < -self.entry] = self.unit
+        target[np.abs(z) < self.exit] = 0.0
+
+        orders = target - state["target"]
+        state["target"] = target
+        return orders
+
+    def reconcile(self, symbols: List[str], qty: List[float]) -> None:
+        if self.state is None:
+            return
+        for sym, q in zip(symbols, qty):
+            if sym in self.symbols:
+                self.state["target"][self.symbols.index(sym)] += q
+
+    def stream(self, state: dict, rows: np.ndarray) -> np.ndarray:
+        # Order quantities for consecutive price rows, one row of orders each
+        orders = np.zeros(rows.shape)
+        for t in range(len(rows)):
+            orders[t] = self.step(state, rows[t])
+        return orders
+
+    def run(self, snapshot: MarketSnapshot | None = None) -> Trade:
+        if snapshot is None or not len(snapshot):
             return None
-    
-        now = time.time()
-        trade = Trade(self.id, now, qty, symbol)
 
+        # A new universe starts the estimators over
+        if self.state is None or snapshot.symbols != self.symbols:
+            self.symbols = list(snapshot.symbols)
+            self.state = self.new_state(len(self.symbols))
+            self.last_seq = None
+
+        rows = self.new_rows(snapshot)
+        if not len(rows):
+            return None
+        orders = self.stream(self.state, rows).sum(axis=0)
+
+        now = time.time()
         self.last_exec = now
 
-        return trade
+        legs = np.nonzero(orders)[0]
+        if not legs.size:
+            return None
+        return Trade(self.id, now, orders[legs].tolist(), [self.symbols[i] for i in legs], snapshot.latest[legs].tolist())
+
+    def run_batch(self, prices: np.ndarray, symbols: List[str]) -> np.ndarray:
+        # Streams the same estimator over the history on a fresh state, so a
+        # backtest trades exactly like the live strategy would
+        return self.stream(self.new_state(len(symbols)), prices)
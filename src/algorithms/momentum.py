@@ -1,13 +1,15 @@
 from .base import BaseAlgorithm, Trade
+from .market import DEFAULT_UNIVERSE, MarketSnapshot
 import numpy as np
 import time
+from typing import List
 
 class Momentum(BaseAlgorithm):
     def __init__(self):
         super().__init__(id="momentum", frequency=2)
 
-    def run(self) -> Trade:
-        symbols = ["AAPL", "MSFT", "AMZN", "GOOG", "META", "NVDA", "TSLA", "JPM", "XOM", "KO", "NFLX", "WMT"]
+    def run(self, snapshot: MarketSnapshot | None = None) -> Trade:
+        symbols = snapshot.symbols if snapshot is not None else DEFAULT_UNIVERSE
         symbol = [np.random.choice(symbols)]
 
         if np.random.rand() > 0.7:
@@ -19,8 +21,20 @@ class Momentum(BaseAlgorithm):
             return None
     
         now = time.time()
-        trade = Trade(self.id, now, qty, symbol)
+        price = snapshot.prices(symbol) if snapshot is not None else None
+        trade = Trade(self.id, now, qty, symbol, price)
 
         self.last_exec = now
 
-        return trade
\ No newline at end of file
+        return trade
+
+    def run_batch(self, prices: np.ndarray, symbols: List[str]) -> np.ndarray:
+        n_steps, n_symbols = prices.shape
+        size = np.abs(np.random.normal(0, 2, n_steps))
+        fire = (np.random.rand(n_steps) > 0.7) & (size >= 0.01)
+        column = np.random.randint(0, n_symbols, n_steps)
+
+        orders = np.zeros(prices.shape)
+        steps = np.nonzero(fire)[0]
+        orders[steps, column[steps]] = size[steps]
+        return orders
@@ -1,26 +1,164 @@
 from .base import BaseAlgorithm, Trade
+from .indicators import RollingCovariance
+from .market import MarketSnapshot
+from .screening import PairScreen, PairsScreener
 import numpy as np
 import time
+from typing import List
 
 class Pairs(BaseAlgorithm):
-    def __init__(self):
+    # Trades the spread of one pair. A rolling covariance of log prices gives
+    # every pair's correlation and hedge ratio in one O(n^2) update per tick.
+    # When flat, the pair to watch is the screener's best cointegrated pair
+    # (refreshed on its own schedule), or the most correlated pair when no
+    # screen is available; once its spread z-score passes `entry` the
+    # strategy sells the rich leg and buys the cheap one (hedged by beta, in
+    # dollar terms) and unwinds once |z| < exit.
+    #
+    # run() steps every row since its last run and run_batch() the whole
+    # history through the same stream(). A screen taken on the first k rows
+    # applies from row k on; run_batch() screens every `screen_bars` bars
+    # with a private screener in place of the scheduled one, and, like run(),
+    # only when a screener is bound.
+    requires = ("pairs_screener",)
+
+    def __init__(self, window: int = 60, entry: float = 2.0, exit: float = 0.5, unit: float = 1.0, screen_bars: int = 60):
         super().__init__(id="pairs", frequency=3)
+        self.window = window
+        self.entry = entry
+        self.exit = exit
+        self.unit = unit
+        self.screen_bars = screen_bars  # backtest stand-in for the screener's schedule
+
+        self.symbols: List[str] = []
+        self.state: dict | None = None
+
+    def new_state(self, n_symbols: int) -> dict:
+        return {
+            "cov": RollingCovariance(self.window, n_symbols),
+            "pair": None,
+            "side": 0.0,
+            "holdings": np.zeros(n_symbols),
+            "screened": None,  # pair from the newest screen applied so far
+        }
 
-    def run(self) -> Trade:
-        symbols = ["AAPL", "MSFT", "AMZN", "GOOG", "META", "NVDA", "TSLA", "JPM", "XOM", "KO", "NFLX", "WMT"]
-        symbol = [np.random.choice(symbols)]
+    def spread_zscore(self, cov: RollingCovariance, i: int, j: int) -> tuple[float, float]:
+        c = cov.cov
+        beta = c[i, j] / c[j, j]
+        spread_var = c[i, i] - 2.0 * beta * c[i, j] + beta * beta * c[j, j]
+        spread = cov.latest[i] - beta * cov.latest[j]
+        mean = cov.mean[i] - beta * cov.mean[j]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return float((spread - mean) / np.sqrt(spread_var)), float(beta)
 
-        if np.random.rand() > 0.7:
-            size = abs(np.random.normal(0, 2)) 
-            if size < 0.01:
-                return None  
-            qty = [size]
-        else:
+    def pair_of(self, screen: PairScreen | None, symbols: List[str]) -> tuple[int, int] | None:
+        if screen is None or screen.symbols != symbols:
             return None
-    
-        now = time.time()
-        trade = Trade(self.id, now, qty, symbol)
+        top = screen.top(1)
+        if not top:
+            return None
+        return symbols.index(top[0][0]), symbols.index(top[0][1])
+
+    def step(self, state: dict, row: np.ndarray, pair: tuple[int, int] | None = None) -> np.ndarray:
+        # Order quantities for one new price row
+        n = len(row)
+        if n < 2 or not np.all(np.isfinite(row)) or np.any(row <= 0):
+            return np.zeros(n)
+
+        cov = state["cov"]
+        cov.update(np.log(row))
+        if not cov.ready:
+            return np.zeros(n)
+
+        # While flat the watched pair follows the latest screen/correlations
+        if state["side"] == 0.0:
+            if pair is None:
+                corr = np.where(np.eye(n, dtype=bool), -np.inf, np.nan_to_num(cov.corr, nan=-np.inf))
+                pair = divmod(int(np.argmax(corr)), n)
+            state["pair"] = pair
+
+        i, j = state["pair"]
+        z, beta = self.spread_zscore(cov, i, j)
+        if not np.isfinite(z):
+            return np.zeros(n)
+
+        # Flat means flat: whatever a shrunk exit left behind is unwound
+        target = state["holdings"] if state["side"] != 0.0 else np.zeros(n)
+        if state["side"] == 0.0 and abs(z) > self.entry:
+            state["side"] = -np.sign(z)
+            target = np.zeros(n)
+            target[i] = state["side"] * self.unit
+            target[j] = -state["side"] * self.unit * beta * row[i] / row[j]
+        elif state["side"] != 0.0 and abs(z) < self.exit:
+            state["side"] = 0.0
+            target = np.zeros(n)
+
+        orders = target - state["holdings"]
+        state["holdings"] = target
+        return orders
 
+    def reconcile(self, symbols: List[str], qty: List[float]) -> None:
+        if self.state is None:
+            return
+        for sym, q in zip(symbols, qty):
+            if sym in self.symbols:
+                self.state["holdings"][self.symbols.index(sym)] += q
+
+    def stream(self, state: dict, rows: np.ndarray, pairs: List[tuple[int, int] | None]) -> np.ndarray:
+        # Order quantities for consecutive price rows; pairs[t] is the
+        # screened pair in force at row t (None: use the correlations)
+        orders = np.zeros(rows.shape)
+        for t in range(len(rows)):
+            orders[t] = self.step(state, rows[t], pairs[t])
+        return orders
+
+    def run(self, snapshot: MarketSnapshot | None = None) -> Trade:
+        if snapshot is None or not len(snapshot):
+            return None
+
+        # A new universe starts the estimators over
+        if self.state is None or snapshot.symbols != self.symbols:
+            self.symbols = list(snapshot.symbols)
+            self.state = self.new_state(len(self.symbols))
+            self.last_seq = None
+
+        rows = self.new_rows(snapshot)
+        if not len(rows):
+            return None
+
+        # Rows older than the latest screen keep the pair screened before it
+        pairs = [self.state["screened"]] * len(rows)
+        screener = self.deps.get("pairs_screener")
+        screen = screener.latest if screener is not None else None
+        if screen is not None and snapshot.seq is not None:
+            start = max(screen.key - (snapshot.seq - len(rows)), 0) if isinstance(screen.key, int) else 0
+            if start < len(rows):
+                self.state["screened"] = self.pair_of(screen, self.symbols)
+                pairs[start:] = [self.state["screened"]] * (len(rows) - start)
+        orders = self.stream(self.state, rows, pairs).sum(axis=0)
+
+        now = time.time()
         self.last_exec = now
 
-        return trade
\ No newline at end of file
+        legs = np.nonzero(orders)[0]
+        if not legs.size:
+            return None
+        return Trade(self.id, now, orders[legs].tolist(), [self.symbols[i] for i in legs], snapshot.latest[legs].tolist())
+
+    def run_batch(self, prices: np.ndarray, symbols: List[str]) -> np.ndarray:
+        # Streams the same estimator over the history on a fresh state, so a
+        # backtest trades exactly like the live strategy would
+        symbols = list(symbols)
+        pairs: List[tuple[int, int] | None] = [None] * len(prices)
+        live = self.deps.get("pairs_screener")
+        if live is not None:
+            screener = PairsScreener(window=live.window)
+            pair = None
+            for t in range(len(prices)):
+                if t and t % self.screen_bars == 0:
+                    try:
+                        pair = self.pair_of(screener.screen(symbols, prices[:t], key=t), symbols)
+                    except ValueError:
+                        pair = None
+                pairs[t] = pair
+        return self.stream(self.new_state(len(symbols)), prices, pairs)
@@ -0,0 +1,149 @@
+import importlib
+import json
+import os
+import threading
+import time
+from importlib.metadata import entry_points
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence
+
+from .base import BaseAlgorithm
+
+ENTRY_POINT_GROUP = "algory.strategies"
+CONFIG_PATH = Path(__file__).resolve().parents[1] / "strategies.json"
+
+# Bundled strategies as "module:Class" specs, resolved relative to this
+# package so they work whether it is imported as `algorithms` or `src.algorithms`
+BUILTIN: Dict[str, str] = {
+    "cluster_v2": ".cluster_v2:ClusterV2",
+    "mean_reversion": ".mean_reversion:MeanReversion",
+    "momentum": ".momentum:Momentum",
+    "pairs": ".pairs:Pairs",
+}
+
+# Shared dependencies the bundled strategies ask for, built on first use
+BUILTIN_DEPENDENCIES: Dict[str, str] = {
+    "pairs_screener": ".screening:PairsScreener",
+    "cluster_stage": ".clustering:ClusterStage",
+}
+
+
+def _resolve(spec: str) -> type:
+    module, _, attr = spec.partition(":")
+    package = __package__ if module.startswith(".") else None
+    return getattr(importlib.import_module(module, package), attr)
+
+
+# Name -> spec table of every known strategy. Registering is free; a module is
+# imported only when load() instantiates a strategy that is enabled, so a
+# deployment running two strategies never imports the others.
+#
+# Sources, later ones overriding earlier: BUILTIN, the `algory.strategies`
+# entry-point group of installed packages, and a JSON config file
+# (ALGORY_STRATEGIES or src/strategies.json) shaped like
+#
+#   {"enabled": ["momentum", "my_strat"],
+#    "strategies": {"my_strat": {"class": "my_pkg.strats:MyStrat", "kwargs": {}}}}
+#
+# Strategies list the shared dependencies they need in `requires`; each
+# dependency factory runs once per registry and its result is handed to every
+# strategy through BaseAlgorithm.bind().
+class StrategyRegistry:
+    def __init__(self):
+        self.specs: Dict[str, str | Callable[..., BaseAlgorithm]] = {}
+        self.kwargs: Dict[str, Dict[str, Any]] = {}
+        self.enabled: List[str] | None = None
+        self.timings: Dict[str, float] = {}
+
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._shared: Dict[str, Any] = {}
+        self._lock = threading.RLock()  # factories may ask for other dependencies
+
+    # ---- Registration ----
+
+    def register(self, name: str, spec: str | Callable[..., BaseAlgorithm], **kwargs) -> None:
+        self.specs[name] = spec
+        self.kwargs[name] = kwargs
+
+    def register_dependency(self, name: str, factory: Callable[[], Any]) -> None:
+        self._factories[name] = factory
+
+    def discover(self) -> "StrategyRegistry":
+        start = time.perf_counter()
+        for name, spec in BUILTIN.items():
+            self.register(name, spec)
+        for name, spec in BUILTIN_DEPENDENCIES.items():
+            self.register_dependency(name, lambda spec=spec: _resolve(spec)())
+        for ep in entry_points(group=ENTRY_POINT_GROUP):
+            self.register(ep.name, ep.value)
+        self.timings["discover"] = time.perf_counter() - start
+        return self
+
+    def configure(self, path: str | Path | None = None) -> "StrategyRegistry":
+        path = Path(path or os.environ.get("ALGORY_STRATEGIES") or CONFIG_PATH)
+        if not path.exists():
+            return self
+
+        config = json.loads(path.read_text())
+        for name, entry in config.get("strategies", {}).items():
+            self.register(name, entry["class"], **entry.get("kwargs", {}))
+        if "enabled" in config:
+            self.enabled = list(config["enabled"])
+        return self
+
+    def names(self) -> List[str]:
+        return list(self.specs)
+
+    @property
+    def shared(self) -> Dict[str, Any]:
+        # Dependencies built so far, i.e. the ones enabled strategies use
+        with self._lock:
+            return dict(self._shared)
+
+    # ---- Loading ----
+
+    def dependency(self, name: str) -> Any:
+        with self._lock:
+            if name not in self._shared:
+                if name not in self._factories:
+                    raise KeyError(f"Unknown shared dependency {name!r}")
+                start = time.perf_counter()
+                self._shared[name] = self._factories[name]()
+                self.timings[f"dep:{name}"] = time.perf_counter() - start
+            return self._shared[name]
+
+    def create(self, name: str) -> BaseAlgorithm:
+        if name not in self.specs:
+            raise KeyError(f"Unknown strategy {name!r}; registered: {self.names()}")
+
+        start = time.perf_counter()
+        spec = self.specs[name]
+        cls = _resolve(spec) if isinstance(spec, str) else spec
+        strategy = cls(**self.kwargs.get(name, {}))
+        requires = getattr(strategy, "requires", ())
+        if requires:
+            strategy.bind({dep: self.dependency(dep) for dep in requires})
+        self.timings[name] = time.perf_counter() - start
+        return strategy
+
+    def load(self, names: Sequence[str] | None = None) -> Dict[str, BaseAlgorithm]:
+        names = list(names) if names is not None else (self.enabled if self.enabled is not None else self.names())
+        strategies = {}
+        for name in names:
+            strategy = self.create(name)
+            strategies[strategy.id] = strategy
+        return strategies
+
+
+_REGISTRY: StrategyRegistry | None = None
+
+
+def get_registry() -> StrategyRegistry:
+    global _REGISTRY
+    if _REGISTRY is None:
+        _REGISTRY = StrategyRegistry().discover().configure()
+    return _REGISTRY
+
+
+def load_strategies(names: Sequence[str] | None = None) -> Dict[str, BaseAlgorithm]:
+    return get_registry().load(names)
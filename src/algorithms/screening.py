@@ -0,0 +1,142 @@
+import numpy as np
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Sequence
+
+from .market import MarketSnapshot
+
+# MacKinnon (2010) 5% critical value for the two-variable Engle-Granger test
+# with a constant
+EG_CRITICAL_5PCT = -3.34
+
+
+def _pair_stats(rows: slice, n_obs: int, cov: np.ndarray, mean: np.ndarray, last: np.ndarray,
+                uu: np.ndarray, du: np.ndarray, dd: np.ndarray) -> Dict[str, np.ndarray]:
+    # Statistics for every pair (i, j) with i in `rows`: y = x_i regressed on
+    # x_j. All sums over time are already folded into the moment matrices, so
+    # this is O(rows x n) elementwise work
+    i = np.arange(rows.start, rows.stop)[:, None]
+    j = np.arange(cov.shape[0])[None, :]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        beta = cov[i, j] / cov[j, j]
+
+        # Spread over the window and its z-score at the last bar
+        spread_var = cov[i, i] - 2.0 * beta * cov[i, j] + beta * beta * cov[j, j]
+        zscore = (last[i] - beta * last[j] - (mean[i] - beta * mean[j])) / np.sqrt(spread_var)
+
+        # Engle-Granger step two: d(spread) = gamma * spread[t-1] + c + e,
+        # written in terms of the lagged-level (U) and difference (D) moments
+        num = du[i, i] - beta * du[i, j] - beta * du[j, i] + beta * beta * du[j, j]
+        den = uu[i, i] - 2.0 * beta * uu[i, j] + beta * beta * uu[j, j]
+        dss = dd[i, i] - 2.0 * beta * dd[i, j] + beta * beta * dd[j, j]
+        gamma = num / den
+        resid = np.maximum(dss - gamma * num, 0.0) / (n_obs - 2)
+        tstat = gamma / np.sqrt(resid / den)
+        halflife = np.where(gamma < 0, -np.log(2.0) / np.log1p(gamma), np.inf)
+
+    tstat[i == j] = np.nan
+    return {"beta": beta, "tstat": tstat, "zscore": zscore, "halflife": halflife}
+
+
+class PairScreen:
+    def __init__(self, symbols: List[str], key, stats: Dict[str, np.ndarray], corr: np.ndarray, elapsed: float):
+        self.symbols = symbols
+        self.key = key
+        self.beta = stats["beta"]          # (n, n): x_i ~ beta * x_j
+        self.tstat = stats["tstat"]        # ADF t-stat of the residual spread
+        self.zscore = stats["zscore"]      # spread z-score at the last bar
+        self.halflife = stats["halflife"]  # mean-reversion half-life in bars
+        self.corr = corr
+        self.elapsed = elapsed
+
+    def top(self, k: int = 10, critical: float = EG_CRITICAL_5PCT) -> List[tuple]:
+        # Best k pairs passing the test as (y, x, tstat, beta, zscore),
+        # most negative t-stat first; each unordered pair appears once, in
+        # its stronger direction
+        t = np.where(np.isnan(self.tstat), np.inf, self.tstat)
+        stronger = t <= t.T
+        candidates = np.argwhere(stronger & (t < critical) & ~np.eye(len(t), dtype=bool))
+        if not len(candidates):
+            return []
+        order = np.argsort(t[candidates[:, 0], candidates[:, 1]], kind="stable")
+
+        out, seen = [], set()
+        for a, b in candidates[order]:
+            key = (min(a, b), max(a, b))
+            if key in seen:
+                continue
+            seen.add(key)
+            out.append((self.symbols[a], self.symbols[b], float(t[a, b]), float(self.beta[a, b]), float(self.zscore[a, b])))
+            if len(out) == k:
+                break
+        return out
+
+
+# Engle-Granger screen of every ordered pair in the universe on a window of
+# log prices. The time dimension is reduced once to three n x n moment
+# matrices (levels, lagged levels x differences, differences) with BLAS
+# matmuls; hedge ratios, residual ADF t-stats, half-lives and spread z-scores
+# for all n^2 pairs then follow elementwise, optionally split into row chunks
+# across a process pool. Results are cached on the window's end, so calling
+# refresh() again before a new bar arrives is free.
+class PairsScreener:
+    def __init__(self, window: int = 250, interval: float = 60.0, workers: int = 0, chunk_rows: int = 128):
+        self.window = window
+        self.interval = interval  # how often the controller should refresh()
+        self.workers = workers
+        self.chunk_rows = chunk_rows
+
+        self.latest: PairScreen | None = None
+        self._pool: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def screen(self, symbols: Sequence[str], prices: np.ndarray, key=None) -> PairScreen:
+        with self._lock:
+            cached = self.latest
+            if cached is not None and key is not None and cached.key == key and cached.symbols == list(symbols):
+                return cached
+
+            start = time.perf_counter()
+            x = np.log(np.asarray(prices, dtype=np.float64)[-self.window:])
+            if len(x) < 3 or not np.all(np.isfinite(x)):
+                raise ValueError("Screening needs at least 3 bars of positive, finite prices")
+
+            n_obs = len(x) - 1
+            xc = x - x.mean(axis=0)
+            cov = xc.T @ xc / (len(x) - 1)
+            u = x[:-1] - x[:-1].mean(axis=0)
+            d = np.diff(x, axis=0)
+            d -= d.mean(axis=0)
+            moments = (n_obs, cov, x.mean(axis=0), x[-1], u.T @ u, d.T @ u, d.T @ d)
+
+            n = x.shape[1]
+            chunks = [slice(a, min(a + self.chunk_rows, n)) for a in range(0, n, self.chunk_rows)]
+            if self.workers and len(chunks) > 1:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers)
+                parts = list(self._pool.map(_pair_stats, chunks, *[[m] * len(chunks) for m in moments]))
+            else:
+                parts = [_pair_stats(rows, *moments) for rows in chunks]
+            stats = {name: np.vstack([p[name] for p in parts]) for name in parts[0]}
+
+            std = np.sqrt(np.diag(cov))
+            with np.errstate(divide="ignore", invalid="ignore"):
+                corr = cov / np.outer(std, std)
+
+            self.latest = PairScreen(list(symbols), key, stats, corr, time.perf_counter() - start)
+            return self.latest
+
+    def refresh(self, snapshot: MarketSnapshot) -> PairScreen | None:
+        # Keyed on the snapshot's seq when it has one, so consumers know which
+        # market rows the screen has seen
+        if len(snapshot) < 3:
+            return None
+        key = snapshot.seq if snapshot.seq is not None else snapshot.timestamp if snapshot.timestamp is not None else len(snapshot)
+        return self.screen(snapshot.symbols, snapshot.history, key)
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
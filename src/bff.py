@@ -1,9 +1,17 @@
 # bff = Backend for Frontend
-import duckdb
+import asyncio
 import pandas as pd
+from datetime import datetime
 from stats import getStats
-from fastapi import FastAPI
+from stats.cache import MetricsCache
+from database import queries, rollups
+from database.connection import get_reader
+from database.feed import ChangeFeed
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
 
 app = FastAPI()
 app.add_middleware(
@@ -13,34 +21,109 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# One read-only database instance per process (the controller's latest
+# snapshot), shared by every handler through per-thread cursors
+db = get_reader()
+# Metrics read through the tiered views so archiving never looks like a reset
+portfolio_metrics = MetricsCache("portfolio_history_all", "total_value", db=db)
+strategy_metrics = MetricsCache("strategy_history_all", "strategy_value", group_col="strategy", db=db)
+feed = ChangeFeed(db)
+
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
+async def arrow_response(request: Request, table, headers: dict[str, str]) -> Response:
+    # Arrow IPC for clients that ask for it, JSON rendered from the same Arrow table otherwise
+    if ARROW_STREAM in request.headers.get("accept", ""):
+        return Response(await asyncio.to_thread(queries.to_ipc, table), media_type=ARROW_STREAM, headers=headers)
+    return Response(await asyncio.to_thread(queries.to_json, table), media_type="application/json", headers=headers)
+
+# Newest trades first; pass the X-Next-Before-* headers back to get the
+# next, older page
 @app.get("/trades")
-def trades():
-    con = duckdb.connect("algory.duckdb")
-    df = con.execute("SELECT * FROM trades ORDER BY timestamp").df()
-    return df.to_dict(orient="records")
+async def trades(
+    request: Request,
+    before_trade_id: int | None = None,
+    before_symbol: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    strategy: list[str] | None = Query(None),
+    symbol: list[str] | None = Query(None),
+    columns: str | None = None,
+    limit: int = 1000,
+):
+    try:
+        table = await db.run(queries.trades_page, before_trade_id, before_symbol, since, until, strategy, symbol, columns, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    headers = {}
+    if table.num_rows == min(max(limit, 1), queries.MAX_LIMIT):
+        headers["X-Next-Before-Trade-Id"] = str(table.column("trade_id")[-1].as_py())
+        headers["X-Next-Before-Symbol"] = table.column("symbol")[-1].as_py()
+    return await arrow_response(request, table, headers)
 
 @app.get("/portfolio")
-def portfolio():
-    con = duckdb.connect("algory.duckdb")
-    df = con.execute("SELECT * FROM portfolio_history ORDER BY timestamp").df()
-    return df.to_dict(orient="records")
+async def portfolio(
+    request: Request,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    columns: str | None = None,
+    points: int | None = None,
+    method: str = "lttb",
+    limit: int = queries.MAX_LIMIT,
+):
+    try:
+        table = await db.run(queries.portfolio_range, since, until, columns, points, method, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    headers = {}
+    if points is None and table.num_rows == min(max(limit, 1), queries.MAX_LIMIT):
+        headers["X-Next-Since"] = table.column("timestamp")[-1].as_py().isoformat()
+    return await arrow_response(request, table, headers)
+
+# Pre-aggregated charts: kind is equity (OHLC, `key` = strategy, whole book
+# by default), trades (per strategy) or volume (per symbol). Without an
+# explicit resolution the finest one that fits the range in `points` is used.
+@app.get("/rollups/{kind}")
+async def rollup(
+    request: Request,
+    kind: str,
+    key: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    resolution: str | None = None,
+    points: int = rollups.DEFAULT_POINTS,
+):
+    try:
+        table = await db.run(rollups.rollup_range, kind, key, since, until, resolution, max(1, min(points, queries.MAX_LIMIT)))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await arrow_response(request, table, {})
+
+# Server-sent events: a snapshot past the client's cursors, then only new
+# trades / portfolio_history rows as the shared feed picks them up. Clients
+# resume trades from the last `seq` they saw.
+@app.get("/stream")
+async def stream(request: Request, after_seq: int | None = None, since: datetime | None = None):
+    async def events():
+        async for seq, event, payload in feed.subscribe(after_seq, since):
+            if await request.is_disconnected():
+                break
+            yield f"id: {seq}\nevent: {event}\ndata: {payload}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 @app.get("/portfolio_statistics")
 def statistics():
-    portfolio_df, strategy_df, trades_df = getStats.get_data()
-    print(portfolio_df)
-    portfolio_stats = getStats.compute_portfolio_metrics(portfolio_df)
+    portfolio_stats = portfolio_metrics.get().get(None, {})
     
     return portfolio_stats
 
 @app.get("/strategy_statistics")
 def statistics():
-    portfolio_df, strategy_df, trades_df = getStats.get_data()
-    print(strategy_df)
-    strategy_stats = getStats.compute_portfolio_metrics(strategy_df)
+    strategy_stats = strategy_metrics.get()
 
     return strategy_stats
\ No newline at end of file
@@ -0,0 +1,230 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable
+
+from algorithms import ids
+from algorithms.base import BaseAlgorithm, Trade
+from algorithms.market import MarketSnapshot
+
+
+def _reconcile(strategy: BaseAlgorithm, amends: list[tuple[list[str], list[float]]]) -> None:
+    for symbols, qty in amends:
+        strategy.reconcile(symbols, qty)
+
+
+class StageResult:
+    # What a process worker gets in place of a shared stage: the stage's
+    # latest result, which is all strategies read from it during run()
+    __slots__ = ("latest",)
+
+    def __init__(self, latest):
+        self.latest = latest
+
+
+def _stage_results(strategy: BaseAlgorithm) -> dict[str, StageResult]:
+    results = {}
+    for name, dep in strategy.deps.items():
+        if not hasattr(dep, "latest"):
+            raise ValueError(f"Strategy {strategy.id!r} needs {name!r}, which has no `latest` "
+                             f"result to send to a process worker; run it in thread mode")
+        results[name] = StageResult(dep.latest)
+    return results
+
+
+def _run_in_process(strategy: BaseAlgorithm, snapshot: MarketSnapshot | None,
+                    amends: list[tuple[list[str], list[float]]],
+                    stages: dict[str, StageResult]) -> tuple[Trade | None, dict, float]:
+    # The child works on a pickled copy, so its state (last_exec, models, ...)
+    # is shipped back and merged into the parent's instance. Shared stages
+    # stay in the parent; their latest results travel with the job
+    start = time.perf_counter()
+    strategy.deps = stages
+    _reconcile(strategy, amends)
+    trade = strategy.run(snapshot)
+    state = {k: v for k, v in strategy.__dict__.items() if k != "deps"}
+    return trade, state, time.perf_counter() - start
+
+
+def _run_in_thread(strategy: BaseAlgorithm, snapshot: MarketSnapshot | None,
+                   amends: list[tuple[list[str], list[float]]], stages: None = None) -> tuple[Trade | None, None, float]:
+    start = time.perf_counter()
+    _reconcile(strategy, amends)
+    trade = strategy.run(snapshot)
+    return trade, None, time.perf_counter() - start
+
+
+class StrategyStats:
+    __slots__ = ("submitted", "completed", "trades", "empty", "errors", "timeouts", "skipped", "last_duration")
+
+    def __init__(self):
+        self.submitted = 0
+        self.completed = 0
+        self.trades = 0
+        self.empty = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.skipped = 0
+        self.last_duration = 0.0
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+# Runs due strategies on a thread pool (I/O-bound or NumPy code that releases
+# the GIL) or a process pool (pure-Python CPU-heavy strategies). submit()
+# never blocks the scheduler: results land in `self.trades` from the pool's
+# completion callbacks, and a consumer thread feeds them to the writer.
+#
+# A run that exceeds its timeout (the strategy's `timeout` attribute, else
+# `default_timeout`, else its frequency) has its result discarded, and the
+# strategy is amended so it no longer counts that trade as held. Pools
+# cannot interrupt a running call, so until it returns the strategy is not
+# resubmitted; those slots are counted as skipped. Exceptions and None
+# results are counted and never reach the caller.
+class StrategyExecutor:
+    def __init__(self, mode: str = "thread", max_workers: int | None = None, default_timeout: float | None = None):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Unknown executor mode {mode!r}; choose 'thread' or 'process'")
+
+        self.mode = mode
+        self.default_timeout = default_timeout
+        self.trades: queue.Queue[Trade | None] = queue.Queue()
+        self.stats: dict[str, StrategyStats] = {}
+
+        workers = max_workers or os.cpu_count() or 1
+        if mode == "thread":
+            self._pool: Executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="strategy")
+        else:
+            # Each pool process (including replacements) claims its own
+            # trade-id worker number
+            worker_ids = multiprocessing.Queue()
+            for worker in range(1, ids.BACKTEST_WORKER):
+                if worker != ids.worker_id():
+                    worker_ids.put(worker)
+            self._pool = ProcessPoolExecutor(max_workers=workers, initializer=ids.set_worker, initargs=(worker_ids,))
+        self._target = _run_in_thread if mode == "thread" else _run_in_process
+        self._running: dict[str, Future] = {}
+        self._amends: dict[str, list[tuple[list[str], list[float]]]] = {}
+        self._lock = threading.Lock()
+
+    def timeout_for(self, strategy: BaseAlgorithm) -> float:
+        timeout = getattr(strategy, "timeout", None) or self.default_timeout
+        return timeout if timeout is not None else strategy.frequency
+
+    # ---- Submission ----
+
+    def submit(self, strategy: BaseAlgorithm, snapshot: MarketSnapshot | None = None) -> Future | None:
+        with self._lock:
+            stats = self.stats.setdefault(strategy.id, StrategyStats())
+            if strategy.id in self._running:
+                stats.skipped += 1
+                return None
+            stages = _stage_results(strategy) if self.mode == "process" else None
+            stats.submitted += 1
+
+            deadline = time.monotonic() + self.timeout_for(strategy)
+            amends = self._amends.pop(strategy.id, [])
+            future = self._pool.submit(self._target, strategy, snapshot, amends, stages)
+            self._running[strategy.id] = future
+
+        future.add_done_callback(lambda f: self._collect(strategy, f, deadline, amends))
+        return future
+
+    def _collect(self, strategy: BaseAlgorithm, future: Future, deadline: float,
+                 amends: list[tuple[list[str], list[float]]]) -> None:
+        with self._lock:
+            self._running.pop(strategy.id, None)
+            stats = self.stats[strategy.id]
+            if amends and (future.cancelled() or future.exception() is not None) and self.mode == "process":
+                # The child's state never made it back, so neither did these
+                self._amends[strategy.id] = amends + self._amends.get(strategy.id, [])
+
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            stats.errors += 1
+            print(f"Strategy {strategy.id!r} failed: {error!r}")
+            return
+
+        trade, state, duration = future.result()
+        stats.completed += 1
+        stats.last_duration = duration
+        if state is not None:
+            strategy.__dict__.update(state)
+
+        if time.monotonic() > deadline:
+            stats.timeouts += 1
+            print(f"Strategy {strategy.id!r} timed out after {duration:.3f}s; result dropped")
+            if isinstance(trade, Trade):
+                # The strategy already counts the dropped orders as held
+                self.amend(strategy.id, trade.symbol, [-q for q in trade.qty])
+            return
+        if trade is None:
+            stats.empty += 1
+            return
+        if not isinstance(trade, Trade):
+            stats.errors += 1
+            print(f"Strategy {strategy.id!r} returned {type(trade).__name__}, expected Trade")
+            return
+
+        stats.trades += 1
+        self.trades.put(trade)
+
+    def amend(self, strategy_id: str, symbols: list[str], qty: list[float]) -> None:
+        # Holdings the book changed behind the strategy's back (sizing,
+        # rejections, partial fills). Queued and handed to reconcile() at the
+        # start of its next run, which is the only time it is safe to touch
+        # the strategy in either mode
+        if any(q != 0 for q in qty):
+            with self._lock:
+                self._amends.setdefault(strategy_id, []).append((list(symbols), list(qty)))
+
+    # ---- Consumption ----
+
+    def consume(self, handle: Callable[[Trade], object]) -> None:
+        # Blocks until close(); run it on its own thread
+        while True:
+            trade = self.trades.get()
+            if trade is None:
+                return
+            try:
+                handle(trade)
+            except Exception as e:
+                print(f"Trade handler failed for {trade.strategy_id!r}: {e!r}")
+
+    def consume_batches(self, handle: Callable[[list[Trade]], object]) -> None:
+        # Like consume(), but hands over everything queued at once so a tick's
+        # trades can be sized and written together
+        while True:
+            batch = [self.trades.get()]
+            while batch[-1] is not None:
+                try:
+                    batch.append(self.trades.get_nowait())
+                except queue.Empty:
+                    break
+            closed = batch[-1] is None
+            batch = [t for t in batch if t is not None]
+            if batch:
+                try:
+                    handle(batch)
+                except Exception as e:
+                    print(f"Trade handler failed for {[t.strategy_id for t in batch]!r}: {e!r}")
+            if closed:
+                return
+
+    def in_flight(self) -> list[str]:
+        with self._lock:
+            return list(self._running)
+
+    def report(self) -> dict[str, dict]:
+        with self._lock:
+            return {name: stats.as_dict() for name, stats in self.stats.items()}
+
+    def close(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait, cancel_futures=not wait)
+        self.trades.put(None)
@@ -1,53 +1,220 @@
+import duckdb
+import queue
+import threading
 import time
-from algorithms.base import Trade, BaseAlgorithm
-from algorithms import dummyTest
 import numpy as np
-from database import init_duckdb, append
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from algorithms.base import Trade, BaseAlgorithm
+from algorithms import registry
+from algorithms.market import DEFAULT_UNIVERSE, MarketBuffer
+from database import init_duckdb, append, ledger, tiering
+from database.journal import Journal
+from database.writer import TradeWriter
+from controller.scheduler import Scheduler
+from controller.executor import StrategyExecutor
+from stats.risk import PortfolioSizer, RiskGate, RiskLimits
+from execution import Gateway, OrderHandle, SimulatedBroker
+
+DB_PATH = "algory.duckdb"
+
+def startup(journal: Journal, db_path: str = DB_PATH) -> tuple[dict[str, BaseAlgorithm], dict[str, int]]:
 
-def startup() -> tuple[dict[str, BaseAlgorithm], dict[str, int]]:
+    # Create any missing tables (and run key migrations) before touching them
+    init_duckdb.initialize_duckdb(db_path)
 
-    # Initialize Strategy Tracking
-    dummy_strategy = dummyTest.DummyTest('dummy_strategy', 1)
-    strategy_dict = { "dummy_strategy": dummy_strategy }
+    # Trades journaled before a crash but never committed go in first
+    con = duckdb.connect(db_path)
+    replayed = journal.replay(con, db_path)
+    con.close()
+    if replayed:
+        print(f"Replayed {replayed} trade legs from the journal")
+
+    # Rebuild positions from the trades table so bookkeeping starts consistent
+    ledger.get_ledger(db_path).rebuild()
+
+    # Initialize Strategy Tracking: only enabled strategies are imported
+    start = time.perf_counter()
+    strategy_dict = registry.load_strategies()
+    timings = registry.get_registry().timings
+    print(f"Loaded {len(strategy_dict)} strategies in {time.perf_counter() - start:.3f}s "
+          f"({', '.join(f'{k}={v * 1000:.1f}ms' for k, v in timings.items())})")
     strategy_frequencies = {strategy.id: strategy.frequency for strategy in strategy_dict.values()}
 
     return strategy_dict, strategy_frequencies
 
-def execute(trade: Trade) -> int:
-    return 100
+def execute(trade: Trade, gateway: Gateway) -> OrderHandle:
+    # Returns as soon as the orders are queued; fills arrive on the handle
+    return gateway.submit(trade)
+
+BOOKKEEPING_INTERVAL = 60  # seconds
+PUBLISH_INTERVAL = 2       # seconds between replica copies for the BFF
+ARCHIVE_INTERVAL = 3600    # seconds between moving closed days to Parquet
+MARKET_INTERVAL = 1        # seconds between market snapshots
+EXECUTOR_MODE = "thread"   # "process" for CPU-heavy pure-Python strategies
+EXECUTOR_WORKERS = None    # defaults to os.cpu_count()
+INITIAL_CAPITAL = 1_000_000.0
+RISK_WINDOW = 60           # bars of returns behind the sizing covariance
+RISK_LIMITS = RiskLimits(
+    capital=INITIAL_CAPITAL,
+    max_order_notional=250_000.0,
+    max_symbol_notional=400_000.0,
+    max_strategy_notional=1_000_000.0,
+    max_concentration=0.25,
+    max_drawdown=0.2,
+)
 
-def is_strategy_time(id: str, strategy: BaseAlgorithm) -> bool:
-    if abs(time.time() % strategy.frequency) < 1 and (time.time() - strategy.last_exec > 1):
-        return True
-    else:
-        return False
 
-def is_bookkeeping_time() -> bool:
-    if np.random.rand() > 0.95: 
-        return True
+def refresh_market(market: MarketBuffer) -> None:
+    # Simulated feed (random walk, as in the fertilizer) until a market-data
+    # source is wired in; strategies read the snapshot built from this row
+    last = market.last_row()
+    if last is None:
+        last = np.random.uniform(50.0, 400.0, len(market.symbols))
+    market.append(datetime.now(), last * (1.0 + np.random.normal(0.0001, 0.01, len(last))))
+
+def size_trades(trades: list[Trade], sizer: PortfolioSizer, market: MarketBuffer) -> None:
+    # One vectorized sizing pass over every leg of the tick's trades, netted
+    # per symbol against the market's return covariance; scales qty in place,
+    # every leg of a trade by the same factor so multi-leg trades stay hedged
+    snapshot = market.snapshot()
+    qty = np.fromiter((q for t in trades for q in t.qty), dtype=np.float64)
+    price = np.fromiter((p for t in trades for p in t.price), dtype=np.float64)
+    symbols = [s for t in trades for s in t.symbol]
+    if not qty.size:
+        return
+
+    if all(s in snapshot.column for s in symbols):
+        codes = np.fromiter((snapshot.column[s] for s in symbols), dtype=np.int64, count=len(symbols))
+        cov = np.nan_to_num(snapshot.covariance(RISK_WINDOW))
+        price = np.where(np.isfinite(price), price, snapshot.latest[codes])
     else:
-        return False
+        index: dict[str, int] = {}
+        codes = np.fromiter((index.setdefault(s, len(index)) for s in symbols), dtype=np.int64, count=len(symbols))
+        cov = None
 
-def main_loop(strategy_dict: dict[str, BaseAlgorithm], strategy_frequencies: dict[str: int]):
+    legs = [len(t.qty) for t in trades]
+    sized = sizer.scale_orders(qty, np.nan_to_num(price), codes, cov, groups=np.repeat(np.arange(len(trades)), legs))
+    offsets = np.cumsum(legs)[:-1]
+    for trade, part in zip(trades, np.split(sized, offsets)):
+        trade.qty = part.tolist()
 
-    for strategy in strategy_dict.values():
-        if is_strategy_time(strategy, strategy):
-            trade_decision = strategy.run() # current trade decision
-            print(trade_decision)
-            res = execute(trade_decision)
+def record_fills(fills: queue.Queue, writer: TradeWriter, gate: RiskGate, executor: StrategyExecutor) -> None:
+    # Books what actually traded, at the average fill prices, in the gate and
+    # the trades table, and tells the strategy what did not fill. Runs on its
+    # own thread until it gets None: order callbacks fire on the gateway's
+    # loop, which must never wait on the journal's fsync or a DuckDB flush
+    while True:
+        handle = fills.get()
+        if handle is None:
+            return
+        filled = handle.filled_trade()
+        gate.settle(handle.trade, filled)
+        executor.amend(handle.trade.strategy_id, [o.symbol for o in handle.orders],
+                       [o.filled_qty - o.qty for o in handle.orders])
+        if filled is None:
+            continue
+        try:
+            writer.submit(filled)
+        except Exception as e:
+            print(f"Recording fills failed for {filled.strategy_id!r}: {e!r}")
 
-            if abs(max(trade_decision.qty)) > 0:
-                append.append_trade(trade_decision)
-    if is_bookkeeping_time():        
-        append.append_portfolios()
-        append.append_strategy_portfolios()
+def handle_trades(trade_decisions: list[Trade], fills: queue.Queue, sizer: PortfolioSizer, gate: RiskGate,
+                  market: MarketBuffer, gateway: Gateway, executor: StrategyExecutor) -> None:
+    requested = [list(t.qty) for t in trade_decisions]
+    size_trades(trade_decisions, sizer, market)
+    for trade_decision, raw in zip(trade_decisions, requested):
+        # Strategies believe they hold what they asked for; tell them what
+        # sizing left of it
+        executor.amend(trade_decision.strategy_id, trade_decision.symbol, [q - r for q, r in zip(trade_decision.qty, raw)])
+    for trade_decision in trade_decisions:
+        if not any(q != 0 for q in trade_decision.qty):
+            continue
+        if not gate.check(trade_decision):
+            # Rejections are logged by the gate; none of it will trade
+            executor.amend(trade_decision.strategy_id, trade_decision.symbol, [-q for q in trade_decision.qty])
+            continue
+        print(trade_decision)
+        gate.reserve(trade_decision)
+        handle = execute(trade_decision, gateway)
+        handle.add_callback(fills.put)
 
+def bookkeeping(writer: TradeWriter, market: MarketBuffer, scheduler: Scheduler, executor: StrategyExecutor, gateway: Gateway) -> None:
+    # Value the ledger at the latest market row, then publish for readers
+    writer.flush()
+    snapshot = market.snapshot()
+    if len(snapshot):
+        prices = dict(zip(snapshot.symbols, snapshot.latest.tolist()))
+        append.append_portfolios(snapshot.timestamp, prices, writer.db_path)
+        append.append_strategy_portfolios(snapshot.timestamp, prices, writer.db_path)
+    writer.publish_snapshot(force=True)
 
+    for name, stats in scheduler.report().items():
+        if stats["missed"] or stats["drift_max"] > 0.1:
+            print(f"{name}: runs={stats['runs']} missed={stats['missed']} "
+                  f"drift mean={stats['drift_mean']:.4f}s max={stats['drift_max']:.4f}s")
+    for name, stats in executor.report().items():
+        if stats["errors"] or stats["timeouts"] or stats["skipped"]:
+            print(f"{name}: errors={stats['errors']} timeouts={stats['timeouts']} skipped={stats['skipped']}")
+    stats = gateway.report()
+    print(f"gateway: orders={stats['orders']} batches={stats['batches']} open={stats['open']} rejected={stats['rejected']} "
+          f"latency mean={stats['latency_mean'] * 1000:.1f}ms max={stats['latency_max'] * 1000:.1f}ms")
+    stats = writer.report()
+    print(f"replica: published={stats['published']} skipped={stats['skipped']} size={stats['bytes'] / 1e6:.1f}MB "
+          f"copy last={stats['copy_last'] * 1000:.1f}ms max={stats['copy_max'] * 1000:.1f}ms")
 
 def main():
-    strategy_dict, strategy_frequencies = startup()
-    for i in range(10000):
-        main_loop(strategy_dict, strategy_frequencies)
-        time.sleep(0.01)
+    journal = Journal()
+    strategy_dict, strategy_frequencies = startup(journal)
+    # Fills hit the journal before the writer queues them for DuckDB
+    writer = TradeWriter(DB_PATH, journal=journal)
+    scheduler = Scheduler()
+    executor = StrategyExecutor(EXECUTOR_MODE, EXECUTOR_WORKERS)
+    market = MarketBuffer(DEFAULT_UNIVERSE)
+    refresh_market(market)
+    sizer = PortfolioSizer(INITIAL_CAPITAL, max_weight=0.25, max_leverage=1.0, target_vol=0.02)
+    gate = RiskGate(RISK_LIMITS, ledger.get_ledger(DB_PATH).positions, dict(zip(market.symbols, market.last_row().tolist())))
+    gateway = Gateway(SimulatedBroker()).start()
+
+    # Strategies run on the pool; whatever trades have queued up are sized
+    # and executed here as one batch, and finished orders are written by
+    # the recorder
+    fills: queue.Queue[OrderHandle | None] = queue.Queue()
+    recorder = threading.Thread(target=record_fills, args=(fills, writer, gate, executor), name="fill-recorder", daemon=True)
+    recorder.start()
+    consumer = threading.Thread(
+        target=executor.consume_batches, args=(lambda ts: handle_trades(ts, fills, sizer, gate, market, gateway, executor),), daemon=True
+    )
+    consumer.start()
+
+    # Runs ahead of strategies due in the same slot so they see the new row
+    scheduler.add("market", MARKET_INTERVAL, lambda: refresh_market(market), priority=-1)
+    for strategy in strategy_dict.values():
+        scheduler.add_strategy(strategy, lambda s: executor.submit(s, market.snapshot()))
+
+    # Shared stages (e.g. the pairs screener) refresh on their own cadence,
+    # off the scheduler thread, and strategies read their cached results
+    stages = ThreadPoolExecutor(max_workers=2, thread_name_prefix="stage")
+    for name, dep in registry.get_registry().shared.items():
+        if hasattr(dep, "refresh") and getattr(dep, "interval", None):
+            scheduler.add(name, dep.interval, lambda d=dep: stages.submit(d.refresh, market.snapshot()))
+    # Readers see new fills within a few seconds; a tick with nothing
+    # committed, or with the previous copy still running, skips it
+    scheduler.add("publish", PUBLISH_INTERVAL, lambda: stages.submit(writer.publish_snapshot, wait=False))
+    scheduler.add("bookkeeping", BOOKKEEPING_INTERVAL, lambda: bookkeeping(writer, market, scheduler, executor, gateway))
+    scheduler.add("archive", ARCHIVE_INTERVAL, lambda: stages.submit(writer.run, lambda con: tiering.archive(con, writer.db_path)))
+
+    try:
+        scheduler.run()
+    finally:
+        stages.shutdown(wait=False, cancel_futures=True)
+        executor.close(wait=False)
+        consumer.join()
+        gateway.close()
+        fills.put(None)
+        recorder.join()
+        writer.close()
+        journal.close()
 
-main()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
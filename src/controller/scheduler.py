@@ -0,0 +1,162 @@
+import heapq
+import itertools
+import math
+import threading
+import time
+from typing import Callable
+
+from algorithms.base import BaseAlgorithm
+
+
+def next_slot(interval: float, now: float, last_exec: float = 0.0) -> float:
+    # Runs are aligned to multiples of the interval (epoch-based, like the old
+    # `time % frequency` check); a slot that already ran is skipped
+    slot = math.ceil(now / interval) * interval
+    if last_exec >= slot:
+        slot = (math.floor(last_exec / interval) + 1) * interval
+    return slot
+
+
+class Job:
+    __slots__ = ("name", "interval", "fn", "due", "priority", "runs", "missed", "drift_total", "drift_max", "last_drift", "last_duration")
+
+    def __init__(self, name: str, interval: float, fn: Callable[[], object], due: float, priority: int = 0):
+        self.name = name
+        self.interval = interval
+        self.fn = fn
+        self.due = due
+        self.priority = priority
+
+        self.runs = 0
+        self.missed = 0
+        self.drift_total = 0.0
+        self.drift_max = 0.0
+        self.last_drift = 0.0
+        self.last_duration = 0.0
+
+    def stats(self) -> dict:
+        return {
+            "interval": self.interval,
+            "next_due": self.due,
+            "runs": self.runs,
+            "missed": self.missed,
+            "drift_mean": self.drift_total / self.runs if self.runs else 0.0,
+            "drift_max": self.drift_max,
+            "drift_last": self.last_drift,
+            "duration_last": self.last_duration,
+        }
+
+
+# Min-heap of (due, priority, seq, job); among jobs due together the lower
+# priority runs first. The loop sleeps on an Event until the earliest
+# job is due, so idle time costs nothing and each job runs once per slot no
+# matter how many jobs are registered. After a run the job is rescheduled on
+# its own grid (due + interval); slots that passed while a run overran are
+# counted as missed and skipped rather than fired back to back.
+class Scheduler:
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self.clock = clock
+        self.jobs: dict[str, Job] = {}
+
+        self._heap: list[tuple[float, int, int, Job]] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+
+    # ---- Registration ----
+
+    def add(self, name: str, interval: float, fn: Callable[[], object], last_exec: float = 0.0, priority: int = 0) -> Job:
+        if interval <= 0:
+            raise ValueError(f"Job {name!r} needs a positive interval, got {interval}")
+        if name in self.jobs:
+            raise ValueError(f"Job {name!r} is already scheduled")
+
+        job = Job(name, float(interval), fn, next_slot(interval, self.clock(), last_exec), priority)
+        with self._lock:
+            self.jobs[name] = job
+            heapq.heappush(self._heap, (job.due, priority, next(self._seq), job))
+        self._wake.set()  # the loop may be sleeping past the new job's slot
+        return job
+
+    def add_strategy(self, strategy: BaseAlgorithm, fn: Callable[[BaseAlgorithm], object]) -> Job:
+        return self.add(strategy.id, strategy.frequency, lambda: fn(strategy), strategy.last_exec)
+
+    def remove(self, name: str) -> None:
+        # Lazy deletion: the heap entry is dropped when it reaches the top
+        self.jobs.pop(name, None)
+
+    # ---- Loop ----
+
+    def _reschedule(self, job: Job, now: float) -> None:
+        due = job.due + job.interval
+        if due <= now:
+            skipped = math.floor((now - due) / job.interval) + 1
+            job.missed += skipped
+            due += skipped * job.interval
+        job.due = due
+        with self._lock:
+            heapq.heappush(self._heap, (due, job.priority, next(self._seq), job))
+
+    def pop_due(self, now: float | None = None) -> list[Job]:
+        now = self.clock() if now is None else now
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                job = heapq.heappop(self._heap)[-1]
+                if self.jobs.get(job.name) is job:
+                    due.append(job)
+        return due
+
+    def run_job(self, job: Job) -> None:
+        start = self.clock()
+        job.last_drift = start - job.due
+        job.drift_total += job.last_drift
+        job.drift_max = max(job.drift_max, job.last_drift)
+        try:
+            job.fn()
+        except Exception as e:
+            print(f"Scheduled job {job.name!r} failed: {e}")
+        finally:
+            end = self.clock()
+            job.runs += 1
+            job.last_duration = end - start
+            self._reschedule(job, end)
+
+    def run_pending(self) -> int:
+        jobs = self.pop_due()
+        for job in jobs:
+            self.run_job(job)
+        return len(jobs)
+
+    def seconds_until_next(self) -> float | None:
+        with self._lock:
+            while self._heap and self.jobs.get(self._heap[0][-1].name) is not self._heap[0][-1]:
+                heapq.heappop(self._heap)
+            if not self._heap:
+                return None
+            due = self._heap[0][0]
+        return max(0.0, due - self.clock())
+
+    def run(self, until: float | None = None) -> None:
+        self._stopped.clear()
+        while not self._stopped.is_set():
+            if until is not None and self.clock() >= until:
+                break
+            self._wake.clear()
+            self.run_pending()
+
+            timeout = self.seconds_until_next()
+            if until is not None:
+                remaining = max(0.0, until - self.clock())
+                timeout = remaining if timeout is None else min(timeout, remaining)
+            self._wake.wait(timeout)
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wake.set()
+
+    # ---- Metrics ----
+
+    def report(self) -> dict[str, dict]:
+        return {name: job.stats() for name, job in self.jobs.items()}
@@ -2,48 +2,43 @@ import duckdb
 import numpy as np
 import pandas as pd
 from datetime import datetime
-from ..algorithms.base import Trade
+from algorithms.base import Trade, TradeBatch
+from .ledger import get_ledger
+from . import rollups
 
 
 def append_trade(trade: Trade, db_path: str = "algory.duckdb") -> None:
-    con = duckdb.connect(db_path)
-
-    timestamp = datetime.fromtimestamp(trade.timestamp)
-
-    legs = [
-        (sym, qty, price)
-        for sym, qty, price in zip(trade.symbol, trade.qty, trade.price)
-        if abs(qty) > 1e-8
-    ]
-    if not legs:
-        con.close()
+    batch = TradeBatch.from_trades([trade])
+    if not len(batch):
         return
 
-    for sym, qty, price in legs:
-
-        side = "BUY" if qty > 0 else "SELL"
+    ledger = get_ledger(db_path)
+    con = duckdb.connect(db_path)
 
-        con.execute(
-            """
-            INSERT INTO trades
-                (trade_id, timestamp, strategy, symbol, side, quantity, price)
-            VALUES (?, ?, ?, ?, ?, ?, ?);
-            """,
-            [trade.trade_id, timestamp, trade.strategy_id, sym, side, float(qty), float(price)]
-        )
-    con.close()
+    try:
+        con.begin()
+        batch.insert(con)
+        deltas = ledger.apply_batch(batch, con)
+        rollups.add_trades(con, batch)
+        con.commit()
+    except Exception:
+        con.rollback()
+        raise
+    finally:
+        con.close()
+    ledger.apply_deltas(deltas)
 
+# Snapshots value the ledger's current positions, so trades must be appended
+# in timestamp order before the bookkeeping call for `timestamp`.
 def append_portfolios(timestamp: datetime, prices: dict[str, float], db_path: str = "algory.duckdb") -> None:
-    con = duckdb.connect(db_path)
+    positions = get_ledger(db_path).symbol_positions()
 
-    df = con.execute("SELECT symbol, quantity FROM trades WHERE timestamp <= ? ORDER BY timestamp",[timestamp],).df()
-    
-    if df.empty:
-        con.close()
+    if not positions:
         return
 
-    grouped = df.groupby(by='symbol').sum(numeric_only=True)
-    qty = grouped["quantity"]
+    con = duckdb.connect(db_path)
+
+    qty = pd.Series(positions, dtype=float)
 
     price_series = pd.Series(prices)
 
@@ -52,47 +47,63 @@ def append_portfolios(timestamp: datetime, prices: dict[str, float], db_path: st
     portfolio_value = (qty_aligned * price_aligned).sum()
     total_positions = int((qty_aligned != 0).sum())
     
-    con.execute(
-        """
-        INSERT INTO portfolio_history
-            (timestamp, total_value, total_cash, total_positions)
-        VALUES (?, ?, ?, ?);
-        """,
-        [timestamp, portfolio_value, 100.0, total_positions],
-    )
-    con.close()
+    # The history row and its rollup land together or not at all
+    try:
+        con.begin()
+        con.execute(
+            """
+            INSERT INTO portfolio_history
+                (timestamp, total_value, total_cash, total_positions)
+            VALUES (?, ?, ?, ?);
+            """,
+            [timestamp, portfolio_value, 100.0, total_positions],
+        )
+        rollups.add_equity(con, [(timestamp, rollups.PORTFOLIO, float(portfolio_value))])
+        con.commit()
+    except Exception:
+        con.rollback()
+        raise
+    finally:
+        con.close()
 
 def append_strategy_portfolios(timestamp: datetime, prices: dict[str, float], db_path: str = "algory.duckdb") -> None:
-    con = duckdb.connect(db_path)
-
-    df = con.execute("SELECT strategy, symbol, quantity FROM trades WHERE timestamp <= ? ORDER BY timestamp",[timestamp],).df()
+    strategy_positions = get_ledger(db_path).strategy_positions()
 
-    if df.empty:
-        con.close()
+    if not strategy_positions:
         return
-    
-    grouped = df.groupby(by=['strategy','symbol']).sum(numeric_only=True)
-
-    for strat in grouped.index.get_level_values("strategy").unique():
-        
-        strat_positions = grouped.xs(strat, level="strategy")
-        qty = strat_positions["quantity"]
-
-        price_series = pd.Series(prices)
 
-        qty_aligned, price_aligned = qty.align(price_series, join="inner")
-        if qty_aligned.empty:
-            continue
-
-        strat_value = float((qty_aligned * price_aligned).sum())
-        n_positions = int((qty_aligned != 0).sum())
-    
-        con.execute(
-            """
-            INSERT INTO strategy_history
-                (timestamp, strategy, strategy_value, cash, exposure, n_positions)
-            VALUES (?, ?, ?, ?, ?, ?);
-            """,
-            [timestamp, strat, strat_value, 100.0, strat_value, n_positions],
-        )
-    con.close()
\ No newline at end of file
+    con = duckdb.connect(db_path)
+    price_series = pd.Series(prices)
+    equity = []
+
+    # Every strategy's row and the rollups commit as one snapshot
+    try:
+        con.begin()
+        for strat in sorted(strategy_positions):
+
+            qty = pd.Series(strategy_positions[strat], dtype=float)
+
+            qty_aligned, price_aligned = qty.align(price_series, join="inner")
+            if qty_aligned.empty:
+                continue
+
+            strat_value = float((qty_aligned * price_aligned).sum())
+            n_positions = int((qty_aligned != 0).sum())
+
+            con.execute(
+                """
+                INSERT INTO strategy_history
+                    (timestamp, strategy, strategy_value, cash, exposure, n_positions)
+                VALUES (?, ?, ?, ?, ?, ?);
+                """,
+                [timestamp, strat, strat_value, 100.0, strat_value, n_positions],
+            )
+            equity.append((timestamp, strat, strat_value))
+
+        rollups.add_equity(con, equity)
+        con.commit()
+    except Exception:
+        con.rollback()
+        raise
+    finally:
+        con.close()
\ No newline at end of file
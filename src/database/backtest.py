@@ -0,0 +1,136 @@
+import duckdb
+import numpy as np
+import pandas as pd
+from typing import List, Sequence
+
+from algorithms.base import BaseAlgorithm, TradeBatch
+from algorithms.ids import BACKTEST_WORKER, MAX_SEQUENCE, compose
+from . import rollups
+from .ledger import get_ledger
+
+PLACEHOLDER_CASH = 100.0  # same constant the live snapshots write
+
+
+# Whole-history simulation on a (time x symbol) price matrix. Every strategy
+# emits its order matrix in one run_batch() call; positions are the running
+# sum of orders and values are positions * prices, so the cost is a handful
+# of array passes instead of a Python loop per bar.
+class BacktestResult:
+    def __init__(self, strategy_ids: List[str], symbols: List[str], timestamps: np.ndarray, prices: np.ndarray, orders: np.ndarray):
+        self.strategy_ids = strategy_ids
+        self.symbols = symbols
+        self.timestamps = timestamps
+        self.prices = prices
+        self.orders = orders                          # (strategy, time, symbol)
+        self.positions = np.cumsum(orders, axis=1)    # (strategy, time, symbol)
+
+        # Symbols without a price at t are left out, like the live snapshots do
+        self.priced = ~np.isnan(prices)
+        valued = self.positions * np.where(self.priced, prices, 0.0)
+        self.strategy_values = valued.sum(axis=2)     # (strategy, time)
+        self.net_positions = self.positions.sum(axis=0)
+
+    # ---- Tables ----
+
+    def trades_batch(self) -> TradeBatch:
+        # np.nonzero walks (strategy, time, symbol) in order; transpose so
+        # legs come out by bar, then strategy
+        t, s, n = np.nonzero(self.orders.transpose(1, 0, 2))
+
+        # One trade per (strategy, bar); its legs share the id. Backtests
+        # issue ids as their own worker with the strategy index as sequence
+        if len(self.strategy_ids) > MAX_SEQUENCE + 1:
+            raise ValueError(f"At most {MAX_SEQUENCE + 1} strategies per backtest")
+        ms = self.timestamps.astype("datetime64[ms]").astype(np.int64)
+        return TradeBatch(
+            compose(ms[t], BACKTEST_WORKER, s.astype(np.int64)), self.timestamps[t],
+            s, self.strategy_ids,
+            n, self.symbols,
+            self.orders[s, t, n], self.prices[t, n],
+        )
+
+    def trades_frame(self) -> pd.DataFrame:
+        return self.trades_batch().to_frame()
+
+    def portfolio_frame(self) -> pd.DataFrame:
+        traded = np.nonzero(self.orders.any(axis=(0, 2)))[0]
+        if traded.size == 0:
+            return pd.DataFrame(columns=["timestamp", "total_value", "total_cash", "total_positions"])
+
+        # Snapshots start once the ledger holds anything
+        start = traded[0]
+        return pd.DataFrame({
+            "timestamp": self.timestamps[start:],
+            "total_value": self.strategy_values.sum(axis=0)[start:],
+            "total_cash": PLACEHOLDER_CASH,
+            "total_positions": ((self.net_positions != 0) & self.priced).sum(axis=1)[start:].astype(np.int32),
+        })
+
+    def strategy_frame(self) -> pd.DataFrame:
+        frames = []
+        held = (self.positions != 0) & self.priced
+        for i, strategy in enumerate(self.strategy_ids):
+            traded = np.nonzero(self.orders[i].any(axis=1))[0]
+            if traded.size == 0:
+                continue
+            start = traded[0]
+            value = self.strategy_values[i, start:]
+            frames.append(pd.DataFrame({
+                "timestamp": self.timestamps[start:],
+                "strategy": strategy,
+                "strategy_value": value,
+                "cash": PLACEHOLDER_CASH,
+                "exposure": value,
+                "n_positions": held[i, start:].sum(axis=1).astype(np.int32),
+            }))
+        if not frames:
+            return pd.DataFrame(columns=["timestamp", "strategy", "strategy_value", "cash", "exposure", "n_positions"])
+        return pd.concat(frames, ignore_index=True).sort_values(["timestamp", "strategy"], ignore_index=True)
+
+    # ---- Loading ----
+
+    def load(self, con: duckdb.DuckDBPyConnection, db_path: str) -> int:
+        trades = self.trades_batch()
+        tables = {
+            "portfolio_history": self.portfolio_frame(),
+            "strategy_history": self.strategy_frame(),
+        }
+
+        con.begin()
+        try:
+            trades.insert(con)
+            for table, frame in tables.items():
+                if frame.empty:
+                    continue
+                con.register("_backtest_rows", frame)
+                con.execute(f"INSERT INTO {table} ({', '.join(frame.columns)}) SELECT * FROM _backtest_rows")
+                con.unregister("_backtest_rows")
+            get_ledger(db_path).rebuild(con)
+
+            rollups.add_trades(con, trades)
+            portfolio, strategies = tables["portfolio_history"], tables["strategy_history"]
+            rollups.add_equity(con, zip(portfolio["timestamp"], [rollups.PORTFOLIO] * len(portfolio), portfolio["total_value"]))
+            rollups.add_equity(con, zip(strategies["timestamp"], strategies["strategy"], strategies["strategy_value"]))
+            con.commit()
+        except Exception:
+            con.rollback()
+            # rebuild() already refreshed the mirror from the discarded rows
+            get_ledger(db_path).load(con)
+            raise
+        return len(trades)
+
+
+def backtest(strategies: Sequence[BaseAlgorithm], symbols: List[str], timestamps: np.ndarray, prices: np.ndarray) -> BacktestResult:
+    prices = np.asarray(prices, dtype=np.float64)
+    if prices.shape != (len(timestamps), len(symbols)):
+        raise ValueError(f"prices must be (time, symbol) = {(len(timestamps), len(symbols))}, got {prices.shape}")
+
+    orders = np.zeros((len(strategies),) + prices.shape)
+    for i, strategy in enumerate(strategies):
+        batch = np.asarray(strategy.run_batch(prices, symbols), dtype=np.float64)
+        if batch.shape != prices.shape:
+            raise ValueError(f"{strategy.id}.run_batch returned shape {batch.shape}, expected {prices.shape}")
+        # Dust is dropped, as for live trade legs
+        orders[i] = np.where(np.abs(batch) > 1e-8, np.nan_to_num(batch), 0.0)
+
+    return BacktestResult([s.id for s in strategies], list(symbols), np.asarray(timestamps, dtype="datetime64[us]"), prices, orders)
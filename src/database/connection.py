@@ -0,0 +1,163 @@
+import asyncio
+import os
+import threading
+import time
+import duckdb
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable
+
+DEFAULT_DB_PATH = Path(__file__).resolve().parents[1] / "algory.duckdb"
+
+
+def replica_dir(db_path: str | Path) -> Path:
+    db_path = Path(db_path)
+    return db_path.with_name(db_path.stem + ".replica")
+
+
+# One database instance per process, one cursor per thread. DuckDB cursors
+# are cheap duplicates of the root connection that share its buffer pool and
+# catalog, so handlers stop paying connect()/close() per request. Async code
+# runs its queries on a small dedicated pool via run()/fetch_arrow().
+class ConnectionManager:
+    def __init__(self, db_path: str | Path = DEFAULT_DB_PATH, read_only: bool = False, max_workers: int = 8):
+        self.db_path = str(db_path)
+        self.read_only = read_only
+
+        self._root: duckdb.DuckDBPyConnection | None = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="duckdb")
+
+    def _connect(self) -> duckdb.DuckDBPyConnection:
+        return duckdb.connect(self.db_path, read_only=self.read_only)
+
+    def _current_root(self) -> tuple[duckdb.DuckDBPyConnection, int]:
+        with self._lock:
+            if self._root is None:
+                self._root = self._connect()
+                self._generation += 1
+            return self._root, self._generation
+
+    def cursor(self) -> duckdb.DuckDBPyConnection:
+        root, generation = self._current_root()
+        if getattr(self._local, "generation", None) != generation:
+            self._local.cursor = root.cursor()
+            self._local.generation = generation
+        return self._local.cursor
+
+    def execute(self, sql: str, params: list | None = None) -> duckdb.DuckDBPyConnection:
+        return self.cursor().execute(sql, params or [])
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        # fn(cursor, *args, **kwargs) on a pool thread with that thread's cursor
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: fn(self.cursor(), *args, **kwargs))
+
+    async def fetch_arrow(self, sql: str, params: list | None = None):
+        return await self.run(lambda cur: cur.execute(sql, params or []).fetch_arrow_table())
+
+    async def fetch_df(self, sql: str, params: list | None = None):
+        return await self.run(lambda cur: cur.execute(sql, params or []).df())
+
+    def close(self) -> None:
+        with self._lock:
+            if self._root is not None:
+                self._root.close()
+                self._root = None
+        self._executor.shutdown(wait=False)
+
+
+# Readers in other processes cannot open the file the controller is writing
+# (DuckDB takes an exclusive lock), so the writer publishes consistent
+# snapshots with publish_snapshot() and readers follow the newest one.
+# Each snapshot gets a unique file name: the in-process instance cache is
+# keyed by path, and cursors still reading an older snapshot keep their
+# (unlinked) file until they are done with it. A replaced root stays open
+# until the swap after it, then is closed with its cursors, so at most two
+# snapshots are held open, matching what publish_snapshot() keeps on disk.
+class ReplicaManager(ConnectionManager):
+    def __init__(self, db_path: str | Path = DEFAULT_DB_PATH, check_interval: float = 1.0, max_workers: int = 8):
+        super().__init__(db_path, read_only=True, max_workers=max_workers)
+        self.replicas = replica_dir(db_path)
+        self.check_interval = check_interval
+        self._source: str | None = None
+        self._checked = 0.0
+        self._retired: duckdb.DuckDBPyConnection | None = None
+
+    def _latest(self) -> str | None:
+        try:
+            name = (self.replicas / "CURRENT").read_text().strip()
+        except FileNotFoundError:
+            return None
+        path = self.replicas / name
+        return str(path) if path.exists() else None
+
+    def _connect(self) -> duckdb.DuckDBPyConnection:
+        # Fall back to the primary (read-only) when no snapshot has been published
+        self._source = self._latest() or self.db_path
+        return duckdb.connect(self._source, read_only=True)
+
+    def _current_root(self) -> tuple[duckdb.DuckDBPyConnection, int]:
+        now = time.monotonic()
+        if self._root is not None and now - self._checked > self.check_interval:
+            self._checked = now
+            latest = self._latest()
+            if latest is not None and latest != self._source:
+                with self._lock:
+                    # Threads still on the previous snapshot have until the
+                    # next swap to finish with it
+                    if self._retired is not None:
+                        self._retired.close()
+                    self._retired, self._root = self._root, None
+        return super()._current_root()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._retired is not None:
+                self._retired.close()
+                self._retired = None
+        super().close()
+
+
+def publish_snapshot(con: duckdb.DuckDBPyConnection, db_path: str | Path = DEFAULT_DB_PATH, keep: int = 2) -> Path:
+    out_dir = replica_dir(db_path)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    name = f"{time.time_ns()}.duckdb"
+    tmp = out_dir / (name + ".tmp")
+    source = con.execute("SELECT current_database()").fetchone()[0]
+
+    con.execute(f"ATTACH '{tmp}' AS _snapshot")
+    try:
+        con.execute(f"COPY FROM DATABASE {source} TO _snapshot")
+    finally:
+        con.execute("DETACH _snapshot")
+
+    os.replace(tmp, out_dir / name)
+    pointer = out_dir / "CURRENT.tmp"
+    pointer.write_text(name)
+    os.replace(pointer, out_dir / "CURRENT")
+
+    # Old snapshots stay readable for open handles after unlink
+    snapshots = sorted(p for p in out_dir.glob("*.duckdb"))
+    for old in snapshots[:-keep]:
+        old.unlink(missing_ok=True)
+        Path(str(old) + ".wal").unlink(missing_ok=True)
+
+    return out_dir / name
+
+
+_READERS: dict[str, ReplicaManager] = {}
+_READERS_LOCK = threading.Lock()
+
+
+def get_reader(db_path: str | Path = DEFAULT_DB_PATH) -> ReplicaManager:
+    key = str(db_path)
+    with _READERS_LOCK:
+        reader = _READERS.get(key)
+        if reader is None:
+            reader = ReplicaManager(db_path)
+            _READERS[key] = reader
+        return reader
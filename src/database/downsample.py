@@ -0,0 +1,39 @@
+import numpy as np
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    # Largest-Triangle-Three-Buckets: indices of n_out points that keep the
+    # visual shape of (x, y). First and last points are always kept; each
+    # middle bucket keeps the point forming the largest triangle with the
+    # previously kept point and the average of the next bucket.
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1][:max(n_out, 0)], dtype=np.int64)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # n_out - 2 buckets over the interior points 1 .. n-2
+    edges = np.floor(np.linspace(1, n - 1, n_out - 1)).astype(np.int64)
+    starts, ends = edges[:-1], edges[1:]
+
+    # Each bucket is compared against the mean of the next one (the last point for the final bucket)
+    lengths = ends - starts
+    mean_x = np.add.reduceat(x[:n - 1], starts) / lengths
+    mean_y = np.add.reduceat(y[:n - 1], starts) / lengths
+    next_x = np.r_[mean_x[1:], x[-1]]
+    next_y = np.r_[mean_y[1:], y[-1]]
+
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+
+    a = 0
+    for i, (s, e) in enumerate(zip(starts, ends)):
+        bx, by = x[s:e], y[s:e]
+        area = np.abs((x[a] - next_x[i]) * (by - y[a]) - (x[a] - bx) * (next_y[i] - y[a]))
+        a = s + int(np.argmax(area))
+        out[i + 1] = a
+
+    return out
@@ -0,0 +1,184 @@
+import asyncio
+import json
+import math
+import duckdb
+from collections import deque
+from datetime import datetime
+from typing import AsyncIterator
+
+from .connection import ConnectionManager, get_reader
+from .tiering import generation
+
+
+def _rows(cur: duckdb.DuckDBPyConnection) -> list[dict]:
+    cols = [d[0] for d in cur.description]
+    return [dict(zip(cols, row)) for row in cur.fetchall()]
+
+
+def _finite(value):
+    # JSON has no NaN or Infinity; browsers reject the whole event otherwise
+    return None if isinstance(value, float) and not math.isfinite(value) else value
+
+
+def _encode(rows: list[dict]) -> str:
+    rows = [{k: _finite(v) for k, v in row.items()} for row in rows]
+    return json.dumps(rows, default=lambda o: o.isoformat() if isinstance(o, datetime) else str(o), allow_nan=False)
+
+
+# Tails `trades` and `portfolio_history` for every connected client at once.
+# One poller reads only rows past its high-water marks (trades.seq, timestamp),
+# serializes each batch once, and appends it to a bounded buffer of
+# (seq, event, payload). Clients stream from the buffer; only a client that
+# connects fresh or falls behind the buffer touches DuckDB, to catch up from
+# its own cursors to the poller's high-water marks. Trades are followed by
+# seq, the writer's commit order, not trade_id: ids are taken when a strategy
+# decides and fills commit later, so a lower id can land after a higher one.
+#
+# Clearing the tables bumps tiering.generation(). The poller notices, sends a
+# "reset" event and then the new generation's rows from the start, so
+# clients drop what they have and rebuild from the events that follow.
+class ChangeFeed:
+    def __init__(self, db: ConnectionManager | None = None, poll_interval: float = 1.0, capacity: int = 1000):
+        self.db = db if db is not None else get_reader()
+        self.poll_interval = poll_interval
+
+        self.buffer: deque[tuple[int, str, str, object]] = deque(maxlen=capacity)
+        self.seq = 0
+        self.last_seq: int | None = None
+        self.last_ts: datetime | None = None
+        self.generation = 0
+        self.subscribers = 0
+
+        self._cond: asyncio.Condition | None = None
+        self._ready: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+
+    # ---- Poller ----
+
+    def _high_water(self, con: duckdb.DuckDBPyConnection) -> tuple[int | None, datetime | None]:
+        # Read to the end: a half-read result keeps its transaction open, and
+        # until it closes DuckDB refuses keys the writer deleted (e.g. in a reset)
+        return con.execute(
+            "SELECT (SELECT max(seq) FROM trades), (SELECT max(timestamp) FROM portfolio_history)"
+        ).fetchall()[0]
+
+    def _poll(self, con: duckdb.DuckDBPyConnection) -> tuple[list[dict], list[dict], int | None]:
+        # Returns the new generation as `reset` when the tables were cleared
+        # since the last poll; the rows are then that generation's from the start
+        current = generation(con)
+        reset = current if current != self.generation else None
+        last_seq, last_ts = (None, None) if reset is not None else (self.last_seq, self.last_ts)
+
+        trades = _rows(con.execute(
+            "SELECT * FROM trades WHERE seq > coalesce(?, -1) ORDER BY seq",
+            [last_seq],
+        ))
+        portfolio = _rows(con.execute(
+            "SELECT * FROM portfolio_history WHERE timestamp > coalesce(?, TIMESTAMP '0001-01-01') ORDER BY timestamp",
+            [last_ts],
+        ))
+        return trades, portfolio, reset
+
+    def _publish(self, event: str, payload: str, cursor=None) -> None:
+        self.seq += 1
+        self.buffer.append((self.seq, event, payload, cursor))
+
+    async def _run(self) -> None:
+        self.generation = await self.db.run(generation)
+        self.last_seq, self.last_ts = await self.db.run(self._high_water)
+        self._ready.set()
+
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            if self.subscribers == 0:
+                continue
+
+            try:
+                trades, portfolio, reset = await self.db.run(self._poll)
+            except Exception as e:
+                print(f"ChangeFeed poll failed: {e}")
+                continue
+
+            if reset is not None:
+                self.generation, self.last_seq, self.last_ts = reset, None, None
+                self._publish("reset", "{}")
+            if trades:
+                self.last_seq = trades[-1]["seq"]
+                self._publish("trades", _encode(trades), self.last_seq)
+            if portfolio:
+                self.last_ts = portfolio[-1]["timestamp"]
+                self._publish("portfolio", _encode(portfolio), self.last_ts)
+
+            if reset is not None or trades or portfolio:
+                async with self._cond:
+                    self._cond.notify_all()
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._cond = asyncio.Condition()
+            self._ready = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+        await self._ready.wait()
+
+    # ---- Clients ----
+
+    def _catch_up(self, con: duckdb.DuckDBPyConnection, after_seq, since, upto_seq, upto_ts) -> tuple[list[dict], list[dict]]:
+        trades = _rows(con.execute(
+            """
+            SELECT * FROM trades
+            WHERE seq > coalesce(?, -1) AND seq <= coalesce(?, -1)
+            ORDER BY seq
+            """,
+            [after_seq, upto_seq],
+        ))
+        portfolio = _rows(con.execute(
+            """
+            SELECT * FROM portfolio_history
+            WHERE timestamp > coalesce(?, TIMESTAMP '0001-01-01') AND timestamp <= coalesce(?, TIMESTAMP '0001-01-01')
+            ORDER BY timestamp
+            """,
+            [since, upto_ts],
+        ))
+        return trades, portfolio
+
+    async def subscribe(self, after_seq: int | None = None, since: datetime | None = None) -> AsyncIterator[tuple[int, str, str]]:
+        await self.start()
+        self.subscribers += 1
+        try:
+            next_seq = None
+            while True:
+                oldest = self.buffer[0][0] if self.buffer else self.seq + 1
+
+                if next_seq is None or next_seq < oldest:
+                    # Snapshot (first pass) or resync after falling off the buffer,
+                    # bounded by the marks that match buffer position `self.seq`
+                    seq, upto_seq, upto_ts = self.seq, self.last_seq, self.last_ts
+                    trades, portfolio = await self.db.run(self._catch_up, after_seq, since, upto_seq, upto_ts)
+                    if trades:
+                        yield seq, "trades", _encode(trades)
+                    if portfolio:
+                        yield seq, "portfolio", _encode(portfolio)
+                    if upto_seq is not None:
+                        after_seq = max(after_seq or upto_seq, upto_seq)
+                    if upto_ts is not None:
+                        since = max(since or upto_ts, upto_ts)
+                    next_seq = seq + 1
+                    continue
+
+                pending = [e for e in self.buffer if e[0] >= next_seq]
+                for seq, event, payload, cursor in pending:
+                    yield seq, event, payload
+                    next_seq = seq + 1
+                    if event == "trades":
+                        after_seq = cursor
+                    elif event == "portfolio":
+                        since = cursor
+                    elif event == "reset":
+                        # The rows that follow are the new generation's snapshot
+                        after_seq, since = None, None
+
+                async with self._cond:
+                    if self.seq < next_seq:
+                        await self._cond.wait()
+        finally:
+            self.subscribers -= 1
@@ -1,12 +1,75 @@
 import duckdb
 from pathlib import Path
 
-def initialize_duckdb() -> int:
-    DB_PATH = Path(__file__).resolve().parents[1] / "algory.duckdb"
+from .rollups import create_rollups
+from .tiering import GENERATION_DDL, create_views
+
+TRADE_COLUMNS = ["trade_id", "timestamp", "strategy", "symbol", "side", "quantity", "price"]
+
+def migrate_trades_key(con: duckdb.DuckDBPyConnection) -> int:
+    # Databases created before trades had a key may hold colliding
+    # microsecond ids: exact duplicate legs are dropped, every extra strategy
+    # sharing a trade_id gets a fresh id (legs of one trade stay together),
+    # and any leftover (trade_id, symbol) clash a fresh id per leg. Returns
+    # the number of legs re-keyed.
+    has_key = con.execute(
+        "SELECT count(*) FROM duckdb_constraints() WHERE table_name = 'trades' AND constraint_type = 'PRIMARY KEY'"
+    ).fetchone()[0]
+    if has_key:
+        return 0
+
+    con.begin()
+    try:
+        con.execute(f"""
+            DELETE FROM trades WHERE rowid NOT IN (
+                SELECT min(rowid) FROM trades GROUP BY {', '.join(TRADE_COLUMNS)}
+            )
+        """)
+        rekeyed = con.execute("""
+            UPDATE trades SET trade_id = r.new_id FROM (
+                SELECT trade_id, strategy, (SELECT max(trade_id) FROM trades) + row_number() OVER (ORDER BY trade_id, strategy) AS new_id
+                FROM (SELECT DISTINCT trade_id, strategy, dense_rank() OVER (PARTITION BY trade_id ORDER BY strategy) AS k FROM trades)
+                WHERE k > 1
+            ) r
+            WHERE trades.trade_id = r.trade_id AND trades.strategy = r.strategy
+        """).fetchone()[0]
+        rekeyed += con.execute("""
+            UPDATE trades SET trade_id = r.new_id FROM (
+                SELECT rid, (SELECT max(trade_id) FROM trades) + row_number() OVER (ORDER BY rid) AS new_id
+                FROM (SELECT rowid AS rid, row_number() OVER (PARTITION BY trade_id, symbol ORDER BY rowid) AS k FROM trades)
+                WHERE k > 1
+            ) r
+            WHERE trades.rowid = r.rid
+        """).fetchone()[0]
+        con.commit()
+    except Exception:
+        con.rollback()
+        raise
+
+    # DuckDB builds the index only after the updates are committed; the
+    # cleanup above is a no-op if this has to run again
+    con.execute("ALTER TABLE trades ADD PRIMARY KEY (trade_id, symbol)")
+    return rekeyed
+
+def migrate_trades_seq(con: duckdb.DuckDBPyConnection) -> None:
+    # seq numbers legs in insert order, which with the single TradeWriter is
+    # commit order; the change feed tails it because trade ids (timestamps
+    # taken when a strategy decides) commit out of order once fills arrive
+    # asynchronously. Older databases get it numbered in rowid order.
+    con.execute("CREATE SEQUENCE IF NOT EXISTS trades_seq")
+    has_seq = con.execute(
+        "SELECT count(*) FROM duckdb_columns() WHERE table_name = 'trades' AND column_name = 'seq'"
+    ).fetchone()[0]
+    if not has_seq:
+        con.execute("ALTER TABLE trades ADD COLUMN seq BIGINT DEFAULT nextval('trades_seq')")
+
+def initialize_duckdb(db_path: str | Path | None = None) -> int:
+    DB_PATH = Path(db_path) if db_path is not None else Path(__file__).resolve().parents[1] / "algory.duckdb"
     DB_PATH.parent.mkdir(parents=True, exist_ok=True)
 
     con = duckdb.connect(str(DB_PATH))
 
+    con.execute("CREATE SEQUENCE IF NOT EXISTS trades_seq")
     con.execute("""
     CREATE TABLE IF NOT EXISTS trades (
         trade_id BIGINT,
@@ -15,9 +78,13 @@ def initialize_duckdb() -> int:
         symbol TEXT,
         side TEXT,            
         quantity DOUBLE,
-        price DOUBLE
+        price DOUBLE,
+        seq BIGINT DEFAULT nextval('trades_seq'),
+        PRIMARY KEY (trade_id, symbol)
     );
     """)
+    migrate_trades_key(con)
+    migrate_trades_seq(con)
 
     con.execute("""
     CREATE TABLE IF NOT EXISTS portfolio_history (
@@ -39,10 +106,28 @@ def initialize_duckdb() -> int:
     );
     """)
 
+    con.execute("""
+    CREATE TABLE IF NOT EXISTS positions (
+        strategy TEXT,
+        symbol TEXT,
+        quantity DOUBLE,
+        PRIMARY KEY (strategy, symbol)
+    );
+    """)
+
     con.execute("CREATE INDEX IF NOT EXISTS idx_trades_ts ON trades (timestamp);")
     con.execute("CREATE INDEX IF NOT EXISTS idx_strategy_ts ON strategy_history (timestamp);")
     con.execute("CREATE INDEX IF NOT EXISTS idx_portfolio_ts ON portfolio_history (timestamp);")
 
+    # Reset counter read by caches over these tables
+    con.execute(GENERATION_DDL)
+
+    # 1m/1h/1d chart rollups, maintained by the writers
+    create_rollups(con)
+
+    # <table>_all views over the hot tables and the Parquet archive
+    create_views(con, DB_PATH)
+
     con.close()
     print(f"DuckDB initialized successfully at '{DB_PATH}'")
     return 100
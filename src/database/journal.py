@@ -0,0 +1,291 @@
+import duckdb
+import mmap
+import numpy as np
+import os
+import struct
+import threading
+import zlib
+from pathlib import Path
+from typing import List
+
+from algorithms.base import Trade, TradeBatch
+from . import rollups
+from .ledger import get_ledger
+from .tiering import source_table
+
+# Write-ahead journal for trades. Every leg is one fixed 128-byte record in a
+# memory-mapped, preallocated segment file, so appending is a memcpy and
+# durability is one msync shared by everything written since the last one
+# (group commit on a background thread). An append call is an "entry":
+# its records carry (index, count) and are only replayed when the whole
+# entry made it to disk, so a crash can never leave half a trade behind.
+RECORD = np.dtype([
+    ("seq", "<u8"),          # 1-based, contiguous across segments; 0 = unused slot
+    ("trade_id", "<i8"),
+    ("timestamp", "<i8"),    # microseconds, as TradeBatch.timestamp
+    ("qty", "<f8"),
+    ("price", "<f8"),
+    ("index", "<u4"),        # position of this leg within its entry
+    ("count", "<u4"),        # legs in the entry
+    ("crc", "<u4"),          # crc32 of the record with this field zeroed
+    ("pad", "<u4"),
+    ("strategy", "S40"),
+    ("symbol", "S24"),
+    ("reserved", "V8"),
+])
+assert RECORD.itemsize == 128
+
+MAGIC = b"ALGJRNL1"
+HEADER = struct.Struct("<8sIIQQ")  # magic, version, record size, capacity, first seq
+HEADER_SIZE = mmap.PAGESIZE        # records start page-aligned
+SEGMENT_RECORDS = 1 << 17          # 16 MiB of records per segment
+DEFAULT_JOURNAL_DIR = Path(__file__).resolve().parents[1] / "algory.journal"
+
+
+def _crc(records: np.ndarray) -> np.ndarray:
+    scratch = records.copy()
+    scratch["crc"] = 0
+    rows = scratch.view(np.uint8).reshape(len(scratch), RECORD.itemsize)
+    return np.fromiter((zlib.crc32(row) for row in rows), dtype=np.uint32, count=len(rows))
+
+
+def _encode(values: List[str], width: int, what: str) -> np.ndarray:
+    encoded = [v.encode("utf-8") for v in values]
+    too_long = [v for v, e in zip(values, encoded) if len(e) > width]
+    if too_long:
+        raise ValueError(f"{what} names longer than {width} bytes cannot be journaled: {too_long}")
+    return np.array(encoded, dtype=f"S{width}")
+
+
+class _Segment:
+    def __init__(self, path: Path, capacity: int | None = None, first_seq: int | None = None):
+        self.path = path
+        create = capacity is not None
+        self.file = open(path, "w+b" if create else "r+b")
+        if create:
+            self.file.truncate(HEADER_SIZE + capacity * RECORD.itemsize)
+            self.file.write(HEADER.pack(MAGIC, 1, RECORD.itemsize, capacity, first_seq))
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+        self.map = mmap.mmap(self.file.fileno(), 0)
+        magic, version, size, self.capacity, self.first_seq = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or size != RECORD.itemsize:
+            raise ValueError(f"{path} is not a trade journal segment")
+        self.records = np.ndarray((self.capacity,), dtype=RECORD, buffer=self.map, offset=HEADER_SIZE)
+        self.used = 0 if create else self._recover()
+
+    def _recover(self) -> int:
+        # Longest prefix of contiguous, checksummed records, cut back to the
+        # last complete entry; anything after it is zeroed
+        expected = self.first_seq + np.arange(self.capacity, dtype=np.uint64)
+        ok = self.records["seq"] == expected
+        n = int(np.argmin(ok)) if not ok.all() else self.capacity
+        if n:
+            bad = np.nonzero(_crc(self.records[:n]) != self.records["crc"][:n])[0]
+            if len(bad):
+                n = int(bad[0])
+        if n:
+            last = self.records[n - 1]
+            if last["index"] + 1 != last["count"]:
+                n -= int(last["index"]) + 1
+        self.records[n:] = np.zeros(1, dtype=RECORD)
+        return n
+
+    @property
+    def last_seq(self) -> int:
+        return self.first_seq + self.used - 1
+
+    def close(self) -> None:
+        del self.records
+        self.map.close()
+        self.file.close()
+
+
+class Journal:
+    def __init__(self, path: str | Path = DEFAULT_JOURNAL_DIR, segment_records: int = SEGMENT_RECORDS, sync: bool = True):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.segment_records = segment_records
+
+        self._lock = threading.Lock()
+        self._synced_cond = threading.Condition()
+        self._stop = False
+
+        paths = sorted(self.path.glob("*.wal"))
+        self.segments: List[_Segment] = [_Segment(p) for p in paths]
+        if not self.segments:
+            start = self.checkpoint_seq() + 1
+            self.segments.append(_Segment(self._segment_path(start), segment_records, start))
+        self.written = self.segments[-1].last_seq
+        self.synced = self.written
+
+        self._flusher = None
+        if sync:
+            self._flusher = threading.Thread(target=self._run, name="journal-sync", daemon=True)
+            self._flusher.start()
+
+    def _segment_path(self, first_seq: int) -> Path:
+        return self.path / f"{first_seq:020d}.wal"
+
+    # ---- Writing ----
+
+    def append(self, trade: Trade) -> int:
+        return self.append_batch(TradeBatch.from_trades([trade]))
+
+    def append_batch(self, batch: TradeBatch) -> int:
+        # Returns the entry's last sequence number; wait() on it for durability
+        n = len(batch)
+        if not n:
+            return self.written
+        if n > self.segment_records:
+            raise ValueError(f"An entry of {n} legs does not fit in a {self.segment_records}-record segment")
+
+        records = np.zeros(n, dtype=RECORD)
+        records["trade_id"] = batch.trade_id
+        records["timestamp"] = batch.timestamp.view(np.int64)
+        records["qty"] = batch.qty
+        records["price"] = batch.price
+        records["index"] = np.arange(n)
+        records["count"] = n
+        records["strategy"] = _encode(batch.strategies, 40, "Strategy")[batch.strategy_code]
+        records["symbol"] = _encode(batch.symbols, 24, "Symbol")[batch.symbol_code]
+
+        with self._lock:
+            segment = self.segments[-1]
+            if segment.used + n > segment.capacity:
+                segment = _Segment(self._segment_path(self.written + 1), self.segment_records, self.written + 1)
+                self.segments.append(segment)
+            records["seq"] = self.written + 1 + np.arange(n, dtype=np.uint64)
+            records["crc"] = _crc(records)
+            segment.records[segment.used:segment.used + n] = records
+            segment.used += n
+            self.written += n
+            seq = self.written
+
+        with self._synced_cond:
+            self._synced_cond.notify_all()
+        return seq
+
+    def _run(self) -> None:
+        while True:
+            with self._synced_cond:
+                self._synced_cond.wait_for(lambda: self._stop or self.written > self.synced)
+                if self._stop and self.written <= self.synced:
+                    return
+            self.sync()
+
+    def sync(self) -> int:
+        # msync every segment written since the last sync; one call covers
+        # all appends that landed meanwhile
+        with self._lock:
+            target = self.written
+            dirty = [s for s in self.segments if s.last_seq > self.synced]
+        for segment in dirty:
+            segment.map.flush()
+        with self._synced_cond:
+            self.synced = max(self.synced, target)
+            self._synced_cond.notify_all()
+        return target
+
+    def wait(self, seq: int, timeout: float | None = None) -> bool:
+        if self._flusher is None:
+            return self.sync() >= seq
+        with self._synced_cond:
+            return self._synced_cond.wait_for(lambda: self.synced >= seq, timeout)
+
+    # ---- Checkpoints and replay ----
+
+    def checkpoint_seq(self) -> int:
+        try:
+            return int((self.path / "CHECKPOINT").read_text().strip())
+        except FileNotFoundError:
+            return 0
+
+    def checkpoint(self, seq: int) -> None:
+        # Everything up to seq is in DuckDB: remember that and drop segments
+        # that hold nothing newer (the active one always stays)
+        if seq <= self.checkpoint_seq():
+            return
+        tmp = self.path / "CHECKPOINT.tmp"
+        tmp.write_text(str(seq))
+        os.replace(tmp, self.path / "CHECKPOINT")
+
+        with self._lock:
+            done = [s for s in self.segments[:-1] if s.last_seq <= seq]
+            self.segments = [s for s in self.segments if s not in done]
+        for segment in done:
+            segment.close()
+            segment.path.unlink(missing_ok=True)
+
+    def pending(self) -> TradeBatch:
+        # Journaled legs after the checkpoint, as one batch
+        after = self.checkpoint_seq()
+        with self._lock:
+            parts = [s.records[:s.used] for s in self.segments]
+            parts = [p[p["seq"] > after].copy() for p in parts]
+        records = np.concatenate(parts) if parts else np.zeros(0, dtype=RECORD)
+        if not len(records):
+            return TradeBatch.empty()
+
+        strategies, strategy_code = np.unique(records["strategy"], return_inverse=True)
+        symbols, symbol_code = np.unique(records["symbol"], return_inverse=True)
+        return TradeBatch(
+            records["trade_id"], records["timestamp"].view("datetime64[us]"),
+            strategy_code, [s.decode("utf-8") for s in strategies],
+            symbol_code, [s.decode("utf-8") for s in symbols],
+            records["qty"], records["price"],
+        )
+
+    def replay(self, con: duckdb.DuckDBPyConnection, db_path: str = "algory.duckdb") -> int:
+        # Loads journaled legs DuckDB does not have yet, keyed on
+        # (trade_id, symbol), so replaying twice (or after a flush that did
+        # commit) changes nothing; a key journaled twice loads once. Returns
+        # the number of legs inserted.
+        with self._lock:
+            last = self.written
+        batch = self.pending()
+        if not len(batch):
+            return 0
+
+        con.register("_journal_keys", batch.to_arrow().select(["trade_id", "symbol"]))
+        present = con.execute(
+            f"""
+            SELECT j.trade_id, j.symbol::VARCHAR FROM _journal_keys j
+            SEMI JOIN {source_table(con, "trades")} t ON t.trade_id = j.trade_id AND t.symbol = j.symbol::VARCHAR
+            """
+        ).fetchall()
+        con.unregister("_journal_keys")
+
+        present = set(present)
+        symbols = batch.symbols
+        new = np.fromiter(
+            ((int(t), symbols[s]) not in present for t, s in zip(batch.trade_id, batch.symbol_code)),
+            dtype=bool, count=len(batch),
+        )
+        batch = batch.take(new & ~batch.repeated_keys())
+
+        ledger = get_ledger(db_path)
+        con.begin()
+        try:
+            batch.insert(con)
+            deltas = ledger.apply_batch(batch, con)
+            rollups.add_trades(con, batch)
+            con.commit()
+        except Exception:
+            con.rollback()
+            raise
+        ledger.apply_deltas(deltas)
+        self.checkpoint(last)
+        return len(batch)
+
+    def close(self) -> None:
+        if self._flusher is not None:
+            with self._synced_cond:
+                self._stop = True
+                self._synced_cond.notify_all()
+            self._flusher.join()
+        self.sync()
+        for segment in self.segments:
+            segment.close()
+        self.segments = []
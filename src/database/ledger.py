@@ -0,0 +1,145 @@
+import duckdb
+import pandas as pd
+from typing import Dict, Iterable, List, Tuple
+
+from algorithms.base import Trade, TradeBatch
+from .tiering import source_table
+
+# Net quantity per (strategy, symbol). The DuckDB table is the persistent copy,
+# the dicts on PositionLedger are the in-memory mirror used for snapshots.
+# Writers upsert the table inside their own transaction with apply_batch()
+# and hand the returned deltas to apply_deltas() only after it commits, so a
+# rolled-back (and retried) write never reaches the mirror.
+POSITIONS_DDL = """
+CREATE TABLE IF NOT EXISTS positions (
+    strategy TEXT,
+    symbol TEXT,
+    quantity DOUBLE,
+    PRIMARY KEY (strategy, symbol)
+);
+"""
+
+
+class PositionLedger:
+    def __init__(self, db_path: str = "algory.duckdb"):
+        self.db_path = db_path
+        self.positions: Dict[Tuple[str, str], float] = {}
+        self.by_symbol: Dict[str, float] = {}
+        self.by_strategy: Dict[str, Dict[str, float]] = {}
+
+    def _reset_mirror(self) -> None:
+        self.positions = {}
+        self.by_symbol = {}
+        self.by_strategy = {}
+
+    def _add(self, strategy: str, symbol: str, qty: float) -> None:
+        key = (strategy, symbol)
+        self.positions[key] = self.positions.get(key, 0.0) + qty
+        self.by_symbol[symbol] = self.by_symbol.get(symbol, 0.0) + qty
+        strat = self.by_strategy.setdefault(strategy, {})
+        strat[symbol] = strat.get(symbol, 0.0) + qty
+
+    def load(self, con: duckdb.DuckDBPyConnection | None = None) -> "PositionLedger":
+        own = con is None
+        if own:
+            con = duckdb.connect(self.db_path)
+
+        con.execute(POSITIONS_DDL)
+        rows = con.execute("SELECT strategy, symbol, quantity FROM positions").fetchall()
+
+        # An empty ledger next to a non-empty trades table means the DB predates
+        # the ledger (or was restored from trades only), so derive it once.
+        if not rows and con.execute("SELECT COUNT(*) FROM trades").fetchone()[0] > 0:
+            self.rebuild(con)
+        else:
+            self._reset_mirror()
+            for strategy, symbol, qty in rows:
+                self._add(strategy, symbol, float(qty))
+
+        if own:
+            con.close()
+        return self
+
+    def rebuild(self, con: duckdb.DuckDBPyConnection | None = None) -> "PositionLedger":
+        own = con is None
+        if own:
+            con = duckdb.connect(self.db_path)
+
+        con.execute(POSITIONS_DDL)
+        con.execute("DELETE FROM positions")
+        # Archived trades still count toward positions
+        con.execute(
+            f"""
+            INSERT INTO positions (strategy, symbol, quantity)
+            SELECT strategy, symbol, SUM(quantity)
+            FROM {source_table(con, "trades")}
+            GROUP BY strategy, symbol;
+            """
+        )
+
+        self._reset_mirror()
+        for strategy, symbol, qty in con.execute("SELECT strategy, symbol, quantity FROM positions").fetchall():
+            self._add(strategy, symbol, float(qty))
+
+        if own:
+            con.close()
+        return self
+
+    def apply(self, trade: Trade, con: duckdb.DuckDBPyConnection) -> List[tuple]:
+        return self.apply_many([trade], con)
+
+    def apply_many(self, trades: Iterable[Trade], con: duckdb.DuckDBPyConnection) -> List[tuple]:
+        return self.apply_batch(TradeBatch.from_trades(list(trades)), con)
+
+    def apply_batch(self, batch: TradeBatch, con: duckdb.DuckDBPyConnection) -> List[tuple]:
+        # Aggregate legs first: one upsert row per (strategy, symbol) in the batch.
+        # Only the table changes here; returns the deltas for apply_deltas()
+        deltas = batch.position_deltas()
+        if not deltas:
+            return deltas
+
+        df = pd.DataFrame(deltas, columns=["strategy", "symbol", "quantity"])
+        con.register("_position_deltas", df)
+        con.execute(
+            """
+            INSERT INTO positions (strategy, symbol, quantity)
+            SELECT strategy, symbol, quantity FROM _position_deltas
+            ON CONFLICT (strategy, symbol) DO UPDATE SET quantity = quantity + excluded.quantity;
+            """
+        )
+        con.unregister("_position_deltas")
+        return deltas
+
+    def apply_deltas(self, deltas: Iterable[tuple]) -> None:
+        # Mirror side of apply_batch(), once its transaction has committed
+        for strategy, sym, qty in deltas:
+            self._add(strategy, sym, qty)
+
+    def clear(self, con: duckdb.DuckDBPyConnection | None = None) -> None:
+        own = con is None
+        if own:
+            con = duckdb.connect(self.db_path)
+
+        con.execute(POSITIONS_DDL)
+        con.execute("DELETE FROM positions")
+        self._reset_mirror()
+
+        if own:
+            con.close()
+
+    def symbol_positions(self) -> Dict[str, float]:
+        return self.by_symbol
+
+    def strategy_positions(self) -> Dict[str, Dict[str, float]]:
+        return self.by_strategy
+
+
+_LEDGERS: Dict[str, PositionLedger] = {}
+
+
+def get_ledger(db_path: str = "algory.duckdb") -> PositionLedger:
+    ledger = _LEDGERS.get(db_path)
+    if ledger is None:
+        ledger = PositionLedger(db_path).load()
+        _LEDGERS[db_path] = ledger
+    return ledger
@@ -0,0 +1,121 @@
+import json
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+
+# Prices as one contiguous float64 (time x symbol) matrix plus a sorted
+# datetime64 index and a symbol -> column map. Missing prices are NaN.
+# Stores persist either as a wide Parquet file (timestamp + one column per
+# symbol) or as a directory of .npy files that load memory-mapped, so a large
+# history is paged in on demand instead of read up front.
+class PriceStore:
+    def __init__(self, symbols: Sequence[str], timestamps: np.ndarray, prices: np.ndarray):
+        self.symbols = list(symbols)
+        self.timestamps = np.asarray(timestamps, dtype="datetime64[us]")
+        self.prices = prices if isinstance(prices, np.memmap) else np.ascontiguousarray(prices, dtype=np.float64)
+        self.column: Dict[str, int] = {sym: i for i, sym in enumerate(self.symbols)}
+
+        if self.prices.shape != (len(self.timestamps), len(self.symbols)):
+            raise ValueError(f"prices must be (time, symbol) = {(len(self.timestamps), len(self.symbols))}, got {self.prices.shape}")
+        if len(self.timestamps) > 1 and np.any(self.timestamps[1:] < self.timestamps[:-1]):
+            raise ValueError("timestamps must be sorted")
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    # ---- Generation ----
+
+    @classmethod
+    def random_walk(
+        cls,
+        symbols: Sequence[str],
+        steps: int,
+        end: datetime | None = None,
+        step: np.timedelta64 = np.timedelta64(1, "h"),
+        start_range: tuple[float, float] = (50.0, 400.0),
+        drift: float = 0.0001,
+        vol: float = 0.01,
+        seed: int | None = None,
+    ) -> "PriceStore":
+        rng = np.random.default_rng(seed)
+        end = np.datetime64(end or datetime.now(), "us")
+
+        # Bars end one step before `end`, like the old build_price_map
+        timestamps = end - np.arange(steps, 0, -1) * step.astype("timedelta64[us]")
+        start = rng.uniform(*start_range, size=len(symbols))
+        prices = np.cumprod(1.0 + rng.normal(drift, vol, size=(steps, len(symbols))), axis=0)
+        prices *= start
+        return cls(symbols, timestamps, prices)
+
+    # ---- Lookups ----
+
+    def index_asof(self, ts: datetime | np.datetime64) -> int:
+        # Last bar at or before `ts`, -1 if `ts` predates the store
+        return int(np.searchsorted(self.timestamps, np.datetime64(ts, "us"), side="right")) - 1
+
+    def row(self, ts: datetime | np.datetime64) -> np.ndarray:
+        i = self.index_asof(ts)
+        if i < 0:
+            raise KeyError(f"No prices at or before {ts}")
+        return self.prices[i]
+
+    def price(self, symbol: str, ts: datetime | np.datetime64) -> float:
+        return float(self.row(ts)[self.column[symbol]])
+
+    def prices_at(self, ts: datetime | np.datetime64, symbols: Sequence[str] | None = None) -> Dict[str, float]:
+        # Dict form for the snapshot writers in append.py
+        row = self.row(ts)
+        if symbols is None:
+            return {sym: float(p) for sym, p in zip(self.symbols, row) if p == p}
+        return {sym: float(row[self.column[sym]]) for sym in symbols if sym in self.column}
+
+    def columns(self, symbols: Sequence[str]) -> np.ndarray:
+        return np.array([self.column[sym] for sym in symbols], dtype=np.intp)
+
+    def between(self, start: datetime | np.datetime64 | None = None, end: datetime | np.datetime64 | None = None) -> "PriceStore":
+        # [start, end) as views, no copy
+        lo = 0 if start is None else int(np.searchsorted(self.timestamps, np.datetime64(start, "us"), side="left"))
+        hi = len(self) if end is None else int(np.searchsorted(self.timestamps, np.datetime64(end, "us"), side="left"))
+        return PriceStore(self.symbols, self.timestamps[lo:hi], self.prices[lo:hi])
+
+    def select(self, symbols: Sequence[str]) -> "PriceStore":
+        return PriceStore(symbols, self.timestamps, self.prices[:, self.columns(symbols)])
+
+    # ---- Persistence ----
+
+    def save(self, path: str | Path) -> Path:
+        path = Path(path)
+        if path.suffix == ".parquet":
+            table = pa.table(
+                [pa.array(self.timestamps)] + [pa.array(self.prices[:, i]) for i in range(len(self.symbols))],
+                names=["timestamp"] + self.symbols,
+            )
+            pq.write_table(table, path)
+            return path
+
+        path.mkdir(parents=True, exist_ok=True)
+        np.save(path / "prices.npy", self.prices)
+        np.save(path / "timestamps.npy", self.timestamps.astype(np.int64))
+        (path / "symbols.json").write_text(json.dumps(self.symbols))
+        return path
+
+    @classmethod
+    def load(cls, path: str | Path, mmap: bool = True, symbols: Sequence[str] | None = None) -> "PriceStore":
+        path = Path(path)
+        if path.suffix == ".parquet":
+            table = pq.read_table(path, columns=None if symbols is None else ["timestamp"] + list(symbols))
+            names = [n for n in table.column_names if n != "timestamp"]
+            prices = np.column_stack([table.column(n).to_numpy().astype(np.float64) for n in names]) if names else np.empty((table.num_rows, 0))
+            timestamps = table.column("timestamp").cast(pa.timestamp("us")).to_numpy()
+            return cls(names, timestamps, prices)
+
+        store = cls(
+            json.loads((path / "symbols.json").read_text()),
+            np.load(path / "timestamps.npy").astype("datetime64[us]"),
+            np.load(path / "prices.npy", mmap_mode="r" if mmap else None),
+        )
+        return store if symbols is None else store.select(symbols)
@@ -0,0 +1,188 @@
+import duckdb
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from datetime import datetime
+
+from .downsample import lttb
+from .init_duckdb import TRADE_COLUMNS
+from .rollups import PORTFOLIO, rollup_range
+from .tiering import source_table
+
+PORTFOLIO_COLUMNS = ["timestamp", "total_value", "total_cash", "total_positions"]
+MAX_LIMIT = 10_000
+
+
+def parse_columns(columns: str | None, allowed: list[str], required: list[str] = ()) -> list[str]:
+    if not columns:
+        return list(allowed)
+
+    selected = [c.strip() for c in columns.split(",") if c.strip()]
+    unknown = [c for c in selected if c not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown columns {unknown}; choose from {allowed}")
+
+    # Cursor columns are always returned so the client can ask for the next page
+    return [c for c in required if c not in selected] + selected
+
+
+def _in_list(column: str, values: list[str] | None, where: list[str], params: list) -> None:
+    if values:
+        where.append(f"{column} IN ({', '.join('?' * len(values))})")
+        params.extend(values)
+
+
+def _date_range(since: datetime | None, until: datetime | None, where: list[str], params: list) -> None:
+    # Redundant with the timestamp bounds, but lets the Parquet tier skip
+    # whole date= partitions
+    if since is not None:
+        where.append("date >= CAST(? AS DATE)")
+        params.append(since)
+    if until is not None:
+        where.append("date <= CAST(? AS DATE)")
+        params.append(until)
+
+
+def trades_page(
+    con: duckdb.DuckDBPyConnection,
+    before_trade_id: int | None = None,
+    before_symbol: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    strategy: list[str] | None = None,
+    symbol: list[str] | None = None,
+    columns: str | None = None,
+    limit: int = 1000,
+) -> pa.Table:
+    cols = parse_columns(columns, TRADE_COLUMNS, required=["trade_id", "symbol"])
+
+    # Newest first. Legs of one trade share a trade_id, so the cursor is the
+    # last (trade_id, symbol) seen and the next page starts below it
+    where, params = [], []
+    if before_trade_id is not None and before_symbol is not None:
+        where.append("(trade_id < ? OR (trade_id = ? AND symbol < ?))")
+        params.extend([before_trade_id, before_trade_id, before_symbol])
+    elif before_trade_id is not None:
+        where.append("trade_id < ?")
+        params.append(before_trade_id)
+    if since is not None:
+        where.append("timestamp >= ?")
+        params.append(since)
+    if until is not None:
+        where.append("timestamp < ?")
+        params.append(until)
+    source = source_table(con, "trades")
+    if source != "trades":
+        _date_range(since, until, where, params)
+    _in_list("strategy", strategy, where, params)
+    _in_list("symbol", symbol, where, params)
+
+    # Keyset pagination: the cost of a page does not depend on how deep it is
+    sql = f"""
+        SELECT {', '.join(cols)} FROM {source}
+        {'WHERE ' + ' AND '.join(where) if where else ''}
+        ORDER BY trade_id DESC, symbol DESC
+        LIMIT ?
+    """
+    params.append(max(1, min(limit, MAX_LIMIT)))
+    return con.execute(sql, params).fetch_arrow_table()
+
+
+def portfolio_range(
+    con: duckdb.DuckDBPyConnection,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    columns: str | None = None,
+    points: int | None = None,
+    method: str = "lttb",
+    limit: int = MAX_LIMIT,
+) -> pa.Table:
+    cols = parse_columns(columns, PORTFOLIO_COLUMNS, required=["timestamp"])
+    history = source_table(con, "portfolio_history")
+
+    if points is None:
+        where, params = [], []
+        if since is not None:
+            where.append("timestamp > ?")
+            params.append(since)
+        if until is not None:
+            where.append("timestamp <= ?")
+            params.append(until)
+        if history != "portfolio_history":
+            _date_range(since, until, where, params)
+        sql = f"""
+            SELECT {', '.join(cols)} FROM {history}
+            {'WHERE ' + ' AND '.join(where) if where else ''}
+            ORDER BY timestamp LIMIT ?
+        """
+        return con.execute(sql, params + [max(1, min(limit, MAX_LIMIT))]).fetch_arrow_table()
+
+    points = max(1, min(points, MAX_LIMIT))
+    if method not in ("lttb", "ohlc"):
+        raise ValueError(f"Unknown downsampling method {method!r}; choose 'lttb' or 'ohlc'")
+
+    # Charts read the 1m/1h/1d equity rollup at the finest resolution that
+    # fits `points`, so the cost follows the number of buckets, not the range.
+    # A bucket's close is the portfolio row at its last_ts; the other columns
+    # are looked up by those timestamps rather than scanned.
+    buckets = rollup_range(con, "equity", PORTFOLIO, since, until, points=points)
+    if buckets.num_rows > points:
+        # Ranges longer than `points` days at the coarsest resolution
+        x = buckets.column("last_ts").cast(pa.int64()).to_numpy()
+        y = buckets.column("close").to_numpy()
+        buckets = buckets.take(pa.array(lttb(x, y, points)))
+
+    rest = [c for c in cols if c not in ("timestamp", "total_value")]
+    if method == "ohlc":
+        # total_value becomes OHLC, other columns keep their last value
+        select = ["b.timestamp", "b.open", "b.high", "b.low", "b.close"]
+    else:
+        select = ["b.last_ts AS timestamp"] + (["b.close AS total_value"] if "total_value" in cols else [])
+    select += [f"h.{c}" for c in rest]
+
+    where, params = ["timestamp IN (SELECT last_ts FROM _buckets)"], []
+    if history != "portfolio_history" and buckets.num_rows:
+        closes = buckets.column("last_ts")
+        _date_range(pc.min(closes).as_py(), pc.max(closes).as_py(), where, params)
+
+    con.register("_buckets", buckets)
+    try:
+        return con.execute(
+            f"""
+            SELECT {', '.join(select)}
+            FROM _buckets b
+            LEFT JOIN (
+                SELECT DISTINCT ON (timestamp) timestamp {''.join(f', {c}' for c in rest)}
+                FROM {history}
+                WHERE {' AND '.join(where)}
+            ) h ON h.timestamp = b.last_ts
+            ORDER BY b.timestamp
+            """,
+            params,
+        ).fetch_arrow_table()
+    finally:
+        con.unregister("_buckets")
+
+
+def to_ipc(table: pa.Table) -> bytes:
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def to_json(table: pa.Table) -> str:
+    # DuckDB scans the Arrow buffers and renders JSON natively; timestamps use
+    # ISO-8601 so browsers parse them consistently. list() is ordered by an
+    # explicit row index, as parallel scans do not keep the input order
+    fields = []
+    for f in table.schema:
+        value = f'"{f.name}"'
+        if pa.types.is_timestamp(f.type):
+            value = f"strftime({value}, '%Y-%m-%dT%H:%M:%S.%f')"
+        fields.append(f"'{f.name}': {value}")
+    con = duckdb.connect()
+    con.register("_page", table.append_column("_row", pa.array(np.arange(table.num_rows))))
+    out = con.execute(f"SELECT to_json(list({{{', '.join(fields)}}} ORDER BY _row)) FROM _page").fetchone()[0]
+    con.close()
+    return out if out is not None else "[]"
@@ -0,0 +1,214 @@
+import duckdb
+import pandas as pd
+import pyarrow as pa
+from datetime import datetime, timedelta
+from typing import Iterable, Tuple
+
+from algorithms.base import TradeBatch
+from .tiering import source_table
+
+# Pre-aggregated history for charts, kept at 1m/1h/1d. Each writer folds its
+# new rows in with one upsert per call, so a bucket is always current and a
+# multi-month chart reads a few hundred rows instead of the raw history. The
+# tables are created once by initialize_duckdb, not in the write path.
+#   equity_rollup  OHLC of equity per strategy (PORTFOLIO = whole book)
+#   trade_rollup   trades and legs per strategy
+#   volume_rollup  shares and notional traded per symbol
+RESOLUTIONS = {"1m": timedelta(minutes=1), "1h": timedelta(hours=1), "1d": timedelta(days=1)}
+PORTFOLIO = "__portfolio__"
+DEFAULT_POINTS = 1000
+
+ROLLUP_DDL = """
+CREATE TABLE IF NOT EXISTS equity_rollup (
+    resolution TEXT,
+    bucket TIMESTAMP,
+    strategy TEXT,
+    open DOUBLE,
+    high DOUBLE,
+    low DOUBLE,
+    close DOUBLE,
+    first_ts TIMESTAMP,
+    last_ts TIMESTAMP,
+    samples BIGINT,
+    PRIMARY KEY (resolution, strategy, bucket)
+);
+CREATE TABLE IF NOT EXISTS trade_rollup (
+    resolution TEXT,
+    bucket TIMESTAMP,
+    strategy TEXT,
+    trades BIGINT,
+    legs BIGINT,
+    PRIMARY KEY (resolution, strategy, bucket)
+);
+CREATE TABLE IF NOT EXISTS volume_rollup (
+    resolution TEXT,
+    bucket TIMESTAMP,
+    symbol TEXT,
+    volume DOUBLE,
+    notional DOUBLE,
+    PRIMARY KEY (resolution, symbol, bucket)
+);
+"""
+
+# Every resolution from one scan of the new rows
+_BUCKETS = "(VALUES " + ", ".join(f"('{name}', INTERVAL '{int(width.total_seconds())} seconds')" for name, width in RESOLUTIONS.items()) + ") r(resolution, width)"
+
+# (table, key column, series column(s) -> SQL for the chart); equity also
+# returns last_ts, the time of the row its close came from
+ROLLUPS = {
+    "equity": ("equity_rollup", "strategy", ["open", "high", "low", "close", "last_ts"]),
+    "trades": ("trade_rollup", "strategy", ["trades", "legs"]),
+    "volume": ("volume_rollup", "symbol", ["volume", "notional"]),
+}
+
+
+def create_rollups(con: duckdb.DuckDBPyConnection) -> None:
+    con.execute(ROLLUP_DDL)
+
+
+def _upsert_equity(con: duckdb.DuckDBPyConnection, source: str) -> None:
+    # source has (timestamp, strategy, value). Merging is order-independent:
+    # open/close come from whichever side saw the earlier/later timestamp
+    con.execute(
+        f"""
+        INSERT INTO equity_rollup
+        SELECT resolution, time_bucket(width, timestamp) AS bucket, strategy,
+               arg_min(value, timestamp), max(value), min(value), arg_max(value, timestamp),
+               min(timestamp), max(timestamp), count(*)
+        FROM {source}, {_BUCKETS}
+        GROUP BY resolution, bucket, strategy
+        ON CONFLICT (resolution, strategy, bucket) DO UPDATE SET
+            open = CASE WHEN excluded.first_ts < equity_rollup.first_ts THEN excluded.open ELSE equity_rollup.open END,
+            close = CASE WHEN excluded.last_ts >= equity_rollup.last_ts THEN excluded.close ELSE equity_rollup.close END,
+            high = greatest(equity_rollup.high, excluded.high),
+            low = least(equity_rollup.low, excluded.low),
+            first_ts = least(equity_rollup.first_ts, excluded.first_ts),
+            last_ts = greatest(equity_rollup.last_ts, excluded.last_ts),
+            samples = equity_rollup.samples + excluded.samples;
+        """
+    )
+
+
+def _upsert_trades(con: duckdb.DuckDBPyConnection, source: str) -> None:
+    # source has trade legs (trade_id, timestamp, strategy, symbol, quantity,
+    # price); legs of one trade always arrive together, so distinct trade_ids
+    # per batch add up
+    con.execute(
+        f"""
+        INSERT INTO trade_rollup
+        SELECT resolution, time_bucket(width, timestamp) AS bucket, strategy, count(DISTINCT trade_id), count(*)
+        FROM {source}, {_BUCKETS}
+        GROUP BY resolution, bucket, strategy
+        ON CONFLICT (resolution, strategy, bucket) DO UPDATE SET
+            trades = trade_rollup.trades + excluded.trades,
+            legs = trade_rollup.legs + excluded.legs;
+        """
+    )
+    con.execute(
+        f"""
+        INSERT INTO volume_rollup
+        SELECT resolution, time_bucket(width, timestamp) AS bucket, symbol, sum(abs(quantity)), sum(abs(quantity * price))
+        FROM {source}, {_BUCKETS}
+        GROUP BY resolution, bucket, symbol
+        ON CONFLICT (resolution, symbol, bucket) DO UPDATE SET
+            volume = volume_rollup.volume + excluded.volume,
+            notional = volume_rollup.notional + excluded.notional;
+        """
+    )
+
+
+def add_equity(con: duckdb.DuckDBPyConnection, rows: Iterable[Tuple[datetime, str, float]]) -> None:
+    df = pd.DataFrame(list(rows), columns=["timestamp", "strategy", "value"])
+    if df.empty:
+        return
+    con.register("_equity_rows", df)
+    try:
+        _upsert_equity(con, "_equity_rows")
+    finally:
+        con.unregister("_equity_rows")
+
+
+def add_trades(con: duckdb.DuckDBPyConnection, batch: TradeBatch) -> None:
+    if not len(batch):
+        return
+    con.register("_trade_rows", batch.to_arrow())
+    try:
+        _upsert_trades(con, "_trade_rows")
+    finally:
+        con.unregister("_trade_rows")
+
+
+def rebuild(con: duckdb.DuckDBPyConnection) -> None:
+    # Recompute everything from the full (hot + archived) history, e.g. after
+    # a bulk load that bypassed the incremental path
+    create_rollups(con)
+    for table in ("equity_rollup", "trade_rollup", "volume_rollup"):
+        con.execute(f"DELETE FROM {table}")
+
+    con.execute(
+        f"""
+        CREATE OR REPLACE TEMP VIEW _equity_rows AS
+        SELECT timestamp, '{PORTFOLIO}' AS strategy, total_value AS value FROM {source_table(con, "portfolio_history")}
+        UNION ALL
+        SELECT timestamp, strategy, strategy_value AS value FROM {source_table(con, "strategy_history")}
+        """
+    )
+    _upsert_equity(con, "_equity_rows")
+    _upsert_trades(con, source_table(con, "trades"))
+    con.execute("DROP VIEW _equity_rows")
+
+
+def pick_resolution(since: datetime, until: datetime, points: int = DEFAULT_POINTS) -> str:
+    # Finest resolution that still fits the range in `points` buckets
+    span = until - since
+    for name, width in RESOLUTIONS.items():
+        if span / width <= points:
+            return name
+    return list(RESOLUTIONS)[-1]
+
+
+def rollup_range(
+    con: duckdb.DuckDBPyConnection,
+    kind: str = "equity",
+    key: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    resolution: str | None = None,
+    points: int = DEFAULT_POINTS,
+) -> pa.Table:
+    if kind not in ROLLUPS:
+        raise ValueError(f"Unknown rollup {kind!r}; choose from {list(ROLLUPS)}")
+    if resolution is not None and resolution not in RESOLUTIONS:
+        raise ValueError(f"Unknown resolution {resolution!r}; choose from {list(RESOLUTIONS)}")
+    table, key_col, series = ROLLUPS[kind]
+    if key is None and kind == "equity":
+        key = PORTFOLIO
+
+    where, params = [], []
+    if key is not None:
+        where.append(f"{key_col} = ?")
+        params.append(key)
+
+    if resolution is None:
+        # Open-ended ranges take their ends from the coarsest rollup
+        lo, hi = con.execute(
+            f"SELECT min(bucket), max(bucket) FROM {table} WHERE resolution = '1d'" + "".join(f" AND {w}" for w in where),
+            params,
+        ).fetchone()
+        if lo is None:
+            resolution = list(RESOLUTIONS)[0]
+        else:
+            resolution = pick_resolution(since or lo, until or hi + RESOLUTIONS["1d"], points)
+
+    where.append("resolution = ?")
+    params.append(resolution)
+    if since is not None:
+        where.append("bucket >= time_bucket(?::INTERVAL, ?::TIMESTAMP)")
+        params.extend([RESOLUTIONS[resolution], since])
+    if until is not None:
+        where.append("bucket <= ?")
+        params.append(until)
+
+    cols = ["bucket AS timestamp"] + ([] if key is not None else [key_col]) + series
+    sql = f"SELECT {', '.join(cols)} FROM {table} WHERE {' AND '.join(where)} ORDER BY bucket"
+    return con.execute(sql, params).fetch_arrow_table()
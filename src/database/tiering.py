@@ -0,0 +1,138 @@
+import duckdb
+import shutil
+import time
+from datetime import datetime, time as dtime, timedelta
+from pathlib import Path
+
+from .connection import DEFAULT_DB_PATH
+
+# Hot/cold tiering for the append-only tables. Closed days move out of the
+# DuckDB file into Hive-partitioned Parquet (<table>/date=.../strategy=.../),
+# so the file only holds the recent window that inserts and live queries
+# touch. <table>_all views union both tiers and carry a `date` column; a
+# filter on date (and strategy) prunes archive files by path.
+TIERED_TABLES = {
+    "trades": ("strategy",),
+    "portfolio_history": (),
+    "strategy_history": ("strategy",),
+}
+HOT_DAYS = 7
+HIVE_TYPES = {"date": "DATE", "strategy": "VARCHAR"}
+
+
+def archive_dir(db_path: str | Path = DEFAULT_DB_PATH) -> Path:
+    db_path = Path(db_path)
+    return db_path.with_name(db_path.stem + ".archive")
+
+
+def unified(table: str) -> str:
+    return f"{table}_all"
+
+
+def source_table(con: duckdb.DuckDBPyConnection, table: str) -> str:
+    # The unified view when this database has one, else the hot table alone
+    exists = con.execute(
+        "SELECT count(*) FROM information_schema.tables WHERE table_schema = 'main' AND table_name = ?", [unified(table)]
+    ).fetchone()[0]
+    return unified(table) if exists else table
+
+
+def _columns(con: duckdb.DuckDBPyConnection, table: str) -> list[str]:
+    return [d[0] for d in con.execute(f"SELECT * FROM {table} LIMIT 0").description]
+
+
+def create_views(con: duckdb.DuckDBPyConnection, db_path: str | Path = DEFAULT_DB_PATH) -> None:
+    # Re-run whenever the archive gains its first files: read_parquet() on a
+    # glob with no matches is an error, so the cold half is only added once
+    # there is something to read. Files written before a column was added
+    # read it as NULL
+    root = archive_dir(db_path).resolve()
+    for table, parts in TIERED_TABLES.items():
+        cols = ", ".join(_columns(con, table))
+        sql = f"SELECT {cols}, CAST(timestamp AS DATE) AS date FROM {table}"
+        if any((root / table).rglob("*.parquet")):
+            types = ", ".join(f"'{c}': {HIVE_TYPES[c]}" for c in ("date",) + parts)
+            sql += f"""
+                UNION ALL
+                SELECT {cols}, date FROM read_parquet(
+                    '{root / table}/**/*.parquet', hive_partitioning = true, hive_types = {{{types}}}, union_by_name = true
+                )
+            """
+        con.execute(f"CREATE OR REPLACE VIEW {unified(table)} AS {sql}")
+
+
+def archive(con: duckdb.DuckDBPyConnection, db_path: str | Path = DEFAULT_DB_PATH, hot_days: int = HOT_DAYS,
+            now: datetime | None = None) -> dict[str, int]:
+    # Moves every row older than `hot_days` whole days to Parquet and deletes
+    # it from the hot table in the same transaction. Files are tagged with the
+    # run, so a failed commit removes exactly what this run wrote.
+    cutoff = datetime.combine((now or datetime.now()).date() - timedelta(days=hot_days), dtime())
+    root = archive_dir(db_path).resolve()
+    run = time.time_ns()
+    moved: dict[str, int] = {}
+
+    con.begin()
+    try:
+        for table, parts in TIERED_TABLES.items():
+            n = con.execute(f"SELECT count(*) FROM {table} WHERE timestamp < ?", [cutoff]).fetchone()[0]
+            if not n:
+                continue
+            (root / table).mkdir(parents=True, exist_ok=True)
+            con.execute(
+                f"""
+                COPY (SELECT *, CAST(timestamp AS DATE) AS date FROM {table} WHERE timestamp < ?)
+                TO '{root / table}'
+                (FORMAT PARQUET, PARTITION_BY ({', '.join(('date',) + parts)}), FILENAME_PATTERN '{run}_{{uuid}}', APPEND)
+                """,
+                [cutoff],
+            )
+            con.execute(f"DELETE FROM {table} WHERE timestamp < ?", [cutoff])
+            moved[table] = n
+        con.commit()
+    except Exception:
+        con.rollback()
+        for path in root.rglob(f"{run}_*.parquet"):
+            path.unlink(missing_ok=True)
+        raise
+
+    if moved:
+        create_views(con, db_path)
+        con.execute("CHECKPOINT")
+    return moved
+
+
+# Bumped by every reset(), so readers that cache state derived from the
+# tables (metrics, cursors) can tell a cleared-and-refilled table from one
+# that only grew
+GENERATION_DDL = "CREATE TABLE IF NOT EXISTS table_generation (generation BIGINT)"
+
+
+def generation(con: duckdb.DuckDBPyConnection) -> int:
+    exists = con.execute(
+        "SELECT count(*) FROM information_schema.tables WHERE table_schema = 'main' AND table_name = 'table_generation'"
+    ).fetchone()[0]
+    if not exists:
+        return 0
+    return con.execute("SELECT coalesce(max(generation), 0) FROM table_generation").fetchone()[0]
+
+
+def reset(con: duckdb.DuckDBPyConnection, db_path: str | Path = DEFAULT_DB_PATH) -> None:
+    # Empties every table in one transaction, bumps the generation and drops
+    # the archive
+    con.execute(GENERATION_DDL)
+    current = generation(con)
+    tables = con.execute(
+        "SELECT table_name FROM information_schema.tables WHERE table_schema = 'main' AND table_type = 'BASE TABLE'"
+    ).fetchall()
+    con.begin()
+    try:
+        for (name,) in tables:
+            con.execute(f"TRUNCATE {name}")
+        con.execute("INSERT INTO table_generation VALUES (?)", [current + 1])
+        con.commit()
+    except Exception:
+        con.rollback()
+        raise
+
+    shutil.rmtree(archive_dir(db_path), ignore_errors=True)
+    create_views(con, db_path)
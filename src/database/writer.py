@@ -0,0 +1,247 @@
+import threading
+import time
+import duckdb
+import numpy as np
+from pathlib import Path
+from typing import List
+
+from algorithms.base import Trade, TradeBatch
+from .connection import publish_snapshot
+from .journal import Journal
+from .ledger import get_ledger
+from .rollups import add_trades
+
+# Legs that can never be written (their (trade_id, symbol) is already stored)
+# are parked here with the error instead of blocking the queue
+DEAD_LETTER_DDL = """
+CREATE TABLE IF NOT EXISTS trades_dead_letter (
+    trade_id BIGINT,
+    timestamp TIMESTAMP,
+    strategy TEXT,
+    symbol TEXT,
+    side TEXT,
+    quantity DOUBLE,
+    price DOUBLE,
+    error TEXT,
+    failed_at TIMESTAMP
+);
+"""
+
+
+# Long-lived, single-connection writer for the trades table.
+# Trades queued by submit() (or whole TradeBatch blocks via submit_batch())
+# are written in one transaction per batch, either when `batch_size` legs
+# are pending or when the oldest has waited `max_delay` seconds
+# (max_delay=None disables the background flusher).
+# A trade is durable once the flush() that wrote it returns; close() flushes
+# whatever is still queued. A failed flush puts its batch back in front of the
+# queue, except for legs that break the trades key: those go to
+# trades_dead_letter and the rest of the batch is written.
+# With a journal, every submit is appended to it first (and, if `durable`,
+# waits for its group fsync), so a trade is durable when submit() returns and
+# Journal.replay() restores anything a crash kept out of DuckDB. Each
+# committed flush checkpoints the journal.
+# publish_snapshot() copies the whole database for readers, so it is skipped
+# when nothing was committed through the writer since the last copy; report()
+# keeps the copy's cost.
+class TradeWriter:
+    def __init__(self, db_path: str = "algory.duckdb", batch_size: int = 500, max_delay: float | None = 1.0,
+                 journal: Journal | None = None, durable: bool = True):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.journal = journal
+        self.durable = durable
+
+        self.ledger = get_ledger(db_path)
+        self.con = duckdb.connect(db_path)
+
+        self._pending: List[Trade | TradeBatch] = []
+        self._pending_rows = 0
+        self._pending_seq = 0  # journal seq of the newest queued item
+        self._oldest: float | None = None
+        self._queue_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._publish_lock = threading.Lock()
+        self._stop = threading.Event()
+
+        self._changes = 0  # commits through this writer, under _write_lock
+        self._published = -1
+        self.stats = {"published": 0, "skipped": 0, "copy_last": 0.0, "copy_max": 0.0, "bytes": 0}
+
+        self._thread = None
+        if max_delay is not None:
+            self._thread = threading.Thread(target=self._run, name="trade-writer", daemon=True)
+            self._thread.start()
+
+    def submit(self, trade: Trade) -> None:
+        self._enqueue(trade, 1)
+
+    def submit_batch(self, batch: TradeBatch) -> None:
+        # A whole tick's legs as one block; counts as len(batch) toward batch_size
+        if len(batch):
+            self._enqueue(batch, len(batch))
+
+    def _enqueue(self, item: Trade | TradeBatch, rows: int) -> None:
+        seq = None
+        with self._queue_lock:
+            if self.journal is not None:
+                seq = self.journal.append(item) if isinstance(item, Trade) else self.journal.append_batch(item)
+                self._pending_seq = seq
+            self._pending.append(item)
+            self._pending_rows += rows
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            full = self._pending_rows >= self.batch_size
+
+        if seq is not None and self.durable:
+            self.journal.wait(seq)
+        if full:
+            self.flush()
+
+    def flush(self) -> int:
+        with self._write_lock:
+            with self._queue_lock:
+                pending, self._pending = self._pending, []
+                rows, self._pending_rows = self._pending_rows, 0
+                seq = self._pending_seq
+                self._oldest = None
+
+            if not pending:
+                return 0
+
+            trades = [item for item in pending if isinstance(item, Trade)]
+            batch = TradeBatch.concat(
+                [TradeBatch.from_trades(trades)] + [item for item in pending if isinstance(item, TradeBatch)]
+            )
+
+            try:
+                try:
+                    self._write(batch)
+                except duckdb.ConstraintException as e:
+                    # Retrying cannot fix a duplicate key: park those legs
+                    # and write everything else
+                    dead = self._conflicts(batch)
+                    if not dead.any():
+                        raise
+                    print(f"TradeWriter: moved {int(dead.sum())} conflicting trade legs to trades_dead_letter: {e}")
+                    dead, batch = batch.take(dead), batch.take(~dead)
+                    self._write(batch, dead, str(e))
+            except Exception:
+                # Put the batch back in front so nothing is dropped on a failed commit
+                with self._queue_lock:
+                    self._pending = pending + self._pending
+                    self._pending_rows += rows
+                    self._oldest = time.monotonic()
+                raise
+
+            if self.journal is not None:
+                self.journal.checkpoint(seq)
+            return len(batch)
+
+    def _write(self, batch: TradeBatch, dead: TradeBatch | None = None, error: str | None = None) -> None:
+        try:
+            self.con.begin()
+            batch.insert(self.con)
+            deltas = self.ledger.apply_batch(batch, self.con)
+            add_trades(self.con, batch)
+            if dead is not None and len(dead):
+                self.con.execute(DEAD_LETTER_DDL)
+                self.con.register("_dead_letter", dead.to_arrow())
+                self.con.execute(
+                    """
+                    INSERT INTO trades_dead_letter
+                    SELECT trade_id, timestamp, strategy::VARCHAR, symbol::VARCHAR,
+                           CASE WHEN quantity > 0 THEN 'BUY' ELSE 'SELL' END, quantity, price, ?, now()
+                    FROM _dead_letter
+                    """,
+                    [error],
+                )
+                self.con.unregister("_dead_letter")
+            self.con.commit()
+        except Exception:
+            self.con.rollback()
+            raise
+        self._changes += 1
+        self.ledger.apply_deltas(deltas)
+
+    def _conflicts(self, batch: TradeBatch) -> np.ndarray:
+        # Legs repeating a (trade_id, symbol) earlier in the batch or already in trades
+        self.con.register("_batch_keys", batch.to_arrow().select(["trade_id", "symbol"]))
+        stored = set(self.con.execute(
+            "SELECT k.trade_id, k.symbol::VARCHAR FROM _batch_keys k SEMI JOIN trades t ON t.trade_id = k.trade_id AND t.symbol = k.symbol::VARCHAR"
+        ).fetchall())
+        self.con.unregister("_batch_keys")
+        symbols = batch.symbols
+        in_table = np.fromiter(
+            ((int(t), symbols[s]) in stored for t, s in zip(batch.trade_id, batch.symbol_code)),
+            dtype=bool, count=len(batch),
+        )
+        return in_table | batch.repeated_keys()
+
+    def publish_snapshot(self, force: bool = False, wait: bool = True) -> Path | None:
+        # Flush, then hand readers in other processes a consistent copy.
+        # `force` for writes that went around the writer (e.g. bookkeeping);
+        # wait=False returns at once if another copy is still running
+        if not self._publish_lock.acquire(blocking=wait):
+            with self._write_lock:
+                self.stats["skipped"] += 1
+            return None
+        try:
+            return self._publish(force)
+        finally:
+            self._publish_lock.release()
+
+    def _publish(self, force: bool) -> Path | None:
+        self.flush()
+        with self._write_lock:
+            if not force and self._changes == self._published:
+                self.stats["skipped"] += 1
+                return None
+            start = time.perf_counter()
+            path = publish_snapshot(self.con, self.db_path)
+            elapsed = time.perf_counter() - start
+            self._published = self._changes
+            self.stats["published"] += 1
+            self.stats["copy_last"] = elapsed
+            self.stats["copy_max"] = max(self.stats["copy_max"], elapsed)
+            self.stats["bytes"] = path.stat().st_size
+            return path
+
+    def run(self, fn):
+        # fn(con) on the writer's connection, between flushes (e.g. archiving)
+        self.flush()
+        with self._write_lock:
+            self._changes += 1
+            return fn(self.con)
+
+    def report(self) -> dict:
+        with self._write_lock:
+            return dict(self.stats)
+
+    def pending(self) -> int:
+        with self._queue_lock:
+            return self._pending_rows
+
+    def _run(self) -> None:
+        interval = max(self.max_delay / 4, 0.001)
+        while not self._stop.wait(interval):
+            oldest = self._oldest
+            if oldest is not None and time.monotonic() - oldest >= self.max_delay:
+                try:
+                    self.flush()
+                except Exception as e:
+                    print(f"TradeWriter flush failed: {e}")
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+        self.con.close()
+
+    def __enter__(self) -> "TradeWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
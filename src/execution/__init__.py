@@ -0,0 +1,2 @@
+from .gateway import Gateway, OrderHandle, Order, Fill
+from .brokers import SimulatedBroker, AlpacaBroker
@@ -0,0 +1,174 @@
+import asyncio
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+from .gateway import CANCELED, FILLED, PARTIAL, REJECTED, Fill, Order
+
+# A broker exposes three coroutines, all awaited on the gateway's loop:
+#   start(on_fill)  connect, and remember where to report fills
+#   submit(orders)  send a batch; returns once the broker has accepted it
+#   close()         disconnect
+# and reports every fill, rejection or cancel as a Fill through on_fill.
+
+
+# In-process stand-in for a real venue: every batch costs one round trip of
+# `latency` (+/- jitter) seconds, orders then fill after another delay at the
+# reference price moved against the order by up to `slippage_bps`, some in
+# several partial fills, and a `reject_prob` share are rejected outright.
+class SimulatedBroker:
+    def __init__(
+        self,
+        latency: float = 0.005,
+        jitter: float = 0.002,
+        slippage_bps: float = 2.0,
+        partial_prob: float = 0.2,
+        max_parts: int = 3,
+        reject_prob: float = 0.0,
+        seed: int | None = None,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.slippage_bps = slippage_bps
+        self.partial_prob = partial_prob
+        self.max_parts = max_parts
+        self.reject_prob = reject_prob
+
+        self._rng = random.Random(seed)
+        self._on_fill: Callable[[Fill], None] | None = None
+        self._tasks: set = set()
+
+    def _delay(self) -> float:
+        return max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+
+    async def start(self, on_fill: Callable[[Fill], None]) -> None:
+        self._on_fill = on_fill
+
+    async def submit(self, orders: List[Order]) -> None:
+        await asyncio.sleep(self._delay())
+        for order in orders:
+            task = asyncio.ensure_future(self._fill(order))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _fill(self, order: Order) -> None:
+        await asyncio.sleep(self._delay())
+        if self._rng.random() < self.reject_prob or not order.price > 0:
+            self._on_fill(Fill(order.client_id, 0.0, float("nan"), REJECTED))
+            return
+
+        parts = self._rng.randint(2, self.max_parts) if self.max_parts > 1 and self._rng.random() < self.partial_prob else 1
+        weights = [self._rng.random() + 0.1 for _ in range(parts)]
+        total = sum(weights)
+        remaining = order.qty
+        sign = 1.0 if order.qty > 0 else -1.0
+
+        for n, w in enumerate(weights):
+            last = n == parts - 1
+            qty = remaining if last else order.qty * w / total
+            remaining -= qty
+            price = order.price * (1.0 + sign * self._rng.uniform(0.0, self.slippage_bps) * 1e-4)
+            self._on_fill(Fill(order.client_id, qty, price, FILLED if last else PARTIAL))
+            if not last:
+                await asyncio.sleep(self._delay())
+
+    async def close(self) -> None:
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+# Alpaca over one pooled HTTP session: a batch's orders are POSTed
+# concurrently on a small thread pool sharing keep-alive connections, and
+# fills come back on Alpaca's trade_updates stream. Credentials come from
+# the standard APCA_* environment variables, never from the source.
+class AlpacaBroker:
+    EVENTS = {"fill": FILLED, "partial_fill": PARTIAL, "rejected": REJECTED, "canceled": CANCELED, "expired": CANCELED}
+
+    def __init__(self, key_id: str | None = None, secret_key: str | None = None, base_url: str | None = None,
+                 pool_size: int = 16, time_in_force: str = "day"):
+        self.key_id = key_id or os.environ.get("APCA_API_KEY_ID")
+        self.secret_key = secret_key or os.environ.get("APCA_API_SECRET_KEY")
+        self.base_url = (base_url or os.environ.get("APCA_API_BASE_URL", "https://paper-api.alpaca.markets")).rstrip("/")
+        self.pool_size = pool_size
+        self.time_in_force = time_in_force
+
+        self._session = None
+        self._pool: ThreadPoolExecutor | None = None
+        self._stream = None
+        self._filled: dict = {}
+        self._on_fill: Callable[[Fill], None] | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    async def start(self, on_fill: Callable[[Fill], None]) -> None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        from alpaca_trade_api.stream import Stream
+
+        if not self.key_id or not self.secret_key:
+            raise RuntimeError("Set APCA_API_KEY_ID and APCA_API_SECRET_KEY to trade through Alpaca")
+
+        self._on_fill = on_fill
+        self._loop = asyncio.get_running_loop()
+
+        self._session = requests.Session()
+        self._session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size))
+        self._session.headers.update({"APCA-API-KEY-ID": self.key_id, "APCA-API-SECRET-KEY": self.secret_key})
+        self._pool = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="alpaca")
+
+        # The stream runs its own event loop; updates are handed back to ours
+        self._stream = Stream(self.key_id, self.secret_key, base_url=self.base_url)
+        self._stream.subscribe_trade_updates(self._on_update)
+        self._loop.run_in_executor(self._pool, self._stream.run)
+
+    def _post(self, order: Order) -> None:
+        response = self._session.post(
+            f"{self.base_url}/v2/orders",
+            json={
+                "symbol": order.symbol,
+                "qty": str(abs(order.qty)),
+                "side": order.side,
+                "type": "market",
+                "time_in_force": self.time_in_force,
+                "client_order_id": order.client_id,
+            },
+            timeout=10,
+        )
+        response.raise_for_status()
+
+    async def _submit_one(self, order: Order) -> None:
+        try:
+            await self._loop.run_in_executor(self._pool, self._post, order)
+        except Exception as e:
+            print(f"Alpaca rejected {order.client_id}: {e!r}")
+            self._on_fill(Fill(order.client_id, 0.0, float("nan"), REJECTED))
+
+    async def submit(self, orders: List[Order]) -> None:
+        await asyncio.gather(*(self._submit_one(order) for order in orders))
+
+    async def _on_update(self, update) -> None:
+        status = self.EVENTS.get(getattr(update, "event", None))
+        if status is None:
+            return
+        order = update.order
+        client_id = order["client_order_id"]
+
+        # Alpaca reports cumulative filled qty; pass on the increment, signed
+        qty, price = 0.0, float("nan")
+        if status in (PARTIAL, FILLED):
+            sign = 1.0 if order["side"] == "buy" else -1.0
+            cumulative = float(order["filled_qty"])
+            qty = sign * (cumulative - self._filled.get(client_id, 0.0))
+            price = float(getattr(update, "price", None) or order["filled_avg_price"])
+            self._filled[client_id] = cumulative
+        if status != PARTIAL:
+            self._filled.pop(client_id, None)
+        self._loop.call_soon_threadsafe(self._on_fill, Fill(client_id, qty, price, status))
+
+    async def close(self) -> None:
+        if self._stream is not None:
+            self._stream.stop()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+        if self._session is not None:
+            self._session.close()
@@ -0,0 +1,284 @@
+import asyncio
+import itertools
+import math
+import threading
+import time
+from typing import Callable, Dict, List
+
+from algorithms.base import Trade
+
+# Order lifecycle as reported by brokers through Fill.status
+PARTIAL = "partial"
+FILLED = "filled"
+REJECTED = "rejected"
+CANCELED = "canceled"
+FINAL = (FILLED, REJECTED, CANCELED)
+
+
+class Order:
+    # One leg of a Trade as sent to the broker
+    __slots__ = ("client_id", "strategy_id", "trade_id", "symbol", "qty", "price", "submitted", "filled_qty", "fill_notional", "status")
+
+    def __init__(self, client_id: str, strategy_id: str, trade_id: int, symbol: str, qty: float, price: float):
+        self.client_id = client_id
+        self.strategy_id = strategy_id
+        self.trade_id = trade_id
+        self.symbol = symbol
+        self.qty = qty                # signed
+        self.price = price            # reference price from the strategy
+        self.submitted = time.perf_counter()
+        self.filled_qty = 0.0         # signed
+        self.fill_notional = 0.0
+        self.status = "pending"
+
+    @property
+    def side(self) -> str:
+        return "buy" if self.qty > 0 else "sell"
+
+    @property
+    def avg_price(self) -> float:
+        return self.fill_notional / self.filled_qty if self.filled_qty else float("nan")
+
+
+class Fill:
+    # qty is this fill's signed increment, not the cumulative quantity
+    __slots__ = ("client_id", "qty", "price", "status", "timestamp")
+
+    def __init__(self, client_id: str, qty: float, price: float, status: str, timestamp: float | None = None):
+        self.client_id = client_id
+        self.qty = qty
+        self.price = price
+        self.status = status
+        self.timestamp = time.time() if timestamp is None else timestamp
+
+
+# What execute() hands back: the Trade's orders plus their fills as they
+# arrive. done/wait() flip once every leg reached a final status; callbacks
+# run on the gateway's loop thread, so they should only hand work off.
+class OrderHandle:
+    def __init__(self, trade: Trade, orders: List[Order]):
+        self.trade = trade
+        self.orders = orders
+        self.completed: float | None = None
+        self._open = len(orders)
+        self._event = threading.Event()
+        self._callbacks: List[Callable[["OrderHandle"], object]] = []
+        self._lock = threading.Lock()
+        if not orders:
+            self._finish()
+
+    @property
+    def done(self) -> bool:
+        return self._event.is_set()
+
+    @property
+    def status(self) -> str:
+        statuses = {o.status for o in self.orders}
+        if not self.done:
+            return PARTIAL if any(o.filled_qty for o in self.orders) else "pending"
+        if statuses <= {FILLED}:
+            return FILLED
+        return PARTIAL if any(o.filled_qty for o in self.orders) else REJECTED
+
+    @property
+    def latency(self) -> float | None:
+        if self.completed is None or not self.orders:
+            return None
+        return self.completed - min(o.submitted for o in self.orders)
+
+    def wait(self, timeout: float | None = None) -> bool:
+        return self._event.wait(timeout)
+
+    def add_callback(self, fn: Callable[["OrderHandle"], object]) -> None:
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(fn)
+                return
+        fn(self)
+
+    def filled_trade(self) -> Trade | None:
+        # The legs that actually traded, at their average fill prices
+        legs = [o for o in self.orders if o.filled_qty]
+        if not legs:
+            return None
+        return Trade(
+            self.trade.strategy_id,
+            self.trade.timestamp,
+            [o.filled_qty for o in legs],
+            [o.symbol for o in legs],
+            [o.avg_price for o in legs],
+            trade_id=self.trade.trade_id,
+        )
+
+    def _order_done(self) -> None:
+        self._open -= 1
+        if self._open == 0:
+            self._finish()
+
+    def _finish(self) -> None:
+        self.completed = time.perf_counter()
+        with self._lock:
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for fn in callbacks:
+            try:
+                fn(self)
+            except Exception as e:
+                print(f"Order callback failed for {self.trade.strategy_id!r}: {e!r}")
+
+
+# Non-blocking front end to a broker. submit() turns a Trade into one order
+# per leg and returns its OrderHandle straight away; an asyncio loop on a
+# background thread gathers queued orders into batches (up to `batch_size`,
+# or whatever arrived within `batch_window` seconds) and keeps up to
+# `max_in_flight` batches outstanding at once, so submissions pipeline
+# instead of waiting on each round trip. Brokers report fills through the
+# on_fill callback given to broker.start(), always on the loop thread.
+class Gateway:
+    def __init__(self, broker, batch_size: int = 100, batch_window: float = 0.002, max_in_flight: int = 8):
+        self.broker = broker
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.max_in_flight = max_in_flight
+
+        self.orders: Dict[str, Order] = {}
+        self.handles: Dict[str, OrderHandle] = {}
+        self.stats = {"trades": 0, "orders": 0, "batches": 0, "fills": 0, "rejected": 0, "latency_total": 0.0, "latency_max": 0.0, "completed": 0}
+
+        self._ids = itertools.count()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.Queue | None = None
+        self._thread: threading.Thread | None = None
+        self._ready = threading.Event()
+        self._tasks: set = set()
+
+    # ---- Lifecycle ----
+
+    def start(self) -> "Gateway":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="gateway", daemon=True)
+            self._thread.start()
+            self._ready.wait()
+        return self
+
+    def _run(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._queue = asyncio.Queue()
+        try:
+            self._loop.run_until_complete(self._main())
+        finally:
+            self._loop.close()
+
+    async def _main(self) -> None:
+        await self.broker.start(self._on_fill)
+        self._ready.set()
+        sem = asyncio.Semaphore(self.max_in_flight)
+
+        while True:
+            order = await self._queue.get()
+            if order is None:
+                break
+            batch = [order]
+            deadline = self._loop.time() + self.batch_window
+            stop = False
+            while len(batch) < self.batch_size:
+                try:
+                    order = self._queue.get_nowait() if self._loop.time() >= deadline else await asyncio.wait_for(self._queue.get(), deadline - self._loop.time())
+                except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                    break
+                if order is None:
+                    stop = True
+                    break
+                batch.append(order)
+
+            await sem.acquire()
+            task = asyncio.ensure_future(self._send(batch, sem))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            if stop:
+                break
+
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.broker.close()
+
+    async def _send(self, batch: List[Order], sem: asyncio.Semaphore) -> None:
+        try:
+            self.stats["batches"] += 1
+            await self.broker.submit(batch)
+        except Exception as e:
+            print(f"Order batch of {len(batch)} failed: {e!r}")
+            for order in batch:
+                if order.status not in FINAL:
+                    self._on_fill(Fill(order.client_id, 0.0, float("nan"), REJECTED))
+        finally:
+            sem.release()
+
+    def close(self, wait: bool = True, timeout: float | None = 5.0) -> None:
+        # Stops taking orders; with wait, lets in-flight orders finish first
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, None)
+        if wait:
+            self._thread.join(timeout)
+        self._thread = None
+
+    # ---- Orders ----
+
+    def submit(self, trade: Trade) -> OrderHandle:
+        # Called from any thread: only builds the orders and their handle.
+        # The order and handle maps and the stats belong to the loop thread,
+        # which registers the orders in _enqueue before any fill can arrive.
+        if self._thread is None:
+            raise RuntimeError("Gateway is not running; call start() first")
+        orders = []
+        for qty, symbol, price in zip(trade.qty, trade.symbol, trade.price):
+            if qty == 0 or not math.isfinite(qty):
+                continue
+            client_id = f"{trade.strategy_id}-{trade.trade_id}-{next(self._ids)}"
+            orders.append(Order(client_id, trade.strategy_id, trade.trade_id, symbol, float(qty), float(price)))
+
+        handle = OrderHandle(trade, orders)
+        self._loop.call_soon_threadsafe(self._enqueue, handle)
+        return handle
+
+    def _enqueue(self, handle: OrderHandle) -> None:
+        self.stats["trades"] += 1
+        self.stats["orders"] += len(handle.orders)
+        for order in handle.orders:
+            self.orders[order.client_id] = order
+            self.handles[order.client_id] = handle
+            self._queue.put_nowait(order)
+
+    def _on_fill(self, fill: Fill) -> None:
+        order = self.orders.get(fill.client_id)
+        if order is None or order.status in FINAL:
+            return
+
+        if fill.qty:
+            self.stats["fills"] += 1
+            order.filled_qty += fill.qty
+            order.fill_notional += fill.qty * fill.price
+        order.status = fill.status
+        if fill.status not in FINAL:
+            return
+
+        if fill.status == REJECTED:
+            self.stats["rejected"] += 1
+        del self.orders[fill.client_id]
+        handle = self.handles.pop(fill.client_id)
+        handle._order_done()
+        if handle.done:
+            self.stats["completed"] += 1
+            self.stats["latency_total"] += handle.latency
+            self.stats["latency_max"] = max(self.stats["latency_max"], handle.latency)
+
+    def open_orders(self) -> int:
+        return len(self.orders)
+
+    def report(self) -> dict:
+        stats = dict(self.stats)
+        stats["latency_mean"] = stats["latency_total"] / stats["completed"] if stats["completed"] else 0.0
+        stats["open"] = self.open_orders()
+        return stats
@@ -0,0 +1,145 @@
+import os
+import threading
+import time
+import duckdb
+import pandas as pd
+from datetime import date
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).resolve().parents[1] / "benchmarks"
+DEFAULT_TTL = 6 * 3600  # seconds between refresh attempts
+
+
+def _as_close_series(close: pd.Series) -> pd.Series:
+    close = close.dropna().astype(float)
+    index = pd.to_datetime(close.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    close.index = index.normalize()
+    close = close[~close.index.duplicated(keep="last")].sort_index()
+    close.index.name = "date"
+    close.name = "close"
+    return close
+
+
+# ---- Sources: fetch(symbol, start) -> daily closes indexed by date ----
+
+class YFinanceSource:
+    def fetch(self, symbol: str, start: date) -> pd.Series:
+        import yfinance as yf  # optional: not needed offline
+
+        df = yf.download(symbol, start=start.isoformat(), progress=False, auto_adjust=True)
+        close = df["Close"]
+        if isinstance(close, pd.DataFrame):
+            close = close.iloc[:, 0]
+        return _as_close_series(close)
+
+
+class StaticSource:
+    def __init__(self, close: pd.Series):
+        self.close = _as_close_series(close)
+
+    def fetch(self, symbol: str, start: date) -> pd.Series:
+        return self.close[self.close.index >= pd.Timestamp(start)]
+
+
+# ---- Store ----
+
+class BenchmarkStore:
+    def __init__(
+        self,
+        symbol: str = "SPY",
+        path: str | Path | None = None,
+        source=None,
+        ttl: float = DEFAULT_TTL,
+        offline: bool | None = None,
+        start: str = "2020-01-01",
+    ):
+        self.symbol = symbol
+        self.path = Path(path) if path is not None else BENCHMARK_DIR / f"{symbol}.parquet"
+        self.source = source if source is not None else YFinanceSource()
+        self.ttl = ttl
+        self.offline = offline if offline is not None else os.environ.get("ALGORY_OFFLINE", "0") == "1"
+        self.start = date.fromisoformat(start)
+
+        self._close: pd.Series | None = None
+        self._loaded_mtime: float | None = None
+        self._last_attempt = 0.0
+        self._lock = threading.Lock()
+
+    def _mtime(self) -> float | None:
+        try:
+            return self.path.stat().st_mtime
+        except FileNotFoundError:
+            return None
+
+    def _read(self) -> pd.Series:
+        mtime = self._mtime()
+        if mtime is None:
+            return _as_close_series(pd.Series(dtype=float))
+        if self._close is None or mtime != self._loaded_mtime:
+            df = duckdb.execute("SELECT date, close FROM read_parquet(?) ORDER BY date", [str(self.path)]).df()
+            self._close = _as_close_series(df.set_index("date")["close"])
+            self._loaded_mtime = mtime
+        return self._close
+
+    def _write(self, close: pd.Series) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp.parquet")
+
+        df = close.rename("close").reset_index()
+        df["date"] = df["date"].dt.date
+        con = duckdb.connect()
+        con.register("_benchmark", df)
+        con.execute(f"COPY _benchmark TO '{tmp}' (FORMAT PARQUET)")
+        con.close()
+
+        os.replace(tmp, self.path)  # readers never see a half-written file
+        self._close = close
+        self._loaded_mtime = self._mtime()
+
+    def is_stale(self) -> bool:
+        # A failed refresh also counts as an attempt, so a down source is
+        # retried once per TTL rather than on every call
+        last = max(self._mtime() or 0.0, self._last_attempt)
+        return time.time() - last > self.ttl
+
+    def refresh(self) -> pd.Series:
+        self._last_attempt = time.time()
+        cached = self._read()
+
+        # Re-fetch from the last stored day so a partial (intraday) close gets corrected
+        start = cached.index[-1].date() if len(cached) else self.start
+        fresh = self.source.fetch(self.symbol, start)
+
+        merged = pd.concat([cached, fresh])
+        merged = _as_close_series(merged[~merged.index.duplicated(keep="last")])
+        self._write(merged)
+        return merged
+
+    def prices(self) -> pd.Series:
+        with self._lock:
+            if not self.offline and self.is_stale():
+                try:
+                    return self.refresh()
+                except Exception as e:
+                    print(f"Benchmark refresh for {self.symbol} failed, using cached data: {e}")
+            return self._read()
+
+    def returns(self) -> pd.Series:
+        return self.prices().pct_change().dropna()
+
+
+_STORES: dict[str, BenchmarkStore] = {}
+
+
+def get_store(symbol: str = "SPY") -> BenchmarkStore:
+    store = _STORES.get(symbol)
+    if store is None:
+        store = BenchmarkStore(symbol)
+        _STORES[symbol] = store
+    return store
+
+
+def set_store(store: BenchmarkStore) -> None:
+    _STORES[store.symbol] = store
@@ -0,0 +1,99 @@
+import threading
+import duckdb
+import numpy as np
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Hashable
+
+from database.tiering import generation
+from .benchmark import get_store
+from .running import RunningMetrics
+
+
+def _json_safe(results: dict[Hashable, dict[str, Any]]) -> dict[Hashable, dict[str, Any]]:
+    # NaN and inf are not valid JSON; report them as null
+    return {
+        key: {name: (None if isinstance(v, float) and not np.isfinite(v) else v) for name, v in metrics.items()}
+        for key, metrics in results.items()
+    }
+
+
+# Metrics for one history table, keyed on (table generation, latest
+# timestamp, row count). A request that finds the key unchanged returns the
+# cached result; otherwise only rows at or after the last seen timestamp are
+# read and folded into the running aggregates. A new generation (a reset)
+# or fewer rows starts over. Concurrent callers share one in-flight
+# computation.
+#
+# `db` is anything with a cursor() method (database.connection managers);
+# without one a connection to `db_path` is opened per refresh.
+class MetricsCache:
+    def __init__(self, table: str, value_col: str, group_col: str | None = None, db=None, db_path: str | Path | None = None, benchmark: str = "SPY"):
+        if db_path is None:
+            db_path = Path(__file__).resolve().parents[1] / "algory.duckdb"
+        self.table = table
+        self.value_col = value_col
+        self.group_col = group_col
+        self.db = db
+        self.db_path = str(db_path)
+        self.benchmark = benchmark
+
+        self.running = RunningMetrics()
+        self._key: tuple | None = None
+        self._last_ts = None
+        self._result: dict[Hashable, dict[str, Any]] = {}
+
+        self._lock = threading.Lock()
+        self._inflight: Future | None = None
+
+    def get(self) -> dict[Hashable, dict[str, Any]]:
+        with self._lock:
+            fut = self._inflight
+            leader = fut is None
+            if leader:
+                fut = self._inflight = Future()
+
+        if not leader:
+            return fut.result()
+
+        try:
+            result = self._refresh()
+            fut.set_result(result)
+            return result
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight = None
+
+    def _refresh(self) -> dict[Hashable, dict[str, Any]]:
+        cols = ["timestamp", self.value_col] + ([self.group_col] if self.group_col else [])
+
+        con = self.db.cursor() if self.db is not None else duckdb.connect(self.db_path)
+        try:
+            key = (generation(con),) + con.execute(f"SELECT max(timestamp), count(*) FROM {self.table}").fetchone()
+            if key == self._key:
+                return self._result
+
+            # A reset since last time, or fewer rows, means the table was
+            # cleared or rewritten, even if it has since grown past the old count
+            if self._key is not None and (key[0] != self._key[0] or key[2] < self._key[2]):
+                self.running = RunningMetrics()
+                self._last_ts = None
+
+            if self._last_ts is None:
+                df = con.execute(f"SELECT {', '.join(cols)} FROM {self.table}").df()
+            else:
+                # >= so rows written late for the last timestamp are still seen;
+                # RunningMetrics skips anything it already folded in per series
+                df = con.execute(f"SELECT {', '.join(cols)} FROM {self.table} WHERE timestamp >= ?", [self._last_ts]).df()
+        finally:
+            if self.db is None:
+                con.close()
+
+        self.running.update(df, self.value_col, self.group_col)
+        self._last_ts = key[1]
+        self._key = key
+        self._result = _json_safe(self.running.results(get_store(self.benchmark).prices()))
+        return self._result
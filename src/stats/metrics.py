@@ -0,0 +1,194 @@
+import numpy as np
+import pandas as pd
+from typing import Any, Hashable
+
+METRIC_NAMES = [
+    "PnL", "Absolute PnL", "CAGR", "Max Drawdown", "Sharpe Ratio",
+    "Sortino Ratio", "Volatility", "Value at Risk (95%)",
+    "Beta to Market", "Kurtosis", "Average Trade Return",
+    "Median Trade Return", "Win/Loss Ratio",
+    "Average Win / Average Loss",
+]
+
+SECONDS_PER_YEAR = 365.25 * 24 * 3600
+NS_PER_DAY = 24 * 3600 * 10**9
+
+
+def pad_series(codes: np.ndarray, values: np.ndarray, n_groups: int, fill: Any = np.nan) -> tuple[np.ndarray, np.ndarray]:
+    # Lay out rows sorted by group code as a (n_groups x max_len) matrix,
+    # left-aligned and padded with `fill`, so every group reduces along axis 1.
+    counts = np.bincount(codes, minlength=n_groups)
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    pos = np.arange(len(codes)) - offsets[codes]
+
+    out = np.full((n_groups, max(int(counts.max(initial=0)), 1)), fill, dtype=values.dtype)
+    out[codes, pos] = values
+    return out, counts
+
+
+def row_quantile(sorted_rows: np.ndarray, n: np.ndarray, q: float) -> np.ndarray:
+    # Linear-interpolated quantile (numpy's default) of the first n[i] entries
+    # of each pre-sorted row; NaN where a row is empty.
+    h = (np.maximum(n, 1) - 1) * q
+    lo = np.floor(h).astype(np.int64)
+    hi = np.minimum(lo + 1, np.maximum(n - 1, 0))
+    frac = h - lo
+
+    rows = np.arange(sorted_rows.shape[0])
+    lo_v = sorted_rows[rows, lo]
+    hi_v = sorted_rows[rows, hi]
+    return np.where(n > 0, lo_v + frac * (hi_v - lo_v), np.nan)
+
+
+def zero_fperr(x: np.ndarray) -> np.ndarray:
+    return np.where(np.abs(x) < 1e-14, 0.0, x)
+
+
+def daily_beta(codes: np.ndarray, ts: np.ndarray, values: np.ndarray, n_groups: int, benchmark: pd.Series) -> np.ndarray:
+    # Beta of each series' close-to-close returns on the benchmark's trading
+    # days. Rows must be sorted by (code, ts); benchmark holds daily closes.
+    bench = benchmark.dropna()
+    bench_day = pd.to_datetime(bench.index).to_numpy("datetime64[D]").astype(np.int64)
+    order = np.argsort(bench_day)
+    bench_day, bench_close = bench_day[order], bench.to_numpy(dtype=np.float64)[order]
+
+    # Last observation per (series, day), restricted to benchmark trading days
+    day = ts // NS_PER_DAY
+    is_close = np.r_[(codes[1:] != codes[:-1]) | (day[1:] != day[:-1]), True]
+    c, d, v = codes[is_close], day[is_close], values[is_close]
+
+    idx = np.clip(np.searchsorted(bench_day, d), 0, len(bench_day) - 1)
+    on_day = bench_day[idx] == d
+    c, v, idx = c[on_day], v[on_day], idx[on_day]
+
+    same = np.r_[False, c[1:] == c[:-1]]
+    prev_v = np.r_[np.nan, v[:-1]]
+    prev_idx = np.r_[0, idx[:-1]]
+    r = np.where(same, v / prev_v - 1, np.nan)
+    m = np.where(same, bench_close[idx] / bench_close[prev_idx] - 1, np.nan)
+
+    both = np.isfinite(r) & np.isfinite(m)
+    c, r, m = c[both], r[both], m[both]
+
+    n = np.bincount(c, minlength=n_groups)
+    r_dev = r - (np.bincount(c, r, n_groups) / n)[c]
+    m_dev = m - (np.bincount(c, m, n_groups) / n)[c]
+    cov = np.bincount(c, r_dev * m_dev, n_groups) / (n - 1)
+    var_m = np.bincount(c, m_dev ** 2, n_groups) / (n - 1)
+    return np.where((n > 1) & (var_m != 0), cov / var_m, np.nan)
+
+
+def compute_metrics(
+    df: pd.DataFrame,
+    value_col: str,
+    group_col: str | None = None,
+    benchmark: pd.Series | None = None,
+    rf_annual: float = 0.03,
+) -> dict[Hashable, dict[str, Any]]:
+
+    # ---- Sort and encode groups ----
+    if group_col is None:
+        df = df.sort_values("timestamp")
+        keys = np.array([None], dtype=object)
+        codes = np.zeros(len(df), dtype=np.int64)
+    else:
+        df = df.sort_values([group_col, "timestamp"])
+        codes, keys = pd.factorize(df[group_col], sort=True)
+
+    G = len(keys)
+    if G == 0:
+        return {}
+
+    ts = pd.to_datetime(df["timestamp"]).to_numpy("datetime64[ns]").astype(np.int64)
+    V, counts = pad_series(codes, df[value_col].to_numpy(dtype=np.float64), G)
+    T, _ = pad_series(codes, ts, G, fill=-1)
+
+    rows = np.arange(G)
+    last = np.maximum(counts - 1, 0)
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+
+        # ---- Compute returns ----
+        R = V[:, 1:] / V[:, :-1] - 1
+        valid = np.isfinite(R)
+        R = np.where(valid, R, np.nan)
+        n = valid.sum(axis=1)
+
+        # ---- Infer effective periods_per_year ----
+        years = (T[rows, last] - T[:, 0]) / 1e9 / SECONDS_PER_YEAR
+        years = np.where(years > 0, years, 1 / 365.25)  # guard
+        periods_per_year = n / years
+
+        # ---- Basic PnL ----
+        start_val = V[:, 0]
+        end_val = V[rows, last]
+
+        pnl_abs = end_val - start_val
+        pnl_pct = np.where(start_val > 0, end_val / start_val - 1, np.nan)
+
+        # ---- CAGR ----
+        cagr = np.where(start_val > 0, (end_val / start_val) ** (1 / years) - 1, np.nan)
+
+        # ---- Max Drawdown ----
+        running_max = np.fmax.accumulate(V, axis=1)
+        max_drawdown = np.nanmin(np.where(np.isnan(V), np.inf, V / running_max - 1), axis=1)
+
+        # ---- Sharpe / Vol ----
+        rf_per_period = (1 + rf_annual) ** (1 / periods_per_year) - 1
+        R0 = np.where(valid, R, 0.0)
+        mean_ret = R0.sum(axis=1) / n
+        dev = np.where(valid, R - mean_ret[:, None], 0.0)
+        m2 = (dev ** 2).sum(axis=1)
+        std_ret = np.sqrt(m2 / (n - 1))
+
+        sharpe = np.where(std_ret != 0, (mean_ret - rf_per_period) / std_ret * np.sqrt(periods_per_year), np.nan)
+        volatility = np.where(std_ret != 0, std_ret * np.sqrt(periods_per_year), 0.0)
+
+        # ---- Sortino ----
+        neg = valid & (R0 < 0)
+        pos = valid & (R0 > 0)
+        n_neg = neg.sum(axis=1)
+        n_pos = pos.sum(axis=1)
+        downside_dev = np.sqrt(np.where(neg, R0 ** 2, 0.0).sum(axis=1) / n_neg)
+        sortino = np.where(n_neg > 0, (mean_ret - rf_per_period) / downside_dev * np.sqrt(periods_per_year), np.nan)
+
+        # ---- VaR / Median ----
+        R_sorted = np.sort(R, axis=1)  # NaNs sort last
+        var_95 = row_quantile(R_sorted, n, 0.05)
+        median_ret = row_quantile(R_sorted, n, 0.5)
+
+        # ---- Beta ----
+        beta = np.full(G, np.nan)
+        if benchmark is not None and len(benchmark) > 0:
+            beta = daily_beta(codes, ts, df[value_col].to_numpy(dtype=np.float64), G, benchmark)
+
+        # ---- Kurtosis (bias-corrected excess, as pandas) ----
+        m4 = (dev ** 4).sum(axis=1)
+        adj = 3 * (n - 1) ** 2 / ((n - 2) * (n - 3))
+        numerator = zero_fperr(n * (n + 1) * (n - 1) * m4)
+        denominator = zero_fperr((n - 2) * (n - 3) * m2 ** 2)
+        kurtosis = np.where(denominator == 0, 0.0, numerator / denominator - adj)
+        kurtosis = np.where(n >= 4, kurtosis, np.nan)
+
+        # ---- Trade-like stats ----
+        avg_win = np.where(n_pos > 0, np.where(pos, R0, 0.0).sum(axis=1) / n_pos, np.nan)
+        avg_loss = np.where(neg, R0, 0.0).sum(axis=1) / n_neg
+        win_loss_ratio = np.where(n_neg > 0, n_pos / n_neg, np.nan)
+        avg_win_over_avg_loss = np.where((n_neg > 0) & (avg_loss != 0), avg_win / np.abs(avg_loss), np.nan)
+
+    columns = [
+        pnl_pct, pnl_abs, cagr, max_drawdown, sharpe,
+        sortino, volatility, var_95,
+        beta, kurtosis, mean_ret,
+        median_ret, win_loss_ratio,
+        avg_win_over_avg_loss,
+    ]
+    table = np.column_stack([np.asarray(c, dtype=np.float64) for c in columns])
+
+    # Series without a single return carry no information
+    table[n == 0] = np.nan
+
+    return {
+        key: dict(zip(METRIC_NAMES, row))
+        for key, row in zip(keys.tolist(), table.tolist())
+    }
@@ -1 +1,3 @@
-from .sizing.kelly import KellySizer
\ No newline at end of file
+from .sizing.kelly import KellySizer
+from .sizing.portfolio import PortfolioSizer
+from .limits import RiskGate, RiskLimits
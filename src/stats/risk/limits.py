@@ -0,0 +1,204 @@
+import logging
+import math
+import threading
+from typing import Dict, Mapping, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class RiskLimits:
+    # Any limit left as None is not checked. Notionals are in dollars,
+    # max_position in shares, max_concentration and max_drawdown are fractions
+    # of the per-strategy `capital`.
+    def __init__(
+        self,
+        capital: float = 1_000_000.0,
+        max_order_notional: float | None = None,
+        max_position: float | None = None,
+        max_symbol_notional: float | None = None,
+        max_strategy_notional: float | None = None,
+        max_concentration: float | None = None,
+        max_drawdown: float | None = None,
+    ):
+        self.capital = capital
+        self.max_order_notional = max_order_notional
+        self.max_position = max_position
+        self.max_symbol_notional = max_symbol_notional
+        self.max_strategy_notional = max_strategy_notional
+        self.max_concentration = max_concentration
+        self.max_drawdown = max_drawdown
+
+
+# Pre-trade gate between strategy.run() and execute(). Exposure lives in
+# dicts keyed by strategy, symbol and (strategy, symbol), updated leg by leg
+# from what actually filled, so a check is a handful of lookups per leg and
+# never touches DuckDB. Accepted trades still working at the broker are
+# reserved (counted as held) until settle() swaps them for their fills.
+# Each (strategy, symbol) is marked at the last price that strategy traded
+# it at (or the `marks` the gate was seeded with), which keeps gross
+# notional and P&L (hence drawdown) incremental too. Orders that only shrink
+# an exposure always pass, so a strategy over a limit can still unwind.
+class RiskGate:
+    def __init__(self, limits: RiskLimits | None = None, positions: Mapping[Tuple[str, str], float] | None = None,
+                 marks: Mapping[str, float] | None = None):
+        self.limits = limits if limits is not None else RiskLimits()
+
+        self.position: Dict[Tuple[str, str], float] = {}
+        self.reserved: Dict[Tuple[str, str], float] = {}  # accepted, not yet settled
+        self.mark: Dict[Tuple[str, str], float] = {}
+        self.symbol_qty: Dict[str, float] = {}
+        self.symbol_reserved: Dict[str, float] = {}
+        self.gross: Dict[str, float] = {}      # sum |qty * mark| per strategy
+        self.pnl: Dict[str, float] = {}        # cash + marked holdings per strategy
+        self.peak: Dict[str, float] = {}
+
+        self.checked = 0
+        self.rejected: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        marks = marks or {}
+        for (strategy, symbol), qty in (positions or {}).items():
+            self.position[(strategy, symbol)] = qty
+            self.symbol_qty[symbol] = self.symbol_qty.get(symbol, 0.0) + qty
+            price = marks.get(symbol, math.nan)
+            if math.isfinite(price) and price > 0:
+                self.mark[(strategy, symbol)] = price
+                self.gross[strategy] = self.gross.get(strategy, 0.0) + abs(qty) * price
+
+    def drawdown(self, strategy: str) -> float:
+        return (self.peak.get(strategy, 0.0) - self.pnl.get(strategy, 0.0)) / self.limits.capital
+
+    def _legs(self, trade) -> Dict[str, Tuple[float, float, float]]:
+        # symbol -> (qty, price, notional). Repeated symbols in one trade are
+        # merged: net qty at the quantity-weighted price, with the notional
+        # summed over the legs so opposite legs do not cancel out of it
+        legs: Dict[str, Tuple[float, float, float]] = {}
+        traded: Dict[str, float] = {}
+        for qty, symbol, price in zip(trade.qty, trade.symbol, trade.price):
+            prev = legs.get(symbol)
+            if prev is None:
+                legs[symbol] = (qty, price, abs(qty) * price)
+                traded[symbol] = abs(qty)
+                continue
+            traded[symbol] += abs(qty)
+            notional = prev[2] + abs(qty) * price
+            merged = notional / traded[symbol] if traded[symbol] else price
+            # One unusable leg price makes the merged one unusable too
+            legs[symbol] = (prev[0] + qty, merged if prev[1] > 0 and price > 0 else math.nan, notional)
+        return legs
+
+    def _violation(self, trade) -> str | None:
+        lim = self.limits
+        strategy = trade.strategy_id
+        legs = self._legs(trade)
+
+        order_notional = 0.0
+        gross = self.gross.get(strategy, 0.0)
+        grows = False
+        for symbol, (qty, price, notional) in legs.items():
+            if not math.isfinite(price) or price <= 0:
+                return f"no usable price for {symbol}"
+            key = (strategy, symbol)
+            position = self.position.get(key, 0.0)
+            held = position + self.reserved.get(key, 0.0)
+            after = held + qty
+            order_notional += notional
+
+            mark = self.mark.get(key, price)
+            gross += abs(after) * price - abs(position) * mark
+            if abs(after) <= abs(held):
+                continue
+            grows = True
+
+            if lim.max_position is not None and abs(after) > lim.max_position:
+                return f"position {after:g} {symbol} > {lim.max_position:g}"
+            if lim.max_symbol_notional is not None:
+                net = abs(self.symbol_qty.get(symbol, 0.0) + self.symbol_reserved.get(symbol, 0.0) + qty) * price
+                if net > lim.max_symbol_notional:
+                    return f"{symbol} net notional {net:,.0f} > {lim.max_symbol_notional:,.0f}"
+            if lim.max_concentration is not None and abs(after) * price > lim.max_concentration * lim.capital:
+                return f"{symbol} is {abs(after) * price / lim.capital:.1%} of capital > {lim.max_concentration:.1%}"
+
+        if lim.max_order_notional is not None and order_notional > lim.max_order_notional:
+            return f"order notional {order_notional:,.0f} > {lim.max_order_notional:,.0f}"
+        if grows and lim.max_strategy_notional is not None and gross > max(lim.max_strategy_notional, self.gross.get(strategy, 0.0)):
+            return f"gross notional {gross:,.0f} > {lim.max_strategy_notional:,.0f}"
+        if grows and lim.max_drawdown is not None and self.drawdown(strategy) > lim.max_drawdown:
+            return f"drawdown {self.drawdown(strategy):.1%} > {lim.max_drawdown:.1%}"
+        return None
+
+    def check(self, trade) -> bool:
+        with self._lock:
+            self.checked += 1
+            reason = self._violation(trade)
+            if reason is None:
+                return True
+            self.rejected[trade.strategy_id] = self.rejected.get(trade.strategy_id, 0) + 1
+        logger.warning("Rejected %s trade %s: %s", trade.strategy_id, trade.trade_id, reason)
+        return False
+
+    def reserve(self, trade) -> None:
+        # Count an accepted trade as held while its orders work, so trades
+        # checked before it fills cannot jointly overshoot a limit
+        with self._lock:
+            self._reserve(trade, 1.0)
+
+    def settle(self, trade, filled=None) -> None:
+        # Swap a reserved trade for what actually filled (None: nothing did)
+        with self._lock:
+            self._reserve(trade, -1.0)
+            if filled is not None:
+                self._record(filled)
+
+    def _reserve(self, trade, sign: float) -> None:
+        for qty, symbol in zip(trade.qty, trade.symbol):
+            if not math.isfinite(qty):
+                continue
+            key = (trade.strategy_id, symbol)
+            self.reserved[key] = self.reserved.get(key, 0.0) + sign * qty
+            self.symbol_reserved[symbol] = self.symbol_reserved.get(symbol, 0.0) + sign * qty
+
+    def record(self, trade) -> None:
+        # Fold an executed trade (its fills) into the counters
+        with self._lock:
+            self._record(trade)
+
+    def _record(self, trade) -> None:
+        strategy = trade.strategy_id
+        pnl = self.pnl.get(strategy, 0.0)
+        gross = self.gross.get(strategy, 0.0)
+        for qty, symbol, price in zip(trade.qty, trade.symbol, trade.price):
+            if not math.isfinite(price):
+                continue
+            key = (strategy, symbol)
+            held = self.position.get(key, 0.0)
+            mark = self.mark.get(key, price)
+
+            # Revalue the old holding at the new price, then trade at it
+            pnl += (price - mark) * held
+            gross += abs(held + qty) * price - abs(held) * mark
+            self.position[key] = held + qty
+            self.mark[key] = price
+            self.symbol_qty[symbol] = self.symbol_qty.get(symbol, 0.0) + qty
+
+        self.pnl[strategy] = pnl
+        self.gross[strategy] = gross
+        self.peak[strategy] = max(self.peak.get(strategy, 0.0), pnl)
+
+    def allow(self, trade) -> bool:
+        if not self.check(trade):
+            return False
+        self.record(trade)
+        return True
+
+    def report(self) -> Dict[str, dict]:
+        with self._lock:
+            return {
+                strategy: {
+                    "gross": self.gross.get(strategy, 0.0),
+                    "pnl": self.pnl.get(strategy, 0.0),
+                    "drawdown": self.drawdown(strategy),
+                    "rejected": self.rejected.get(strategy, 0),
+                }
+                for strategy in set(self.gross) | set(self.rejected)
+            }
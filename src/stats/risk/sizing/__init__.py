@@ -1,2 +1,3 @@
-from .kelly import KellySizer
-from .base import PositionSizer
\ No newline at end of file
+from .kelly import KellySizer, kelly_fractions
+from .base import PositionSizer
+from .portfolio import PortfolioSizer, multi_asset_kelly, vol_target, cap_weights
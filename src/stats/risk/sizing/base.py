@@ -1,6 +1,19 @@
+import numpy as np
+
 class PositionSizer: 
     def __init__(self):
         pass
 
     def get_allocation(self, **kwargs):
-        raise NotImplementedError("This method should be overridden by subclasses.")
\ No newline at end of file
+        raise NotImplementedError("This method should be overridden by subclasses.")
+
+    def get_allocations(self, **arrays) -> np.ndarray:
+        # Batch form: equal-shaped arrays in, one allocation per element out.
+        # Subclasses override this with a vectorized version; the fallback
+        # calls get_allocation() per element.
+        names = list(arrays)
+        columns = np.broadcast_arrays(*[np.asarray(arrays[n], dtype=np.float64) for n in names])
+        out = np.empty(columns[0].shape if columns else (0,))
+        for idx in np.ndindex(out.shape):
+            out[idx] = self.get_allocation(**{n: float(c[idx]) for n, c in zip(names, columns)})
+        return out
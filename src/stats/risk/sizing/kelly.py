@@ -1,5 +1,15 @@
+import numpy as np
 from .base import PositionSizer
 
+def kelly_fractions(p, R) -> np.ndarray:
+    # Single-bet Kelly f* = (p(R+1) - 1) / R for arrays of win probabilities
+    # and payoff ratios, floored at zero
+    p = np.asarray(p, dtype=np.float64)
+    R = np.asarray(R, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        f_star = (p * (R + 1) - 1) / R
+    return np.where(np.isfinite(f_star), np.maximum(f_star, 0.0), 0.0)
+
 class KellySizer(PositionSizer):
     def __init__(self, initial_capital, fraction=1.0):
         self.initial_capital = initial_capital
@@ -11,4 +21,11 @@ class KellySizer(PositionSizer):
         
         f_star = (p * (R + 1) - 1) / R
         f_star = max(0.0, f_star)
-        return f_star * self.fraction 
\ No newline at end of file
+        return f_star * self.fraction
+
+    def get_allocations(self, p=None, R=None, **kwargs) -> np.ndarray:
+        # Fractions of capital for every (strategy, symbol) bet in one call
+        return kelly_fractions(p, R) * self.fraction
+
+    def get_notional(self, p=None, R=None, **kwargs) -> np.ndarray:
+        return self.get_allocations(p, R) * self.initial_capital
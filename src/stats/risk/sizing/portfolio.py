@@ -0,0 +1,98 @@
+import numpy as np
+from .base import PositionSizer
+
+def multi_asset_kelly(mu, cov, ridge: float = 1e-8) -> np.ndarray:
+    # Growth-optimal weights for correlated bets, f* = cov^-1 mu. A small
+    # ridge on the diagonal keeps nearly collinear assets solvable
+    mu = np.asarray(mu, dtype=np.float64)
+    cov = np.asarray(cov, dtype=np.float64)
+    if not mu.size:
+        return np.zeros(0)
+    scale = np.trace(cov) / len(cov) if np.trace(cov) > 0 else 1.0
+    return np.linalg.solve(cov + ridge * scale * np.eye(len(cov)), mu)
+
+def portfolio_vol(weights, cov) -> float:
+    w = np.asarray(weights, dtype=np.float64)
+    return float(np.sqrt(max(w @ np.asarray(cov, dtype=np.float64) @ w, 0.0)))
+
+def vol_target(weights, cov, target: float) -> np.ndarray:
+    # Rescale so the portfolio's volatility (in the covariance's units) hits target
+    weights = np.asarray(weights, dtype=np.float64)
+    vol = portfolio_vol(weights, cov)
+    return weights * (target / vol) if vol > 0 else weights
+
+def cap_weights(weights, max_weight: float | None = None, max_leverage: float | None = None) -> np.ndarray:
+    # Clip each weight to +/- max_weight, then shrink everything pro rata if
+    # gross exposure is still above max_leverage
+    weights = np.asarray(weights, dtype=np.float64)
+    if max_weight is not None:
+        weights = np.clip(weights, -max_weight, max_weight)
+    if max_leverage is not None:
+        gross = np.abs(weights).sum()
+        if gross > max_leverage:
+            weights = weights * (max_leverage / gross)
+    return weights
+
+class PortfolioSizer(PositionSizer):
+    # Sizes every (strategy, symbol) position in one call: multi-asset Kelly
+    # on expected returns and their covariance, scaled by `fraction`, then
+    # optionally vol-targeted, then capped per asset and in gross. Weights are
+    # fractions of initial_capital; get_notional/get_quantities convert them.
+    def __init__(self, initial_capital, fraction=1.0, target_vol=None, max_weight=None, max_leverage=1.0, ridge=1e-8):
+        self.initial_capital = initial_capital
+        self.fraction = fraction
+        self.target_vol = target_vol      # per-period, same units as cov
+        self.max_weight = max_weight      # per-asset |weight| cap
+        self.max_leverage = max_leverage  # gross sum |weight| cap
+        self.ridge = ridge
+
+    def get_allocation(self, mu=None, cov=None, **kwargs):
+        if mu is None or cov is None:
+            return 0.0
+        return float(self.get_allocations(np.atleast_1d(mu), np.atleast_2d(cov))[0])
+
+    def get_allocations(self, mu=None, cov=None, **kwargs) -> np.ndarray:
+        if mu is None or cov is None:
+            return np.zeros(0)
+        weights = multi_asset_kelly(mu, cov, self.ridge) * self.fraction
+        if self.target_vol is not None:
+            weights = vol_target(weights, cov, self.target_vol)
+        return cap_weights(weights, self.max_weight, self.max_leverage)
+
+    def get_notional(self, mu=None, cov=None, **kwargs) -> np.ndarray:
+        return self.get_allocations(mu, cov) * self.initial_capital
+
+    def get_quantities(self, prices, mu=None, cov=None, **kwargs) -> np.ndarray:
+        return self.get_notional(mu, cov) / np.asarray(prices, dtype=np.float64)
+
+    def scale_orders(self, qty, prices, symbols=None, cov=None, groups=None) -> np.ndarray:
+        # Scale a tick's raw order legs (any mix of strategies) together. Legs
+        # are netted per symbol (`symbols` are integer codes into `cov`), and
+        # one factor per symbol keeps each net notional under max_weight, the
+        # gross under max_leverage and, with a covariance of returns, the
+        # order's dollar volatility under target_vol. Scaling only shrinks.
+        # Legs sharing a `groups` code (one per trade) all take the smallest
+        # of their factors, so a trade keeps its legs' ratios (a pair its
+        # hedge) at the cost of shrinking some legs more than needed.
+        qty = np.asarray(qty, dtype=np.float64)
+        if not qty.size:
+            return qty
+        notional = qty * np.asarray(prices, dtype=np.float64)
+        codes = np.arange(len(qty)) if symbols is None else np.asarray(symbols)
+        size = max(int(codes.max()) + 1, 0 if cov is None else len(cov))
+        net = np.bincount(codes, weights=notional, minlength=size) / self.initial_capital
+
+        capped = cap_weights(net, self.max_weight, self.max_leverage)
+        if self.target_vol is not None and cov is not None:
+            vol = portfolio_vol(capped, cov)
+            if vol > self.target_vol:
+                capped = capped * (self.target_vol / vol)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            factor = np.where(net != 0, capped / net, 1.0)[codes]
+        if groups is not None:
+            groups = np.asarray(groups)
+            common = np.ones(int(groups.max()) + 1)
+            np.minimum.at(common, groups, np.where(qty != 0, factor, 1.0))
+            factor = common[groups]
+        return qty * factor
@@ -0,0 +1,281 @@
+import numpy as np
+import pandas as pd
+from typing import Any, Hashable
+
+from .metrics import METRIC_NAMES, NS_PER_DAY, SECONDS_PER_YEAR, daily_beta, pad_series, zero_fperr
+
+# Per-series state and the value a new series starts from
+FIELDS = {
+    "first_ts": -1, "last_ts": -1,
+    "first_val": np.nan, "last_val": np.nan,
+    "n": 0.0, "mean": 0.0, "m2": 0.0, "m3": 0.0, "m4": 0.0,
+    "n_pos": 0.0, "sum_pos": 0.0, "n_neg": 0.0, "sum_neg": 0.0, "sum_neg_sq": 0.0,
+    "run_max": np.nan, "max_dd": np.nan,
+}
+
+
+# A growing multiset of floats kept as sorted runs whose lengths at least
+# double from newest to oldest: add() appends a sorted run and merges it
+# into its elder while that one is less than twice its size, so each value
+# is merged O(log n) times and there are O(log n) runs. Order statistics
+# bisect across the runs instead of materializing one sorted array.
+class SortedRuns:
+    def __init__(self):
+        self.runs: list[np.ndarray] = []
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def add(self, values: np.ndarray) -> None:
+        # values must already be sorted
+        if not len(values):
+            return
+        self.runs.append(values)
+        self.size += len(values)
+        while len(self.runs) > 1 and len(self.runs[-2]) < 2 * len(self.runs[-1]):
+            newer = self.runs.pop()
+            older = self.runs.pop()
+            self.runs.append(np.insert(older, np.searchsorted(older, newer), newer))
+
+    def kth(self, k: int) -> float:
+        # The k-th smallest value (0-based). Every run keeps a window
+        # [lo, hi): values left of it are known to rank below k, values right
+        # of it above. Each round pivots on the middle of the widest window
+        # and cuts the windows at the pivot until the pivot's rank covers k.
+        lo = [0] * len(self.runs)
+        hi = [len(r) for r in self.runs]
+        while True:
+            i = max(range(len(self.runs)), key=lambda j: hi[j] - lo[j])
+            pivot = self.runs[i][(lo[i] + hi[i]) // 2]
+            below = [l + int(np.searchsorted(r[l:h], pivot, "left")) for r, l, h in zip(self.runs, lo, hi)]
+            upto = [l + int(np.searchsorted(r[l:h], pivot, "right")) for r, l, h in zip(self.runs, lo, hi)]
+            if k < sum(below):
+                hi = below
+            elif k >= sum(upto):
+                lo = upto
+            else:
+                return float(pivot)
+
+    def quantile(self, q: float) -> float:
+        # Linear-interpolated, as row_quantile (numpy's default)
+        if not self.size:
+            return np.nan
+        h = (self.size - 1) * q
+        k = int(np.floor(h))
+        lo_v = self.kth(k)
+        hi_v = self.kth(min(k + 1, self.size - 1))
+        return lo_v + (h - k) * (hi_v - lo_v)
+
+
+# Running aggregates behind compute_metrics. update() folds in only the new
+# rows of each series (central moments are merged with Pebay's pairwise
+# formulas, drawdown with a carried running max), so the cost of an update is
+# proportional to the new rows rather than the history. Quantiles keep each
+# series' returns as SortedRuns, and beta keeps one close per day.
+class RunningMetrics:
+    def __init__(self, rf_annual: float = 0.03):
+        self.rf_annual = rf_annual
+        self.keys: list[Hashable] = []
+        self.codes: dict[Hashable, int] = {}
+        self.state = {f: np.empty(0, dtype=type(fill)) for f, fill in FIELDS.items()}
+        self.sorted_returns: list[SortedRuns] = []
+        self.daily_days: list[list[int]] = []
+        self.daily_closes: list[list[float]] = []
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _ensure(self, keys: list[Hashable]) -> np.ndarray:
+        new = [k for k in keys if k not in self.codes]
+        if new:
+            for k in new:
+                self.codes[k] = len(self.keys)
+                self.keys.append(k)
+                self.sorted_returns.append(SortedRuns())
+                self.daily_days.append([])
+                self.daily_closes.append([])
+
+            for f, fill in FIELDS.items():
+                self.state[f] = np.concatenate([self.state[f], np.full(len(new), fill, dtype=self.state[f].dtype)])
+
+        return np.array([self.codes[k] for k in keys], dtype=np.int64)
+
+    def update(self, df: pd.DataFrame, value_col: str, group_col: str | None = None) -> int:
+        if df.empty:
+            return 0
+
+        # ---- Encode series and drop rows already folded in ----
+        if group_col is None:
+            df = df.sort_values("timestamp")
+            local = np.zeros(len(df), dtype=np.int64)
+            keys = [None]
+        else:
+            df = df.sort_values([group_col, "timestamp"])
+            local, uniq = pd.factorize(df[group_col], sort=True)
+            keys = uniq.tolist()
+
+        codes = self._ensure(keys)[local]
+        ts = pd.to_datetime(df["timestamp"]).to_numpy("datetime64[ns]").astype(np.int64)
+        values = df[value_col].to_numpy(dtype=np.float64)
+
+        # Series codes follow first appearance, not key order
+        order = np.argsort(codes, kind="stable")
+        codes, ts, values = codes[order], ts[order], values[order]
+
+        st = self.state
+        fresh = ts > st["last_ts"][codes]
+        if not fresh.any():
+            return 0
+        codes, ts, values = codes[fresh], ts[fresh], values[fresh]
+
+        touched, local = np.unique(codes, return_inverse=True)
+        G = len(touched)
+        V_new, counts = pad_series(local, values, G)
+        T_new, _ = pad_series(local, ts, G, fill=-1)
+        rows = np.arange(G)
+        last = counts - 1
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+
+            # ---- Returns, chained onto each series' previous last value ----
+            V = np.hstack([st["last_val"][touched][:, None], V_new])
+            R = V[:, 1:] / V[:, :-1] - 1
+            valid = np.isfinite(R)
+            R0 = np.where(valid, R, 0.0)
+            nb = valid.sum(axis=1).astype(np.float64)
+
+            # ---- Batch central moments, merged into the running ones ----
+            mean_b = np.where(nb > 0, R0.sum(axis=1) / nb, 0.0)
+            dev = np.where(valid, R - mean_b[:, None], 0.0)
+            m2b, m3b, m4b = (dev ** 2).sum(axis=1), (dev ** 3).sum(axis=1), (dev ** 4).sum(axis=1)
+
+            na, mean_a = st["n"][touched], st["mean"][touched]
+            m2a, m3a, m4a = st["m2"][touched], st["m3"][touched], st["m4"][touched]
+            n = na + nb
+            delta = mean_b - mean_a
+            nn = np.where(n > 0, n, 1.0)
+
+            st["mean"][touched] = mean_a + delta * nb / nn
+            st["m4"][touched] = (
+                m4a + m4b
+                + delta ** 4 * na * nb * (na ** 2 - na * nb + nb ** 2) / nn ** 3
+                + 6 * delta ** 2 * (na ** 2 * m2b + nb ** 2 * m2a) / nn ** 2
+                + 4 * delta * (na * m3b - nb * m3a) / nn
+            )
+            st["m3"][touched] = (
+                m3a + m3b
+                + delta ** 3 * na * nb * (na - nb) / nn ** 2
+                + 3 * delta * (na * m2b - nb * m2a) / nn
+            )
+            st["m2"][touched] = m2a + m2b + delta ** 2 * na * nb / nn
+            st["n"][touched] = n
+
+            # ---- Win / loss sums ----
+            pos = valid & (R0 > 0)
+            neg = valid & (R0 < 0)
+            st["n_pos"][touched] += pos.sum(axis=1)
+            st["sum_pos"][touched] += np.where(pos, R0, 0.0).sum(axis=1)
+            st["n_neg"][touched] += neg.sum(axis=1)
+            st["sum_neg"][touched] += np.where(neg, R0, 0.0).sum(axis=1)
+            st["sum_neg_sq"][touched] += np.where(neg, R0 ** 2, 0.0).sum(axis=1)
+
+            # ---- Drawdown against the carried running max ----
+            W = np.hstack([st["run_max"][touched][:, None], V_new])
+            running_max = np.fmax.accumulate(W, axis=1)[:, 1:]
+            dd = np.where(np.isnan(V_new), np.inf, V_new / running_max - 1).min(axis=1)
+            st["max_dd"][touched] = np.fmin(st["max_dd"][touched], np.where(np.isinf(dd), np.nan, dd))
+            st["run_max"][touched] = running_max[rows, last]
+
+        # ---- Endpoints ----
+        first_missing = np.isnan(st["first_val"][touched])
+        st["first_val"][touched] = np.where(first_missing, V_new[:, 0], st["first_val"][touched])
+        st["first_ts"][touched] = np.where(first_missing, T_new[:, 0], st["first_ts"][touched])
+        st["last_val"][touched] = V_new[rows, last]
+        st["last_ts"][touched] = T_new[rows, last]
+
+        # ---- Sorted returns (quantiles) and daily closes (beta) ----
+        for i, code in enumerate(touched):
+            self.sorted_returns[code].add(np.sort(R[i][valid[i]]))
+
+        day = ts // NS_PER_DAY
+        is_close = np.r_[(codes[1:] != codes[:-1]) | (day[1:] != day[:-1]), True]
+        for code, d, v in zip(codes[is_close].tolist(), day[is_close].tolist(), values[is_close].tolist()):
+            days, closes = self.daily_days[code], self.daily_closes[code]
+            if days and days[-1] == d:
+                closes[-1] = v
+            else:
+                days.append(d)
+                closes.append(v)
+
+        return int(fresh.sum())
+
+    def results(self, benchmark: pd.Series | None = None) -> dict[Hashable, dict[str, Any]]:
+        G = len(self.keys)
+        if G == 0:
+            return {}
+
+        st = self.state
+        n = st["n"]
+
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            years = (st["last_ts"] - st["first_ts"]) / 1e9 / SECONDS_PER_YEAR
+            years = np.where(years > 0, years, 1 / 365.25)  # guard
+            periods_per_year = n / years
+
+            start_val, end_val = st["first_val"], st["last_val"]
+            pnl_abs = end_val - start_val
+            pnl_pct = np.where(start_val > 0, end_val / start_val - 1, np.nan)
+            cagr = np.where(start_val > 0, (end_val / start_val) ** (1 / years) - 1, np.nan)
+
+            rf_per_period = (1 + self.rf_annual) ** (1 / periods_per_year) - 1
+            mean_ret = st["mean"]
+            std_ret = np.sqrt(st["m2"] / (n - 1))
+            sharpe = np.where(std_ret != 0, (mean_ret - rf_per_period) / std_ret * np.sqrt(periods_per_year), np.nan)
+            volatility = np.where(std_ret != 0, std_ret * np.sqrt(periods_per_year), 0.0)
+
+            n_neg, n_pos = st["n_neg"], st["n_pos"]
+            downside_dev = np.sqrt(st["sum_neg_sq"] / n_neg)
+            sortino = np.where(n_neg > 0, (mean_ret - rf_per_period) / downside_dev * np.sqrt(periods_per_year), np.nan)
+
+            var_95 = np.full(G, np.nan)
+            median_ret = np.full(G, np.nan)
+            for code, returns in enumerate(self.sorted_returns):
+                if len(returns):
+                    var_95[code] = returns.quantile(0.05)
+                    median_ret[code] = returns.quantile(0.5)
+
+            beta = np.full(G, np.nan)
+            if benchmark is not None and len(benchmark) > 0:
+                lengths = [len(d) for d in self.daily_days]
+                codes = np.repeat(np.arange(G), lengths)
+                days = np.concatenate([np.asarray(d, dtype=np.int64) for d in self.daily_days])
+                closes = np.concatenate([np.asarray(c, dtype=np.float64) for c in self.daily_closes])
+                beta = daily_beta(codes, days * NS_PER_DAY, closes, G, benchmark)
+
+            m2, m4 = st["m2"], st["m4"]
+            adj = 3 * (n - 1) ** 2 / ((n - 2) * (n - 3))
+            numerator = zero_fperr(n * (n + 1) * (n - 1) * m4)
+            denominator = zero_fperr((n - 2) * (n - 3) * m2 ** 2)
+            kurtosis = np.where(denominator == 0, 0.0, numerator / denominator - adj)
+            kurtosis = np.where(n >= 4, kurtosis, np.nan)
+
+            avg_win = np.where(n_pos > 0, st["sum_pos"] / n_pos, np.nan)
+            avg_loss = st["sum_neg"] / n_neg
+            win_loss_ratio = np.where(n_neg > 0, n_pos / n_neg, np.nan)
+            avg_win_over_avg_loss = np.where((n_neg > 0) & (avg_loss != 0), avg_win / np.abs(avg_loss), np.nan)
+
+        columns = [
+            pnl_pct, pnl_abs, cagr, st["max_dd"], sharpe,
+            sortino, volatility, var_95,
+            beta, kurtosis, mean_ret,
+            median_ret, win_loss_ratio,
+            avg_win_over_avg_loss,
+        ]
+        table = np.column_stack([np.asarray(c, dtype=np.float64) for c in columns])
+        table[n == 0] = np.nan
+
+        return {
+            key: dict(zip(METRIC_NAMES, row))
+            for key, row in zip(self.keys, table.tolist())
+        }
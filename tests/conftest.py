@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+# Modules run from src (uvicorn bff:app, python -m controller.runController),
+# so the tests import them the same way
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
@@ -0,0 +1,42 @@
+import time
+from datetime import datetime
+
+import duckdb
+import pytest
+
+from algorithms.base import Trade
+from database import append, rollups
+from database.init_duckdb import initialize_duckdb
+
+
+def counts(db_path):
+    con = duckdb.connect(db_path)
+    try:
+        return tuple(
+            con.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+            for table in ("portfolio_history", "strategy_history", "equity_rollup")
+        )
+    finally:
+        con.close()
+
+
+def test_history_rolls_back_with_its_rollup(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "algory.duckdb")
+    initialize_duckdb(db_path)
+    append.append_trade(Trade("s", time.time(), [5.0, -2.0], ["AAPL", "MSFT"], [100.0, 200.0]), db_path)
+    prices = {"AAPL": 101.0, "MSFT": 199.0}
+
+    def broken(con, rows):
+        raise RuntimeError("rollup failed")
+
+    monkeypatch.setattr(rollups, "add_equity", broken)
+    with pytest.raises(RuntimeError):
+        append.append_portfolios(datetime(2026, 1, 1), prices, db_path)
+    with pytest.raises(RuntimeError):
+        append.append_strategy_portfolios(datetime(2026, 1, 1), prices, db_path)
+    assert counts(db_path) == (0, 0, 0)
+
+    monkeypatch.undo()
+    append.append_portfolios(datetime(2026, 1, 1), prices, db_path)
+    append.append_strategy_portfolios(datetime(2026, 1, 1), prices, db_path)
+    assert counts(db_path)[:2] == (1, 1)
@@ -0,0 +1,80 @@
+import time
+
+import duckdb
+import numpy as np
+
+from algorithms.base import BaseAlgorithm, Trade
+from database import rollups
+from database.backtest import backtest
+from database.init_duckdb import initialize_duckdb
+
+SYMBOLS = ["AAPL", "MSFT", "NVDA"]
+TIMESTAMPS = np.array(["2026-01-05T10:00", "2026-01-05T11:00", "2026-01-05T12:00", "2026-01-05T13:00"], dtype="datetime64[us]")
+PRICES = np.array([
+    [100.0, 200.0, 50.0],
+    [101.0, 198.0, np.nan],  # NVDA unpriced for a bar
+    [103.0, 199.0, 52.0],
+    [102.0, 205.0, 55.0],
+])
+
+
+class Fixed(BaseAlgorithm):
+    def __init__(self, id, orders):
+        super().__init__(id=id, frequency=1)
+        self.orders = np.array(orders, dtype=np.float64)
+
+    def run_batch(self, prices, symbols, lookback=512):
+        return self.orders
+
+
+class BuyOnce(BaseAlgorithm):
+    # Goes through the per-bar run() fallback
+    def run(self, snapshot=None):
+        if len(snapshot) == 2:
+            return Trade(self.id, time.time(), [3.0], ["MSFT"], [0.0])
+        return None
+
+
+def run():
+    return backtest(
+        [
+            Fixed("a", [[10, 0, 0], [0, 0, 0], [-4, 0, 2], [0, 0, 0]]),
+            BuyOnce(id="b", frequency=1),
+        ],
+        SYMBOLS, TIMESTAMPS, PRICES,
+    )
+
+
+def test_positions_and_values_follow_the_orders():
+    result = run()
+    np.testing.assert_array_equal(result.positions[0, -1], [6, 0, 2])
+    np.testing.assert_array_equal(result.positions[1, -1], [0, 3, 0])
+    np.testing.assert_allclose(result.strategy_values[0], [1000, 1010, 6 * 103 + 2 * 52, 6 * 102 + 2 * 55])
+    np.testing.assert_allclose(result.strategy_values[1], [0, 594, 597, 615])
+
+    trades = result.trades_frame()
+    assert list(zip(trades["strategy"], trades["symbol"], trades["quantity"])) == [
+        ("a", "AAPL", 10.0), ("b", "MSFT", 3.0), ("a", "AAPL", -4.0), ("a", "NVDA", 2.0),
+    ]
+    assert trades["price"].tolist() == [100.0, 198.0, 103.0, 52.0]
+    # Legs of one decision share an id; separate decisions do not
+    assert trades["trade_id"].nunique() == 3
+
+    portfolio = result.portfolio_frame()
+    assert portfolio["total_value"].tolist() == [1000, 1010 + 594, 722 + 597, 722 + 615]
+    assert portfolio["total_positions"].tolist() == [1, 2, 3, 3]
+
+
+def test_load_writes_the_history_in_one_go(tmp_path):
+    db_path = str(tmp_path / "algory.duckdb")
+    initialize_duckdb(db_path)
+    con = duckdb.connect(db_path)
+    assert run().load(con, db_path) == 4
+
+    assert con.execute("SELECT count(*) FROM portfolio_history").fetchone()[0] == 4
+    assert sorted(con.execute("SELECT strategy, symbol, quantity FROM positions WHERE quantity != 0").fetchall()) == [
+        ("a", "AAPL", 6.0), ("a", "NVDA", 2.0), ("b", "MSFT", 3.0),
+    ]
+    closes = rollups.rollup_range(con, "equity", resolution="1h").column("close").to_pylist()
+    assert closes == [1000, 1604, 1319, 1337]
+    con.close()
@@ -0,0 +1,68 @@
+import os
+import time
+from datetime import date
+
+import pandas as pd
+
+from stats.benchmark import BenchmarkStore, StaticSource
+
+
+class Downloader:
+    # Records what was asked for; fails while `down` is set
+    def __init__(self, close):
+        self.source = StaticSource(close)
+        self.calls = []
+        self.down = False
+
+    def fetch(self, symbol, start):
+        self.calls.append((symbol, start))
+        if self.down:
+            raise ConnectionError("no network")
+        return self.source.fetch(symbol, start)
+
+
+def closes(days, values):
+    return pd.Series(values, index=pd.date_range("2026-01-05", periods=days), dtype=float)
+
+
+def age(path, seconds):
+    stamp = time.time() - seconds
+    os.utime(path, (stamp, stamp))
+
+
+def test_fresh_cache_is_served_without_a_download(tmp_path):
+    path = tmp_path / "SPY.parquet"
+    BenchmarkStore(path=path, source=Downloader(closes(3, [1.0, 2.0, 3.0])), start="2026-01-01").prices()
+
+    downloader = Downloader(closes(4, [9.0, 9.0, 9.0, 9.0]))
+    store = BenchmarkStore(path=path, source=downloader, ttl=3600)
+    assert store.prices().tolist() == [1.0, 2.0, 3.0]
+    assert downloader.calls == []
+
+
+def test_expired_cache_fetches_from_its_last_day(tmp_path):
+    path = tmp_path / "SPY.parquet"
+    BenchmarkStore(path=path, source=Downloader(closes(3, [1.0, 2.0, 3.0])), start="2026-01-01").prices()
+    age(path, 7200)
+
+    # The last cached close was intraday; the new download corrects it
+    downloader = Downloader(closes(4, [1.0, 2.0, 3.5, 4.0]))
+    store = BenchmarkStore(path=path, source=downloader, ttl=3600)
+    assert store.prices().tolist() == [1.0, 2.0, 3.5, 4.0]
+    assert downloader.calls == [("SPY", date(2026, 1, 7))]
+    assert BenchmarkStore(path=path, offline=True).prices().tolist() == [1.0, 2.0, 3.5, 4.0]
+
+
+def test_failed_download_serves_cached_closes(tmp_path):
+    path = tmp_path / "SPY.parquet"
+    BenchmarkStore(path=path, source=Downloader(closes(3, [1.0, 2.0, 3.0])), start="2026-01-01").prices()
+    age(path, 7200)
+
+    downloader = Downloader(closes(4, [1.0, 2.0, 3.0, 4.0]))
+    downloader.down = True
+    store = BenchmarkStore(path=path, source=downloader, ttl=3600)
+    assert store.prices().tolist() == [1.0, 2.0, 3.0]
+
+    # The failure counts as an attempt: no retry until the TTL passes again
+    assert store.prices().tolist() == [1.0, 2.0, 3.0]
+    assert len(downloader.calls) == 1
@@ -0,0 +1,33 @@
+import numpy as np
+
+from algorithms.clustering import ClusterStage
+
+
+def factor_prices(rows, groups=3, per_group=4, seed=21):
+    # Each group of symbols moves with its own factor plus a little noise
+    rng = np.random.default_rng(seed)
+    factors = rng.normal(0, 0.01, (rows, groups))
+    returns = np.repeat(factors, per_group, axis=1) + rng.normal(0, 0.002, (rows, groups * per_group))
+    return 100 * np.cumprod(1 + returns, axis=0)
+
+
+def partition(labels):
+    return sorted(sorted(np.nonzero(labels == c)[0].tolist()) for c in np.unique(labels))
+
+
+def test_warm_started_labels_stay_put():
+    symbols = [f"S{i}" for i in range(12)]
+    prices = factor_prices(400)
+    stage = ClusterStage(window=120, k=3, min_obs=30)
+
+    stage.observe(symbols, prices[:200])
+    first = stage.cluster()
+    assert partition(first.labels) == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9, 10, 11]]
+
+    # Later windows of the same structure keep the same cluster numbers and
+    # converge straight away from the previous assignment
+    for end in range(220, 401, 20):
+        stage.observe(symbols, prices[end - 21:end])
+        latest = stage.cluster()
+        np.testing.assert_array_equal(latest.labels, first.labels)
+        assert latest.iterations == 1
@@ -0,0 +1,181 @@
+import queue
+import threading
+import time
+from datetime import datetime
+
+import duckdb
+import numpy as np
+
+from algorithms.base import BaseAlgorithm, Trade
+from algorithms.market import MarketBuffer
+from controller import runController
+from controller.executor import StrategyExecutor
+from controller.scheduler import Scheduler
+from database.connection import replica_dir
+from database.journal import Journal
+from database.writer import TradeWriter
+from execution import Gateway, SimulatedBroker
+from stats.risk import PortfolioSizer, RiskGate, RiskLimits
+
+
+def test_startup_on_fresh_database(tmp_path):
+    db_path = str(tmp_path / "algory.duckdb")
+    journal = Journal(tmp_path / "journal", sync=False)
+    try:
+        strategies, frequencies = runController.startup(journal, db_path)
+    finally:
+        journal.close()
+
+    assert strategies
+    assert frequencies == {s.id: s.frequency for s in strategies.values()}
+
+    con = duckdb.connect(db_path)
+    tables = {name for (name,) in con.execute("SELECT table_name FROM information_schema.tables").fetchall()}
+    con.close()
+    assert {"trades", "positions", "portfolio_history", "strategy_history", "trades_all"} <= tables
+
+
+def test_bookkeeping_writes_history(tmp_path):
+    db_path = str(tmp_path / "algory.duckdb")
+    journal = Journal(tmp_path / "journal", sync=False)
+    runController.startup(journal, db_path)
+    writer = TradeWriter(db_path, max_delay=None, journal=journal)
+    market = MarketBuffer(["AAPL", "MSFT"])
+    runController.refresh_market(market)
+    gateway = Gateway(SimulatedBroker(latency=0.0, jitter=0.0)).start()
+    try:
+        writer.submit(Trade("s", time.time(), [2.0, -1.0], ["AAPL", "MSFT"], market.snapshot().latest.tolist()))
+        runController.bookkeeping(writer, market, Scheduler(), StrategyExecutor("thread", 1), gateway)
+
+        con = writer.con
+        assert con.execute("SELECT count(*) FROM portfolio_history").fetchone()[0] == 1
+        assert con.execute("SELECT strategy FROM strategy_history").fetchall() == [("s",)]
+        assert con.execute("SELECT count(*) FROM equity_rollup WHERE resolution = '1m'").fetchone()[0] == 2
+        assert (replica_dir(db_path) / "CURRENT").exists()
+    finally:
+        gateway.close()
+        writer.close()
+        journal.close()
+
+
+class RecordingWriter:
+    def __init__(self):
+        self.trades = []
+        self.threads = set()
+
+    def submit(self, trade):
+        self.threads.add(threading.current_thread().name)
+        time.sleep(0.05)  # stands in for the journal fsync / a flush
+        self.trades.append(trade)
+
+
+def test_fills_are_recorded_off_the_gateway_loop():
+    market = MarketBuffer(["AAPL", "MSFT"])
+    runController.refresh_market(market)
+    sizer = PortfolioSizer(runController.INITIAL_CAPITAL, max_weight=0.25)
+    gate = RiskGate(runController.RISK_LIMITS)
+    gateway = Gateway(SimulatedBroker(latency=0.0, jitter=0.0, partial_prob=0.0)).start()
+    writer = RecordingWriter()
+    fills = queue.Queue()
+    executor = StrategyExecutor("thread", 1)
+    recorder = threading.Thread(target=runController.record_fills, args=(fills, writer, gate, executor))
+    recorder.start()
+
+    prices = market.snapshot().latest.tolist()
+    trades = [Trade(f"s{i}", time.time(), [1.0, -1.0], ["AAPL", "MSFT"], prices) for i in range(5)]
+    runController.handle_trades(trades, fills, sizer, gate, market, gateway, executor)
+    gateway.close()
+    fills.put(None)
+    recorder.join()
+    executor.close()
+
+    assert len(writer.trades) == 5
+    assert "gateway" not in writer.threads
+    # Five blocking submits would add up to 250ms if they ran on the loop
+    assert gateway.report()["latency_max"] < 0.05
+
+
+class Holder(BaseAlgorithm):
+    def __init__(self):
+        super().__init__(id="holder", frequency=1)
+        self.reconciled = []
+
+    def reconcile(self, symbols, qty):
+        self.reconciled.append((symbols, qty))
+
+    def run(self, snapshot=None):
+        return None
+
+
+def test_sizing_scales_whole_trades_and_amends_the_strategy():
+    market = MarketBuffer(["AAPL", "MSFT"])
+    market.append(datetime(2026, 1, 1), np.array([100.0, 100.0]))
+    sizer = PortfolioSizer(runController.INITIAL_CAPITAL, max_weight=0.1)
+    gateway = Gateway(SimulatedBroker(latency=0.0, jitter=0.0, partial_prob=0.0)).start()
+    executor = StrategyExecutor("thread", 1)
+    fills = queue.Queue()
+
+    # AAPL is over its 10% weight and has to halve; MSFT is not, but the
+    # pair's 4:1 ratio must survive
+    trade = Trade("holder", time.time(), [2000.0, -500.0], ["AAPL", "MSFT"], [100.0, 100.0])
+    runController.handle_trades([trade], fills, sizer, RiskGate(runController.RISK_LIMITS), market, gateway, executor)
+    gateway.close()
+    assert trade.qty == [1000.0, -250.0]
+
+    strategy = Holder()
+    executor.submit(strategy, market.snapshot()).result()
+    executor.close()
+    assert strategy.reconciled == [(["AAPL", "MSFT"], [-1000.0, 250.0])]
+
+
+def test_gate_and_strategy_follow_fills_not_requests():
+    market = MarketBuffer(["AAPL", "MSFT"])
+    market.append(datetime(2026, 1, 1), np.array([100.0, 100.0]))
+    sizer = PortfolioSizer(runController.INITIAL_CAPITAL, max_weight=1.0)
+    limits = RiskLimits(capital=runController.INITIAL_CAPITAL, max_order_notional=50_000.0)
+    gate = RiskGate(limits)
+    gateway = Gateway(SimulatedBroker(latency=0.0, jitter=0.0, reject_prob=1.0)).start()
+    writer = RecordingWriter()
+    executor = StrategyExecutor("thread", 1)
+    fills = queue.Queue()
+    recorder = threading.Thread(target=runController.record_fills, args=(fills, writer, gate, executor))
+    recorder.start()
+
+    # The first trade is over the order limit, the second passes the gate but
+    # the broker rejects it
+    too_big = Trade("holder", time.time(), [1000.0], ["AAPL"], [100.0])
+    rejected = Trade("holder", time.time(), [100.0, -100.0], ["AAPL", "MSFT"], [100.0, 100.0])
+    runController.handle_trades([too_big, rejected], fills, sizer, gate, market, gateway, executor)
+    gateway.close()
+    fills.put(None)
+    recorder.join()
+
+    assert writer.trades == []
+    assert gate.position.get(("holder", "AAPL"), 0.0) == 0.0
+    assert gate.reserved == {("holder", "AAPL"): 0.0, ("holder", "MSFT"): 0.0}
+
+    strategy = Holder()
+    executor.submit(strategy, market.snapshot()).result()
+    executor.close()
+    assert strategy.reconciled == [
+        (["AAPL"], [-1000.0]),
+        (["AAPL", "MSFT"], [-100.0, 100.0]),
+    ]
+
+
+def test_gate_is_seeded_with_marks():
+    gate = RiskGate(RiskLimits(), {("pairs", "AAPL"): 10.0, ("pairs", "MSFT"): -5.0}, {"AAPL": 100.0, "MSFT": 200.0})
+    assert gate.gross["pairs"] == 2000.0
+    assert gate.mark[("pairs", "MSFT")] == 200.0
+
+
+def test_repeated_symbols_are_checked_at_their_weighted_price():
+    gate = RiskGate(RiskLimits(max_symbol_notional=2000.0))
+    # 15 shares bought for 2100 in all: the last leg's price would say 300
+    assert not gate.check(Trade("s", 0.0, [10.0, 5.0], ["AAPL", "AAPL"], [200.0, 20.0]))
+    assert gate.check(Trade("s", 0.0, [10.0, 5.0], ["AAPL", "AAPL"], [120.0, 120.0]))
+
+    # Opposite legs still count towards the order's size
+    gate = RiskGate(RiskLimits(max_order_notional=1500.0))
+    assert not gate.check(Trade("s", 0.0, [10.0, -10.0], ["AAPL", "AAPL"], [100.0, 100.0]))
+    assert not gate.check(Trade("s", 0.0, [1.0, 1.0], ["AAPL", "AAPL"], [100.0, float("nan")]))
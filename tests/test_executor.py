@@ -0,0 +1,90 @@
+import threading
+import time
+
+import pytest
+
+from algorithms.base import BaseAlgorithm, Trade
+from controller.executor import StrategyExecutor
+
+
+class Slow(BaseAlgorithm):
+    timeout = 0.02
+
+    def __init__(self, delay):
+        super().__init__(id="slow", frequency=1)
+        self.delay = delay
+        self.holdings = {}
+
+    def reconcile(self, symbols, qty):
+        for sym, q in zip(symbols, qty):
+            self.holdings[sym] = self.holdings.get(sym, 0.0) + q
+
+    def run(self, snapshot=None):
+        time.sleep(self.delay)
+        self.holdings["AAPL"] = self.holdings.get("AAPL", 0.0) + 10.0
+        return Trade(self.id, time.time(), [10.0], ["AAPL"], [100.0])
+
+
+def run_once(executor, strategy):
+    # Callbacks run in order, so this waits for the executor's one too
+    future = executor.submit(strategy)
+    collected = threading.Event()
+    future.add_done_callback(lambda f: collected.set())
+    collected.wait()
+    return future.result()
+
+
+def test_timed_out_trade_is_taken_back_from_the_strategy():
+    executor = StrategyExecutor("thread", 1)
+    strategy = Slow(delay=0.1)
+    run_once(executor, strategy)
+    assert executor.report()["slow"]["timeouts"] == 1
+    assert executor.trades.empty()
+
+    # The next run starts from the holdings the book actually has
+    strategy.delay = 0.0
+    run_once(executor, strategy)
+    executor.close()
+    assert strategy.holdings == {"AAPL": 10.0}
+    assert executor.trades.get().qty == [10.0]
+
+
+class Stage:
+    def __init__(self, latest):
+        self.latest = latest
+        self.lock = threading.Lock()  # stages do not pickle
+
+
+class Staged(BaseAlgorithm):
+    requires = ("stage",)
+
+    def __init__(self):
+        super().__init__(id="staged", frequency=1)
+
+    def run(self, snapshot=None):
+        stage = self.deps.get("stage")
+        if stage is None or stage.latest is None:
+            return None
+        return Trade(self.id, time.time(), [float(stage.latest)], ["AAPL"], [100.0])
+
+
+def test_process_workers_see_the_stage_results():
+    executor = StrategyExecutor("process", 1)
+    strategy = Staged()
+    stage = Stage(3.0)
+    strategy.bind({"stage": stage})
+    try:
+        trade, state, _ = run_once(executor, strategy)
+        assert trade.qty == [3.0]
+        assert "deps" not in state
+
+        stage.latest = 5.0
+        trade, _, _ = run_once(executor, strategy)
+        assert trade.qty == [5.0]
+        assert strategy.deps == {"stage": stage}
+
+        strategy.bind({"stage": object()})
+        with pytest.raises(ValueError):
+            executor.submit(strategy)
+    finally:
+        executor.close()
@@ -0,0 +1,100 @@
+import asyncio
+import json
+import time
+
+import duckdb
+
+from algorithms.base import Trade
+from database import tiering
+from database.connection import ConnectionManager, ReplicaManager
+from database.feed import ChangeFeed, _encode
+from database.init_duckdb import initialize_duckdb
+from database.writer import TradeWriter
+
+
+def test_lower_trade_id_committed_later_is_streamed(tmp_path):
+    db_path = str(tmp_path / "algory.duckdb")
+    initialize_duckdb(db_path)
+    writer = TradeWriter(db_path, max_delay=None)
+    feed = ChangeFeed(ConnectionManager(db_path))
+    con = writer.con.cursor()
+    feed.last_seq, feed.last_ts = feed._high_water(con)
+
+    # Fills arrive out of id order: the later decision commits first
+    now = time.time()
+    writer.submit(Trade("s", now, [1.0], ["AAPL"], [100.0], trade_id=200))
+    writer.flush()
+    trades, _, reset = feed._poll(con)
+    assert [t["trade_id"] for t in trades] == [200] and reset is None
+    feed.last_seq = trades[-1]["seq"]
+
+    writer.submit(Trade("s", now, [1.0], ["MSFT"], [50.0], trade_id=100))
+    writer.flush()
+    trades, _, reset = feed._poll(con)
+    assert [t["trade_id"] for t in trades] == [100] and reset is None
+    writer.close()
+
+
+def test_existing_trades_are_numbered_on_migration(tmp_path):
+    db_path = str(tmp_path / "algory.duckdb")
+    con = duckdb.connect(db_path)
+    con.execute("CREATE TABLE trades (trade_id BIGINT, timestamp TIMESTAMP, strategy TEXT, symbol TEXT, side TEXT, quantity DOUBLE, price DOUBLE)")
+    con.execute("INSERT INTO trades VALUES (5, now(), 's', 'A', 'BUY', 1, 1), (3, now(), 's', 'B', 'BUY', 1, 1)")
+    con.close()
+
+    initialize_duckdb(db_path)
+    con = duckdb.connect(db_path)
+    con.execute("INSERT INTO trades (trade_id, timestamp, strategy, symbol, side, quantity, price) VALUES (1, now(), 's', 'C', 'BUY', 1, 1)")
+    assert con.execute("SELECT trade_id FROM trades ORDER BY seq").fetchall() == [(5,), (3,), (1,)]
+    con.close()
+
+
+def test_reset_is_seen_when_new_trades_arrive_with_it(tmp_path):
+    db_path = str(tmp_path / "algory.duckdb")
+    initialize_duckdb(db_path)
+    writer = TradeWriter(db_path, max_delay=None)
+    feed = ChangeFeed(ConnectionManager(db_path))
+    con = writer.con.cursor()
+
+    writer.submit(Trade("s", time.time(), [1.0], ["AAPL"], [100.0]))
+    writer.flush()
+    feed.last_seq, feed.last_ts = feed._high_water(con)
+
+    # seq keeps counting through the reset, so only the generation tells
+    tiering.reset(writer.con, db_path)
+    writer.submit(Trade("s", time.time(), [1.0], ["MSFT"], [50.0]))
+    writer.flush()
+    trades, _, reset = feed._poll(con)
+    assert reset == 1
+    assert [t["symbol"] for t in trades] == ["MSFT"]
+    writer.close()
+
+
+def test_subscribers_get_a_snapshot_after_a_reset(tmp_path):
+    db_path = str(tmp_path / "algory.duckdb")
+    initialize_duckdb(db_path)
+    writer = TradeWriter(db_path, max_delay=None)
+    writer.submit(Trade("s", time.time(), [1.0], ["AAPL"], [100.0]))
+    writer.publish_snapshot()
+
+    async def follow():
+        # Readers follow published copies, as the BFF does
+        feed = ChangeFeed(ReplicaManager(db_path, check_interval=0.0), poll_interval=0.01)
+        events = []
+        async for _, event, payload in feed.subscribe():
+            events.append((event, [t["symbol"] for t in json.loads(payload)] if event == "trades" else None))
+            if event == "trades" and len(events) == 1:
+                tiering.reset(writer.con, db_path)
+                writer.submit(Trade("s", time.time(), [1.0], ["MSFT"], [50.0]))
+                writer.publish_snapshot()
+            elif event == "trades":
+                return events
+
+    events = asyncio.run(asyncio.wait_for(follow(), timeout=5))
+    assert events == [("trades", ["AAPL"]), ("reset", None), ("trades", ["MSFT"])]
+    writer.close()
+
+
+def test_encode_turns_non_finite_numbers_into_null():
+    rows = [{"a": float("nan"), "b": float("inf"), "c": -float("inf"), "d": 1.5}]
+    assert json.loads(_encode(rows)) == [{"a": None, "b": None, "c": None, "d": 1.5}]
@@ -0,0 +1,79 @@
+import threading
+
+import pytest
+
+from algorithms.base import Trade
+from execution import Gateway, SimulatedBroker
+from execution.gateway import FILLED, PARTIAL, REJECTED
+
+
+def trade(legs=2, strategy="s"):
+    symbols = ["AAPL", "MSFT", "NVDA", "AMZN"][:legs]
+    return Trade(strategy, 0.0, [10.0, -4.0, 3.0, -1.0][:legs], symbols, [100.0] * legs)
+
+
+def test_partial_fills_add_up_to_the_order():
+    gateway = Gateway(SimulatedBroker(latency=0.0, jitter=0.0, partial_prob=1.0, max_parts=3, slippage_bps=5.0, seed=1)).start()
+    handle = gateway.submit(trade(legs=2))
+    assert handle.wait(2)
+    gateway.close()
+
+    assert handle.status == FILLED
+    for order in handle.orders:
+        assert order.filled_qty == pytest.approx(order.qty)
+        # Slippage only ever moves the price against the order
+        assert 0.0 <= (order.avg_price - 100.0) * (1 if order.qty > 0 else -1) <= 100.0 * 5e-4
+    filled = handle.filled_trade()
+    assert filled.qty == pytest.approx([10.0, -4.0]) and filled.trade_id == handle.trade.trade_id
+
+    stats = gateway.report()
+    assert stats["fills"] > stats["orders"] == 2
+    assert stats["open"] == 0
+
+
+def test_rejected_orders_finish_the_handle_empty():
+    gateway = Gateway(SimulatedBroker(latency=0.0, jitter=0.0, reject_prob=1.0)).start()
+    handle = gateway.submit(trade(legs=3))
+    assert handle.wait(2)
+    gateway.close()
+
+    assert handle.status == REJECTED
+    assert handle.filled_trade() is None
+    assert gateway.report()["rejected"] == 3
+
+
+def test_some_legs_rejected_leaves_a_partial_trade():
+    gateway = Gateway(SimulatedBroker(latency=0.0, jitter=0.0, partial_prob=0.0, reject_prob=0.5, seed=4)).start()
+    handles = [gateway.submit(trade(legs=4)) for _ in range(20)]
+    assert all(h.wait(2) for h in handles)
+    gateway.close()
+
+    mixed = [h for h in handles if h.status == PARTIAL]
+    assert mixed
+    for handle in mixed:
+        assert handle.filled_trade().symbol == [o.symbol for o in handle.orders if o.status == FILLED]
+
+
+def test_concurrent_submits_are_batched_and_all_accounted_for():
+    gateway = Gateway(SimulatedBroker(latency=0.01, jitter=0.0, partial_prob=0.0), batch_size=64, batch_window=0.01).start()
+    handles = [[] for _ in range(8)]
+
+    def run(out):
+        for _ in range(100):
+            out.append(gateway.submit(trade(legs=3)))
+
+    threads = [threading.Thread(target=run, args=(out,)) for out in handles]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    handles = [h for out in handles for h in out]
+    assert all(h.wait(5) for h in handles)
+    gateway.close()
+
+    stats = gateway.report()
+    assert stats["trades"] == stats["completed"] == 800
+    assert stats["orders"] == 2400 and stats["open"] == 0
+    # Orders travel in batches, not one round trip each
+    assert stats["batches"] <= 2400 / 16
+    assert len({o.client_id for h in handles for o in h.orders}) == 2400
@@ -0,0 +1,57 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from algorithms import ids
+
+
+def issue(n):
+    return ids.worker_id(), [ids.next_id() for _ in range(n)]
+
+
+def test_ids_are_unique_and_ordered_across_threads():
+    generator = ids.IdGenerator(worker=3)
+    issued = [[] for _ in range(8)]
+
+    def run(out):
+        for _ in range(20_000):
+            out.append(generator.next_id())
+
+    threads = [threading.Thread(target=run, args=(out,)) for out in issued]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    everything = [i for out in issued for i in out]
+    assert len(set(everything)) == len(everything)
+    for out in issued:
+        assert out == sorted(out)
+    assert {ids.decompose(i)[1] for i in everything} == {3}
+
+
+def test_ids_are_unique_across_worker_processes():
+    # Pool processes claim worker numbers the way StrategyExecutor sets them up
+    worker_ids = multiprocessing.Queue()
+    for worker in range(1, 9):
+        worker_ids.put(worker)
+    with ProcessPoolExecutor(max_workers=4, initializer=ids.set_worker, initargs=(worker_ids,)) as pool:
+        results = list(pool.map(issue, [5_000] * 8))
+
+    everything = [i for _, issued in results for i in issued] + issue(5_000)[1]
+    assert len(set(everything)) == len(everything)
+    for worker, issued in results:
+        assert worker != ids.worker_id()
+        assert {ids.decompose(i)[1] for i in issued} == {worker}
+
+
+def test_ids_keep_increasing_when_the_clock_steps_back():
+    now = [1_700_000_000_000 * 1_000_000]
+    generator = ids.IdGenerator(clock=lambda: now[0])
+    issued = []
+    for step in [0, 0, -5_000_000, 0, 1_000_000, -1_000_000_000, 0]:
+        now[0] += step
+        issued.extend(generator.next_id() for _ in range(3000))
+
+    assert len(set(issued)) == len(issued)
+    assert issued == sorted(issued)
@@ -0,0 +1,34 @@
+import numpy as np
+
+from algorithms.indicators import RollingCovariance, RollingMoments
+
+
+def prices(rows, n, seed=11):
+    # Price-like levels, where naive sum-of-squares updates lose precision
+    rng = np.random.default_rng(seed)
+    return 100 * np.cumprod(1 + rng.normal(0, 0.01, (rows, n)), axis=0)
+
+
+def test_rolling_moments_match_numpy_over_the_window():
+    window, data = 20, prices(500, 4)
+    moments = RollingMoments(window, 4)
+    for i, row in enumerate(data):
+        moments.update(row)
+        seen = data[max(0, i + 1 - window): i + 1]
+        assert moments.ready == (i + 1 >= window)
+        np.testing.assert_allclose(moments.mean, seen.mean(axis=0), rtol=1e-10)
+        if len(seen) > 1:
+            np.testing.assert_allclose(moments.var, seen.var(axis=0, ddof=1), rtol=1e-6, atol=1e-10)
+    np.testing.assert_allclose(moments.zscore(), (data[-1] - seen.mean(axis=0)) / seen.std(axis=0, ddof=1), rtol=1e-6)
+
+
+def test_rolling_covariance_matches_numpy_over_the_window():
+    window, data = 30, prices(400, 3, seed=12)
+    rolling = RollingCovariance(window, 3)
+    for i, row in enumerate(data):
+        rolling.update(row)
+        seen = data[max(0, i + 1 - window): i + 1]
+        if len(seen) > 1:
+            np.testing.assert_allclose(rolling.cov, np.cov(seen, rowvar=False), rtol=1e-6, atol=1e-10)
+    np.testing.assert_allclose(rolling.corr, np.corrcoef(seen, rowvar=False), rtol=1e-6)
+
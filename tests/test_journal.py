@@ -0,0 +1,67 @@
+import time
+
+import duckdb
+import numpy as np
+
+from algorithms.base import Trade, TradeBatch
+from database.init_duckdb import initialize_duckdb
+from database.journal import HEADER_SIZE, RECORD, Journal
+
+
+def entry(strategy, legs):
+    symbols = ["AAPL", "MSFT", "NVDA"][:legs]
+    return TradeBatch.from_trades([Trade(strategy, time.time(), [1.0] * legs, symbols, [100.0] * legs)])
+
+
+def tear(journal_dir, record, how):
+    # Damage one record of the (only) segment as a crash mid-write would
+    (path,) = journal_dir.glob("*.wal")
+    records = np.memmap(path, dtype=RECORD, mode="r+", offset=HEADER_SIZE)
+    if how == "zero":
+        records[record] = np.zeros(1, dtype=RECORD)
+    else:
+        records["price"][record] += 1.0  # stale crc
+    records.flush()
+    del records
+
+
+def test_torn_entry_is_dropped_whole(tmp_path):
+    for how in ("zero", "corrupt"):
+        journal_dir = tmp_path / how
+        journal = Journal(journal_dir, segment_records=64, sync=False)
+        journal.append_batch(entry("a", 2))
+        journal.append_batch(entry("b", 3))
+        journal.close()
+
+        # The middle leg of "b" never made it: "b" goes, "a" stays
+        tear(journal_dir, 3, how)
+        journal = Journal(journal_dir, segment_records=64, sync=False)
+        pending = journal.pending()
+        assert pending.strategies == ["a"] and len(pending) == 2
+
+        # Appends carry on from the last whole entry
+        assert journal.append_batch(entry("c", 1)) == 3
+        journal.close()
+        journal = Journal(journal_dir, segment_records=64, sync=False)
+        pending = journal.pending()
+        assert len(pending) == 3
+        assert sorted(pending.strategies) == ["a", "c"]
+        journal.close()
+
+
+def test_replay_after_a_torn_record(tmp_path):
+    db_path = str(tmp_path / "algory.duckdb")
+    initialize_duckdb(db_path)
+    journal = Journal(tmp_path / "journal", segment_records=64, sync=False)
+    journal.append_batch(entry("a", 2))
+    journal.append_batch(entry("b", 3))
+    journal.close()
+    tear(tmp_path / "journal", 4, "corrupt")
+
+    journal = Journal(tmp_path / "journal", segment_records=64, sync=False)
+    con = duckdb.connect(db_path)
+    assert journal.replay(con, db_path) == 2
+    assert journal.replay(con, db_path) == 0
+    assert con.execute("SELECT DISTINCT strategy FROM trades").fetchall() == [("a",)]
+    con.close()
+    journal.close()
@@ -0,0 +1,75 @@
+import time
+
+import duckdb
+import pytest
+
+from algorithms.base import Trade
+from database import writer as writer_module
+from database.append import append_trade
+from database.init_duckdb import initialize_duckdb
+from database.ledger import PositionLedger, get_ledger
+from database.writer import TradeWriter
+
+
+def table_positions(con):
+    return {(s, sym): q for s, sym, q in con.execute("SELECT strategy, symbol, quantity FROM positions").fetchall()}
+
+
+def test_mirror_matches_table_after_failed_append(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "algory.duckdb")
+    initialize_duckdb(db_path)
+    ledger = get_ledger(db_path)
+
+    apply_batch = PositionLedger.apply_batch
+    calls = []
+
+    def flaky(self, batch, con):
+        deltas = apply_batch(self, batch, con)
+        calls.append(len(batch))
+        if len(calls) == 1:
+            raise RuntimeError("disk full")
+        return deltas
+
+    monkeypatch.setattr(PositionLedger, "apply_batch", flaky)
+
+    with pytest.raises(RuntimeError):
+        append_trade(Trade("s", time.time(), [5.0], ["AAPL"], [100.0]), db_path)
+    con = duckdb.connect(db_path)
+    assert ledger.positions == {}
+    assert table_positions(con) == {}
+
+    append_trade(Trade("s", time.time(), [5.0], ["AAPL"], [100.0]), db_path)
+    assert ledger.positions == {("s", "AAPL"): 5.0}
+    assert table_positions(con) == ledger.positions
+    con.close()
+
+
+def test_mirror_matches_table_after_failed_flush(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "algory.duckdb")
+    initialize_duckdb(db_path)
+    writer = TradeWriter(db_path, max_delay=None)
+
+    add_trades = writer_module.add_trades
+    calls = []
+
+    def flaky(con, batch):
+        calls.append(len(batch))
+        if len(calls) == 1:
+            raise RuntimeError("disk full")
+        add_trades(con, batch)
+
+    monkeypatch.setattr(writer_module, "add_trades", flaky)
+
+    writer.submit(Trade("s", time.time(), [5.0], ["AAPL"], [100.0]))
+    with pytest.raises(RuntimeError):
+        writer.flush()
+    assert writer.pending() == 1
+    assert writer.ledger.positions.get(("s", "AAPL"), 0.0) == 0.0
+
+    assert writer.flush() == 1
+    assert writer.ledger.positions == {("s", "AAPL"): 5.0}
+    assert table_positions(writer.con) == writer.ledger.positions
+    writer.close()
+
+    # A fresh ledger loaded from the table agrees too
+    assert PositionLedger(db_path).load().positions == {("s", "AAPL"): 5.0}
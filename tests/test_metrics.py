@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+
+import duckdb
+import numpy as np
+import pandas as pd
+import pytest
+
+from database import tiering
+from database.init_duckdb import initialize_duckdb
+from stats import cache as cache_module
+from stats.cache import MetricsCache
+from stats.metrics import compute_metrics
+from stats.running import SortedRuns
+
+
+class NoBenchmark:
+    def prices(self):
+        return pd.Series(dtype=float)
+
+
+def test_sorted_runs_quantiles_match_numpy():
+    rng = np.random.default_rng(3)
+    runs, seen = SortedRuns(), []
+    for _ in range(200):
+        values = np.sort(rng.normal(size=rng.integers(0, 20)))
+        runs.add(values)
+        seen.append(values)
+    values = np.concatenate(seen)
+
+    assert len(runs) == len(values)
+    assert len(runs.runs) <= np.log2(len(values)) + 1
+    for q in (0.0, 0.05, 0.5, 0.95, 1.0):
+        assert runs.quantile(q) == pytest.approx(np.quantile(values, q))
+
+
+def write_history(con, start, values):
+    con.executemany(
+        "INSERT INTO portfolio_history VALUES (?, ?, 100.0, 1)",
+        [(start + timedelta(minutes=i), v) for i, v in enumerate(values)],
+    )
+
+
+def test_cache_starts_over_after_a_reset(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_module, "get_store", lambda symbol: NoBenchmark())
+    db_path = str(tmp_path / "algory.duckdb")
+    initialize_duckdb(db_path)
+    con = duckdb.connect(db_path)
+    rng = np.random.default_rng(5)
+
+    write_history(con, datetime(2026, 1, 1), 100 * np.cumprod(1 + rng.normal(0, 0.01, 50)))
+    cached = MetricsCache("portfolio_history", "total_value", db_path=db_path)
+    cached.get()
+
+    # Cleared and refilled past the old row count and latest timestamp: only
+    # the generation tells the cache its aggregates are stale
+    tiering.reset(con, db_path)
+    write_history(con, datetime(2026, 1, 2), 50 * np.cumprod(1 + rng.normal(0, 0.02, 80)))
+    con.close()
+
+    expected = MetricsCache("portfolio_history", "total_value", db_path=db_path).get()
+    assert cached.get() == expected
+
+
+# Per-strategy numbers from the original pandas implementation in getStats
+# (before compute_metrics), on the frame built below. Its beta never lined up
+# with the benchmark, so beta is left out
+BASELINE = {
+    "a": {
+        "PnL": 0.10000000000000009, "Absolute PnL": 10.0, "CAGR": 435757344.41051245,
+        "Max Drawdown": -0.01904761904761909, "Sharpe Ratio": 20.018192520713917,
+        "Sortino Ratio": 39.6872730096244, "Volatility": 1.0210679295356921,
+        "Value at Risk (95%)": -0.01627450980392159, "Kurtosis": -2.0089762110516807,
+        "Average Trade Return": 0.014010604716927453, "Median Trade Return": 0.020000000000000018,
+        "Win/Loss Ratio": 1.3333333333333333, "Average Win / Average Loss": 2.6800480442328394,
+    },
+    "b": {
+        "PnL": 0.0, "Absolute PnL": 0.0, "CAGR": 0.0,
+        "Max Drawdown": -0.07843137254901966, "Sharpe Ratio": 0.7432406898519781,
+        "Sortino Ratio": 0.9103603694698419, "Volatility": 1.7786869379044221,
+        "Value at Risk (95%)": -0.05271493212669683, "Kurtosis": -1.9842434103892166,
+        "Average Trade Return": 0.0009250866584651352, "Median Trade Return": -0.020000000000000018,
+        "Win/Loss Ratio": 0.75, "Average Win / Average Loss": 1.395845946209276,
+    },
+}
+
+
+def test_compute_metrics_matches_the_baseline_per_group():
+    ts = pd.date_range("2026-01-05 09:30", periods=8, freq="6h")
+    df = pd.concat([
+        pd.DataFrame({"timestamp": ts, "strategy": "a", "strategy_value": [100.0, 102, 101, 105, 103, 108, 107, 110]}),
+        # Out of time order on purpose: compute_metrics sorts
+        pd.DataFrame({"timestamp": ts[::-1], "strategy": "b", "strategy_value": [50.0, 52, 49, 47, 48, 51, 49, 50]}),
+    ])
+    results = compute_metrics(df, "strategy_value", group_col="strategy")
+
+    assert set(results) == set(BASELINE)
+    for strategy, expected in BASELINE.items():
+        assert np.isnan(results[strategy]["Beta to Market"])
+        for name, value in expected.items():
+            assert results[strategy][name] == pytest.approx(value, rel=1e-9, abs=1e-12), (strategy, name)
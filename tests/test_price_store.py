@@ -0,0 +1,25 @@
+from datetime import datetime
+
+import numpy as np
+
+from database.price_store import PriceStore
+
+
+def test_round_trip_through_parquet_and_npy(tmp_path):
+    store = PriceStore.random_walk(["AAPL", "MSFT", "NVDA"], 48, end=datetime(2026, 1, 6), seed=7)
+    store.prices[5, 1] = np.nan  # gaps survive too
+
+    for path in (tmp_path / "prices.parquet", tmp_path / "prices"):
+        loaded = PriceStore.load(store.save(path))
+        assert loaded.symbols == store.symbols
+        np.testing.assert_array_equal(loaded.timestamps, store.timestamps)
+        np.testing.assert_array_equal(loaded.prices, store.prices)
+
+        subset = PriceStore.load(path, symbols=["NVDA", "AAPL"])
+        assert subset.symbols == ["NVDA", "AAPL"]
+        np.testing.assert_array_equal(subset.prices, store.prices[:, [2, 0]])
+
+    # The .npy form pages prices in from disk
+    assert isinstance(PriceStore.load(tmp_path / "prices").prices, np.memmap)
+    ts = store.timestamps[10] + np.timedelta64(30, "m")
+    assert loaded.price("MSFT", ts) == store.prices[10, 1]
@@ -0,0 +1,85 @@
+import json
+from datetime import datetime, timedelta
+
+import duckdb
+import numpy as np
+import pyarrow as pa
+
+from database import queries, rollups
+from database.downsample import lttb
+from database.init_duckdb import initialize_duckdb
+
+
+def portfolio(tmp_path, minutes):
+    db_path = str(tmp_path / "algory.duckdb")
+    initialize_duckdb(db_path)
+    con = duckdb.connect(db_path)
+    start = datetime(2026, 1, 5)
+    rows = [(start + timedelta(minutes=i), 100.0 + i, 50.0, i % 5) for i in range(minutes)]
+    con.executemany("INSERT INTO portfolio_history VALUES (?, ?, ?, ?)", rows)
+    rollups.add_equity(con, [(ts, rollups.PORTFOLIO, value) for ts, value, _, _ in rows])
+    return con, start
+
+
+def test_portfolio_charts_read_the_rollups(tmp_path):
+    con, start = portfolio(tmp_path, 3000)
+
+    # 50 hours in at most 100 points: hourly closes with their own rows
+    table = queries.portfolio_range(con, points=100)
+    assert table.num_rows == 50
+    first = table.to_pylist()[0]
+    assert first == {"timestamp": start + timedelta(minutes=59), "total_value": 159.0, "total_cash": 50.0, "total_positions": 4}
+
+    # Short ranges come at one-minute resolution; OHLC keeps the last row's columns
+    table = queries.portfolio_range(con, start, start + timedelta(minutes=9), "total_positions", 100, "ohlc")
+    assert table.column_names == ["timestamp", "open", "high", "low", "close", "total_positions"]
+    assert table.column("close").to_pylist() == [100.0 + i for i in range(10)]
+    assert table.column("total_positions").to_pylist() == [i % 5 for i in range(10)]
+    con.close()
+
+
+def test_trade_pages_go_newest_first_without_gaps(tmp_path):
+    db_path = str(tmp_path / "algory.duckdb")
+    initialize_duckdb(db_path)
+    con = duckdb.connect(db_path)
+    legs = [(trade_id, symbol) for trade_id in range(1, 8) for symbol in ("AAPL", "MSFT", "NVDA")]
+    con.executemany(
+        "INSERT INTO trades (trade_id, timestamp, strategy, symbol, side, quantity, price) VALUES (?, now(), 's', ?, 'BUY', 1, 1)",
+        legs,
+    )
+
+    # Pages of 4 split trades across pages; the cursor carries on mid-trade
+    seen, cursor = [], (None, None)
+    while True:
+        page = queries.trades_page(con, *cursor, columns="trade_id", limit=4)
+        rows = list(zip(page.column("trade_id").to_pylist(), page.column("symbol").to_pylist()))
+        seen.extend(rows)
+        if len(rows) < 4:
+            break
+        cursor = rows[-1]
+    assert seen == sorted(legs, reverse=True)
+    con.close()
+
+
+def test_lttb_keeps_the_ends_and_the_peaks():
+    x = np.arange(1000, dtype=np.float64)
+    y = np.zeros(1000)
+    y[[250, 700]] = [10.0, -10.0]
+    keep = lttb(x, y, 20)
+    assert len(keep) == 20
+    assert keep[0] == 0 and keep[-1] == 999
+    assert list(keep) == sorted(keep)
+    assert {250, 700} <= set(keep)
+    assert list(lttb(x[:10], y[:10], 20)) == list(range(10))
+
+
+def test_to_json_keeps_row_order_and_formats_timestamps():
+    n = 200_000
+    table = pa.table({
+        "i": np.arange(n)[::-1],
+        "timestamp": pa.array([datetime(2026, 1, 5, 9, 30, 0, 250)] * n, pa.timestamp("us")),
+    })
+    rows = json.loads(queries.to_json(table))
+    assert [r["i"] for r in rows] == list(range(n))[::-1]
+    assert rows[0]["timestamp"] == "2026-01-05T09:30:00.000250"
+    assert queries.to_json(table.slice(0, 0)) == "[]"
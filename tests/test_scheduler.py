@@ -0,0 +1,61 @@
+import pytest
+
+from controller.scheduler import Scheduler
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_drift_is_measured_from_the_slot():
+    clock = Clock(1000.5)
+    scheduler = Scheduler(clock)
+    job = scheduler.add("tick", 10, lambda: None)
+    assert job.due == 1010
+
+    # Picked up 0.25s and then 1.5s late
+    for late in (0.25, 1.5):
+        clock.now = job.due + late
+        assert scheduler.run_pending() == 1
+    stats = scheduler.report()["tick"]
+    assert stats["runs"] == 2 and stats["missed"] == 0
+    assert stats["drift_last"] == pytest.approx(1.5)
+    assert stats["drift_max"] == pytest.approx(1.5)
+    assert stats["drift_mean"] == pytest.approx(0.875)
+    assert stats["next_due"] == 1030
+
+
+def test_overrunning_job_skips_the_slots_it_missed():
+    clock = Clock(0.5)
+    scheduler = Scheduler(clock)
+
+    def slow():
+        clock.now += 35  # runs through three more slots
+
+    job = scheduler.add("slow", 10, slow)
+    clock.now = 10
+    scheduler.run_pending()
+    assert job.missed == 3
+    assert job.due == 50
+
+    # Nothing fires back to back to catch up
+    clock.now = 49.9
+    assert scheduler.run_pending() == 0
+
+
+def test_jobs_due_together_run_in_priority_order():
+    clock = Clock(59.5)
+    scheduler = Scheduler(clock)
+    ran = []
+    scheduler.add("bookkeeping", 60, lambda: ran.append("bookkeeping"), priority=2)
+    scheduler.add("market", 1, lambda: ran.append("market"), priority=0)
+    scheduler.add("strategy", 60, lambda: ran.append("strategy"), priority=1)
+
+    # All three are first due at 60, whatever order they were added in
+    clock.now = 60
+    assert scheduler.run_pending() == 3
+    assert ran == ["market", "strategy", "bookkeeping"]
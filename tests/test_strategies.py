@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from algorithms.market import MarketBuffer
+from algorithms.mean_reversion import MeanReversion
+from algorithms.pairs import Pairs
+from algorithms.screening import PairsScreener
+
+SYMBOLS = ["AAA", "BBB", "CCC", "DDD"]
+
+
+def random_walk(rows: int, seed: int = 7) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    common = np.cumsum(rng.normal(0, 0.01, rows))[:, None]
+    return 100 * np.exp(common + np.cumsum(rng.normal(0, 0.01, (rows, len(SYMBOLS))), axis=0))
+
+
+def live_positions(strategy, prices: np.ndarray, every: int = 3, screener: PairsScreener | None = None) -> dict[int, np.ndarray]:
+    # Runs the strategy every `every` appends, as the scheduler would, and
+    # records the position it has traded into after each run, by row
+    market = MarketBuffer(SYMBOLS, capacity=len(prices))
+    start = datetime(2026, 1, 1)
+    position = np.zeros(len(SYMBOLS))
+    positions = {}
+    for t, row in enumerate(prices):
+        market.append(start + timedelta(seconds=t), row)
+        if screener is not None and (t + 1) % strategy.screen_bars == 0:
+            screener.refresh(market.snapshot())
+        if (t + 1) % every == 0 or t == len(prices) - 1:
+            trade = strategy.run(market.snapshot())
+            if trade is not None:
+                for qty, symbol in zip(trade.qty, trade.symbol):
+                    position[SYMBOLS.index(symbol)] += qty
+            positions[t] = position.copy()
+    return positions
+
+
+def assert_trades_like_backtest(orders: np.ndarray, positions: dict[int, np.ndarray]) -> None:
+    assert np.abs(orders).sum() > 0
+    held = np.cumsum(orders, axis=0)
+    for t, position in positions.items():
+        np.testing.assert_allclose(position, held[t], err_msg=f"row {t}")
+
+
+def test_mean_reversion_run_steps_every_bar():
+    prices = random_walk(400)
+    orders = MeanReversion().run_batch(prices, SYMBOLS)
+    assert_trades_like_backtest(orders, live_positions(MeanReversion(), prices))
+
+
+def test_pairs_run_matches_run_batch():
+    prices = random_walk(400)
+    orders = Pairs().run_batch(prices, SYMBOLS)
+    assert_trades_like_backtest(orders, live_positions(Pairs(), prices))
+
+
+def test_pairs_run_batch_follows_the_screener():
+    prices = random_walk(400, seed=11)
+    backtest, live = Pairs(), Pairs()
+    backtest.bind({"pairs_screener": PairsScreener(window=120)})
+    screener = PairsScreener(window=120)
+    live.bind({"pairs_screener": screener})
+
+    orders = backtest.run_batch(prices, SYMBOLS)
+    assert_trades_like_backtest(orders, live_positions(live, prices, screener=screener))
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+
+import duckdb
+import pytest
+
+from database import tiering
+from database.init_duckdb import initialize_duckdb
+
+NOW = datetime(2026, 3, 20, 12)
+DAYS = 10
+
+
+def filled(tmp_path):
+    # One trade leg and one portfolio row per day over the last DAYS days
+    db_path = str(tmp_path / "algory.duckdb")
+    initialize_duckdb(db_path)
+    con = duckdb.connect(db_path)
+    for day in range(DAYS):
+        ts = NOW - timedelta(days=day)
+        con.execute("INSERT INTO trades (trade_id, timestamp, strategy, symbol, side, quantity, price) VALUES (?, ?, 's', 'AAPL', 'BUY', 1, 100)", [day, ts])
+        con.execute("INSERT INTO portfolio_history VALUES (?, ?, 0, 1)", [ts, 100.0 + day])
+    return con, db_path
+
+
+def rows(con, table):
+    return sorted(con.execute(f"SELECT * EXCLUDE (date) FROM {table}").fetchall())
+
+
+def test_archiving_keeps_every_row_and_is_idempotent(tmp_path):
+    con, db_path = filled(tmp_path)
+    before = {t: rows(con, f"{t}_all") for t in ("trades", "portfolio_history")}
+
+    # Today plus three whole days stay hot
+    moved = tiering.archive(con, db_path, hot_days=3, now=NOW)
+    assert moved == {"trades": 6, "portfolio_history": 6}
+    assert con.execute("SELECT count(*) FROM trades").fetchone()[0] == 4
+    for table, expected in before.items():
+        assert rows(con, f"{table}_all") == expected
+
+    # Nothing left to move: a second run over the same days writes nothing
+    files = sorted(tiering.archive_dir(db_path).rglob("*.parquet"))
+    assert tiering.archive(con, db_path, hot_days=3, now=NOW) == {}
+    assert sorted(tiering.archive_dir(db_path).rglob("*.parquet")) == files
+    for table, expected in before.items():
+        assert rows(con, f"{table}_all") == expected
+    con.close()
+
+
+def test_failed_copy_removes_its_partial_output(tmp_path):
+    con, db_path = filled(tmp_path)
+    before = rows(con, "trades_all")
+
+    # trades are copied first; a file where a portfolio partition directory
+    # belongs makes the second COPY fail
+    blocker = tiering.archive_dir(db_path) / "portfolio_history" / f"date={(NOW - timedelta(days=5)).date()}"
+    blocker.parent.mkdir(parents=True)
+    blocker.write_text("")
+    with pytest.raises(Exception):
+        tiering.archive(con, db_path, hot_days=3, now=NOW)
+
+    assert not any(tiering.archive_dir(db_path).rglob("*.parquet"))
+    assert con.execute("SELECT count(*) FROM trades").fetchone()[0] == DAYS
+    assert rows(con, "trades_all") == before
+    con.close()
+
+
+def test_reset_bumps_the_generation_and_drops_the_archive(tmp_path):
+    con, db_path = filled(tmp_path)
+    tiering.archive(con, db_path, hot_days=3, now=NOW)
+    assert tiering.generation(con) == 0
+
+    tiering.reset(con, db_path)
+    assert tiering.generation(con) == 1
+    assert not tiering.archive_dir(db_path).exists()
+    assert con.execute("SELECT count(*) FROM trades_all").fetchone()[0] == 0
+    assert con.execute("SELECT count(*) FROM portfolio_history_all").fetchone()[0] == 0
+
+    tiering.reset(con, db_path)
+    assert tiering.generation(con) == 2
+    con.close()
@@ -0,0 +1,78 @@
+import time
+
+import pytest
+
+from algorithms.base import Trade
+from database.connection import ReplicaManager
+from database.init_duckdb import initialize_duckdb
+from database.writer import TradeWriter
+
+
+@pytest.fixture
+def writer(tmp_path):
+    db_path = str(tmp_path / "algory.duckdb")
+    initialize_duckdb(db_path)
+    writer = TradeWriter(db_path, max_delay=None)
+    yield writer
+    writer.close()
+
+
+def rows(writer, sql):
+    return writer.con.execute(sql).fetchall()
+
+
+def test_repeated_symbol_is_one_leg(writer):
+    writer.submit(Trade("s", time.time(), [1.0, 2.0], ["AAPL", "AAPL"], [10.0, 13.0]))
+    assert writer.flush() == 1
+    assert rows(writer, "SELECT symbol, quantity, price FROM trades") == [("AAPL", 3.0, 12.0)]
+
+
+def test_duplicate_key_goes_to_dead_letter(writer):
+    now = time.time()
+    writer.submit(Trade("s", now, [1.0], ["MSFT"], [5.0], trade_id=7))
+    writer.flush()
+
+    # The same key again, alongside an unrelated trade, and twice within one flush
+    writer.submit(Trade("s", now, [1.0], ["MSFT"], [5.0], trade_id=7))
+    writer.submit(Trade("s", now, [3.0], ["KO"], [50.0], trade_id=8))
+    writer.submit(Trade("s", now, [4.0], ["KO"], [50.0], trade_id=8))
+    assert writer.flush() == 1
+    assert writer.pending() == 0
+
+    assert rows(writer, "SELECT trade_id, symbol, quantity FROM trades ORDER BY trade_id") == [(7, "MSFT", 1.0), (8, "KO", 3.0)]
+    assert rows(writer, "SELECT trade_id, symbol FROM trades_dead_letter ORDER BY trade_id") == [(7, "MSFT"), (8, "KO")]
+    assert writer.ledger.positions == {("s", "MSFT"): 1.0, ("s", "KO"): 3.0}
+
+    # Later writes are not held up
+    writer.submit(Trade("s", now, [1.0], ["WMT"], [90.0]))
+    assert writer.flush() == 1
+
+
+def test_publish_copies_only_after_new_commits(writer):
+    writer.submit(Trade("s", time.time(), [1.0], ["AAPL"], [100.0]))
+    first = writer.publish_snapshot()
+    assert first is not None and first.exists()
+    assert writer.publish_snapshot() is None
+    assert writer.publish_snapshot(force=True) is not None
+
+    writer.submit(Trade("s", time.time(), [1.0], ["MSFT"], [50.0]))
+    assert writer.publish_snapshot() is not None
+    stats = writer.report()
+    assert (stats["published"], stats["skipped"]) == (3, 1)
+    assert stats["bytes"] > 0 and stats["copy_max"] >= stats["copy_last"] > 0
+
+
+def test_readers_close_replaced_snapshots(writer):
+    reader = ReplicaManager(writer.db_path, check_interval=0.0)
+    roots = []
+    for i in range(3):
+        writer.submit(Trade("s", time.time(), [1.0], ["AAPL"], [100.0]))
+        writer.publish_snapshot()
+        assert reader.execute("SELECT count(*) FROM trades").fetchone()[0] == i + 1
+        roots.append(reader._root)
+
+    # The previous snapshot stays usable until the next swap; older ones are closed
+    roots[1].execute("SELECT 1")
+    with pytest.raises(Exception):
+        roots[0].execute("SELECT 1")
+    reader.close()